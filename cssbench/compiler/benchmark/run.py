@@ -4,11 +4,39 @@ A script to run compiler benchmarks. Usage:
     
         python3 run.py [-v|--verbose] <compiler> <benchmark> <flags>
 
+<benchmark> is a benchmark name, a comma separated list of names, or "all".
+With --jobs, several benchmarks are compiled and run in parallel.
+
 execution_time: The total time taken to execute the benchmarked code, measured in seconds.
 avrg_exec_time: Average execution time, measured in seconds.
-compilation_time: The time taken to compile the code, measured in seconds.
+compilation_time: The time taken to compile the code, measured in seconds. With
+    --object-cache this is the cold compile time, i.e. the recorded compile
+    times of reused objects are included.
+incremental_compilation_time: The time actually spent building, measured in
+    seconds (only with --object-cache).
 file_size: The size of the compiled executable file, measured in bytes.
 maxrss: Stands for "maximum resident set size", measured in kilobytes (KB).
+binary_hash: SHA-256 of the linked executable (only with --dedup).
+reused_measurement: Whether the measurements were reused from a byte-identical
+    executable measured before (only with --dedup).
+
+With --adaptive, the executable is run repeatedly in samples of
+--sample-repeat iterations until the 95% confidence interval of the mean
+iteration time is narrower than --rel-ci times the mean, or the time budget
+is exhausted. execution_time, maxrss and PAPI counters then cover all samples,
+avrg_exec_time is the mean iteration time and the following are added:
+exec_time_stddev: Standard deviation of the iteration time, in seconds.
+exec_time_median: Median of the iteration time, in seconds.
+exec_time_ci_low, exec_time_ci_high: 95% confidence interval of the mean.
+num_samples: The number of samples taken.
+repeat_times: The total number of iterations executed.
+
+With --threshold, measurement is also done in samples (ten per run without
+--adaptive) and stops early once the configuration is shown to be slower than
+--threshold seconds per iteration by more than --margin: either the time spent
+so far already exceeds what the whole run may take, or the lower bound of the
+confidence interval does. The partial result is then flagged as
+censored: true.
 
 PAPI_TOT_CYC: The total number of CPU cycles consumed during the execution.
 PAPI_TOT_INS: The total number of instructions the CPU executed.
@@ -19,13 +47,37 @@ PAPI_MEM_WCY: The number of cycles spent waiting for memory accesses.
 """
 
 import argparse
+import hashlib
+import math
 import os
 import json
+import shutil
 import subprocess
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from contextlib import contextmanager
 
+# Persistent across runs when mounted from the host
+CACHE_DIR = Path(__file__).resolve().parent / "cache"
+
+# Results that depend on the build rather than on the executable itself
+BUILD_METRICS = ("compilation_time", "incremental_compilation_time", "file_size")
+
+# Two-sided 95% critical values of Student's t distribution, by degrees of freedom
+T_CRITICAL_95 = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+]
+
+# Must match INCLUDE_FLAGS in the benchmark Makefiles
+INCLUDE_FLAGS = [
+    "-I../../utilities",
+    "-I../../utilities/papi/include",
+    "-I../../utilities/polybench/include",
+]
+
 
 def execute_command(cmd):
     """
@@ -55,15 +107,387 @@ def parse_arguments():
     )
     parser.add_argument("compiler", choices=["LLVM", "GCC"], help="Compiler to use")
     parser.add_argument(
-        "benchmark", choices=["all"] + list_benchmarks(), help="Benchmark name"
+        "benchmark", help='Benchmark name, comma separated list of names or "all"'
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of benchmarks to compile and run in parallel",
     )
     parser.add_argument("--flags", default=[], help="Compiler flags (optional)")
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Reuse the measurements of a byte-identical executable",
+    )
+    parser.add_argument(
+        "--object-cache",
+        action="store_true",
+        help="Reuse object files of unchanged translation units",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Repeat until the confidence interval of the mean is narrow enough",
+    )
+    parser.add_argument(
+        "--rel-ci",
+        type=float,
+        default=0.02,
+        help="Target width of the confidence interval, relative to the mean",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=60.0,
+        help="Maximum time spent measuring one benchmark, in seconds",
+    )
+    parser.add_argument(
+        "--min-samples", type=int, default=5, help="Minimum number of samples"
+    )
+    parser.add_argument(
+        "--max-samples", type=int, default=100, help="Maximum number of samples"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=None,
+        help="Abort once clearly slower than this time per iteration, in seconds",
+    )
+    parser.add_argument(
+        "--margin",
+        type=float,
+        default=0.1,
+        help="Relative margin by which a run must exceed --threshold to abort",
+    )
+    parser.add_argument(
+        "--sample-repeat",
+        type=int,
+        default=None,
+        help="Iterations per sample (default: a tenth of repeat_times)",
+    )
     return parser.parse_args()
 
 
-def compile_and_run_benchmark(benchmark, compiler, flags, verbose=False):
+def hash_file(path):
+    """
+    Return the SHA-256 digest of a file.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def binary_record_path(benchmark, compiler, binary_hash):
+    return CACHE_DIR / "binaries" / compiler / benchmark / f"{binary_hash}.json"
+
+
+def load_binary_record(benchmark, compiler, binary_hash, repeat_times):
+    """
+    Return the measurements of a previously run executable, if any.
+    """
+    record_path = binary_record_path(benchmark, compiler, binary_hash)
+    try:
+        with open(record_path) as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if record.get("repeat_times") != repeat_times:
+        return None
+    return record["result"]
+
+
+def save_binary_record(benchmark, compiler, binary_hash, repeat_times, result):
+    record_path = binary_record_path(benchmark, compiler, binary_hash)
+    measurements = {k: v for k, v in result.items() if k not in BUILD_METRICS}
+    write_cache_file(
+        record_path,
+        json.dumps({"repeat_times": repeat_times, "result": measurements}).encode(),
+    )
+
+
+def write_cache_file(path, data):
+    """
+    Write a cache file atomically, several containers may share the cache.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def make_command(compiler, compiler_vars_str, optflags, target=None):
+    command = [
+        "make",
+        f"COMPILER_TYPE={compiler}",
+        f"MACROS={compiler_vars_str}",
+        f"OPTFLAGS={optflags}",
+    ]
+    if target is not None:
+        command.append(target)
+    return command
+
+
+def object_cache_key(source, compiler, compiler_vars_str, optflags):
+    """
+    Key a translation unit on its preprocessed source, so that edits to
+    headers and build macros are accounted for while macros it doesn't use
+    don't matter. OPTFLAGS may define macros too (e.g. -ffast-math) with GCC;
+    with LLVM they are passed to opt only.
+    """
+    if compiler == "GCC":
+        preprocess = ["gcc", "-E"] + INCLUDE_FLAGS + compiler_vars_str.split()
+        preprocess += optflags.split()
+    else:
+        preprocess = ["clang", "-E"] + INCLUDE_FLAGS + compiler_vars_str.split()
+
+    preprocessed = subprocess.check_output(
+        preprocess + [str(source)], stderr=subprocess.DEVNULL
+    )
+
+    digest = hashlib.sha256()
+    digest.update(f"{compiler}\0{optflags}\0".encode())
+    digest.update(preprocessed)
+    return digest.hexdigest()
+
+
+def build_benchmark(
+    compiler, compiler_vars_str, optflags, verbose=False, object_cache=False
+):
+    """
+    Build a.out in the current benchmark directory and return build metrics.
+
+    With object_cache, objects of translation units whose key is cached are
+    restored instead of compiled, and the remaining ones are compiled one by
+    one so that their compile time can be recorded next to them.
+    """
+    output = None if verbose else subprocess.DEVNULL
+    subprocess.run(["make", "clean"], stdout=subprocess.DEVNULL, check=True)
+
+    start_time = time.time()
+    if not object_cache:
+        subprocess.run(
+            make_command(compiler, compiler_vars_str, optflags),
+            stdout=output,
+            stderr=output,
+            check=True,
+        )
+        return {"compilation_time": time.time() - start_time}
+
+    suffix = ".o" if compiler == "GCC" else ".bc"
+    units = {Path(source.stem + suffix): source for source in Path.cwd().glob("*.c")}
+    units[Path("cssbench" + suffix)] = Path("../../utilities/cssbench.c")
+
+    cold_compilation_time = 0.0
+    for target, source in sorted(units.items()):
+        key = object_cache_key(source, compiler, compiler_vars_str, optflags)
+        cached_object = CACHE_DIR / "objects" / compiler / f"{key}{suffix}"
+        cached_record = cached_object.with_suffix(".json")
+
+        try:
+            with open(cached_record) as f:
+                unit_compilation_time = json.load(f)["compilation_time"]
+            # The fresh copy is newer than its source, so make skips it
+            shutil.copyfile(cached_object, target)
+        except (OSError, ValueError, KeyError):
+            unit_start_time = time.time()
+            subprocess.run(
+                make_command(compiler, compiler_vars_str, optflags, str(target)),
+                stdout=output,
+                stderr=output,
+                check=True,
+            )
+            unit_compilation_time = time.time() - unit_start_time
+
+            write_cache_file(cached_object, target.read_bytes())
+            write_cache_file(
+                cached_record,
+                json.dumps({"compilation_time": unit_compilation_time}).encode(),
+            )
+
+        cold_compilation_time += unit_compilation_time
+
+    # Normally copied by the cssbench rule, which was skipped if restored
+    shutil.copyfile("../../utilities/papi_events.txt", "papi_events.txt")
+
+    link_start_time = time.time()
+    subprocess.run(
+        make_command(compiler, compiler_vars_str, optflags),
+        stdout=output,
+        stderr=output,
+        check=True,
+    )
+    cold_compilation_time += time.time() - link_start_time
+
+    return {
+        "compilation_time": cold_compilation_time,
+        "incremental_compilation_time": time.time() - start_time,
+    }
+
+
+def run_executable(command, repeat_times, verbose=False):
+    """
+    Run the benchmark command in the current directory and return the
+    measurements it dumped.
+    """
+    if os.path.exists("tmp_result.json"):
+        os.remove("tmp_result.json")
+
+    os.environ["BENCH_REPEAT_MAIN"] = str(repeat_times)
+    subprocess.run(
+        [command],
+        shell=True,
+        stdout=None if verbose else subprocess.DEVNULL,
+        stderr=None if verbose else subprocess.DEVNULL,
+        check=True,
+    )
+
+    with open("tmp_result.json") as f:
+        return json.load(f)
+
+
+def summarize_samples(samples):
+    """
+    Return the mean, standard deviation, median and 95% confidence interval
+    of the mean of the samples.
+    """
+    n = len(samples)
+    mean = sum(samples) / n
+    if n > 1:
+        stddev = math.sqrt(sum((x - mean) ** 2 for x in samples) / (n - 1))
+    else:
+        stddev = 0.0
+
+    ordered = sorted(samples)
+    median = (ordered[(n - 1) // 2] + ordered[n // 2]) / 2
+
+    if n > 1:
+        t = T_CRITICAL_95[n - 2] if n - 2 < len(T_CRITICAL_95) else 1.96
+        half_width = t * stddev / math.sqrt(n)
+    else:
+        half_width = math.inf
+
+    return {
+        "mean": mean,
+        "stddev": stddev,
+        "median": median,
+        "ci_low": mean - half_width,
+        "ci_high": mean + half_width,
+    }
+
+
+def measure_adaptive(
+    command,
+    sample_repeat,
+    rel_ci=0.02,
+    time_budget=60.0,
+    min_samples=5,
+    max_samples=100,
+    threshold=None,
+    margin=0.1,
+    verbose=False,
+):
+    """
+    Run the executable in samples of sample_repeat iterations until the
+    confidence interval of the mean iteration time is narrow enough, or the
+    time budget or the maximum number of samples is exhausted. sample_repeat
+    may also be a list with the iterations of each sample.
+
+    With a threshold, stop as soon as the mean iteration time is shown to
+    exceed threshold * (1 + margin) and flag the result as censored.
+    """
+    samples = []
+    result = {}
+    start_time = time.time()
+    censored = False
+    total_repeat = 0
+
+    while True:
+        if isinstance(sample_repeat, list):
+            repeat = sample_repeat[len(samples)]
+        else:
+            repeat = sample_repeat
+        sample = run_executable(command, repeat, verbose)
+        samples.append(sample["execution_time"] / repeat)
+        total_repeat += repeat
+
+        # Counters cover all samples, the memory peak is the largest one
+        for key, value in sample.items():
+            if key == "maxrss":
+                result[key] = max(result.get(key, 0), value)
+            elif isinstance(value, (int, float)):
+                result[key] = result.get(key, 0) + value
+            else:
+                result[key] = value
+
+        stats = summarize_samples(samples)
+        if threshold is not None and is_clearly_slower(
+            samples, stats, threshold * (1 + margin), max_samples
+        ):
+            censored = True
+            break
+        if len(samples) >= min_samples:
+            ci_width = stats["ci_high"] - stats["ci_low"]
+            if ci_width <= rel_ci * stats["mean"]:
+                break
+        if len(samples) >= max_samples or time.time() - start_time >= time_budget:
+            break
+
+    result["avrg_exec_time"] = stats["mean"]
+    result["exec_time_stddev"] = stats["stddev"]
+    result["exec_time_median"] = stats["median"]
+    result["exec_time_ci_low"] = stats["ci_low"]
+    result["exec_time_ci_high"] = stats["ci_high"]
+    result["num_samples"] = len(samples)
+    result["repeat_times"] = total_repeat
+    if threshold is not None:
+        result["censored"] = censored
+    return result
+
+
+def split_repetitions(repeat_times, num_samples):
+    """
+    Split repeat_times iterations into num_samples samples whose sizes differ
+    by at most one.
+    """
+    base, remainder = divmod(repeat_times, num_samples)
+    return [base + 1] * remainder + [base] * (num_samples - remainder)
+
+
+def is_clearly_slower(samples, stats, bound, max_samples):
+    """
+    Whether the mean iteration time over max_samples samples must exceed bound.
+    """
+    # Even if the remaining samples took no time at all
+    if sum(samples) > bound * max_samples:
+        return True
+    # Statistically, with a few samples to estimate the variance from
+    return len(samples) >= 3 and stats["ci_low"] > bound
+
+
+def compile_and_run_benchmark(
+    benchmark,
+    compiler,
+    flags,
+    verbose=False,
+    dedup=False,
+    object_cache=False,
+    adaptive=None,
+    threshold=None,
+    margin=0.1,
+):
     """
     Compile and run the specified benchmark, and gather performance data.
+
+    adaptive holds the keyword arguments of measure_adaptive() except the
+    command, or None to run the configured number of repetitions once.
+    With a threshold, runs that are clearly slower are aborted early.
     """
     print("++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++")
     print(f"Running {benchmark} with {compiler} and flags {flags}")
@@ -86,37 +510,65 @@ def compile_and_run_benchmark(benchmark, compiler, flags, verbose=False):
         command = config["command"]
 
         with change_directory(benchmark_dir):
-            subprocess.run(["make", "clean"], stdout=subprocess.DEVNULL, check=True)
-
-            start_time = time.time()
-            subprocess.run(
-                [
-                    "make",
-                    f"COMPILER_TYPE={compiler}",
-                    f"MACROS={compiler_vars_str}",
-                    f"OPTFLAGS={optflags}",
-                ],
-                stdout=None if verbose else subprocess.DEVNULL,
-                stderr=None if verbose else subprocess.DEVNULL,
-                check=True,
+            build_metrics = build_benchmark(
+                compiler, compiler_vars_str, optflags, verbose, object_cache
             )
-            compilation_time = time.time() - start_time
-
-            os.environ["BENCH_REPEAT_MAIN"] = str(repeat_times)
-            subprocess.run(
-                [command],
-                shell=True,
-                stdout=None if verbose else subprocess.DEVNULL,
-                stderr=None if verbose else subprocess.DEVNULL,
-                check=True,
+            build_metrics["file_size"] = os.path.getsize(
+                os.path.join(benchmark_dir, "a.out")
             )
 
-            with open("tmp_result.json") as f:
-                result = json.load(f)
+            # The executable alone determines the measurements, so identical
+            # binaries built from different flags needn't be run again
+            if dedup:
+                binary_hash = hash_file(benchmark_dir / "a.out")
+                result = load_binary_record(
+                    benchmark, compiler, binary_hash, repeat_times
+                )
+                if result is not None:
+                    result.update(build_metrics)
+                    result["reused_measurement"] = True
+                    print(result)
+                    return result
+
+            if adaptive is not None:
+                adaptive = dict(adaptive)
+                if adaptive.get("sample_repeat") is None:
+                    adaptive["sample_repeat"] = max(1, repeat_times // 10)
+                result = measure_adaptive(
+                    command,
+                    threshold=threshold,
+                    margin=margin,
+                    verbose=verbose,
+                    **adaptive,
+                )
+            elif threshold is not None:
+                # Split the configured repetitions into samples to race them
+                num_samples = min(10, repeat_times)
+                result = measure_adaptive(
+                    command,
+                    split_repetitions(repeat_times, num_samples),
+                    rel_ci=0.0,
+                    time_budget=math.inf,
+                    min_samples=num_samples,
+                    max_samples=num_samples,
+                    threshold=threshold,
+                    margin=margin,
+                    verbose=verbose,
+                )
+            else:
+                result = run_executable(command, repeat_times, verbose)
+                result["avrg_exec_time"] = result["execution_time"] / repeat_times
+
+            result.update(build_metrics)
 
-            result["compilation_time"] = compilation_time
-            result["file_size"] = os.path.getsize(os.path.join(benchmark_dir, "a.out"))
-            result["avrg_exec_time"] = result["execution_time"] / repeat_times
+            if dedup:
+                result["binary_hash"] = binary_hash
+                result["reused_measurement"] = False
+                # Partial measurements must not stand in for complete ones
+                if not result.get("censored"):
+                    save_binary_record(
+                        benchmark, compiler, binary_hash, repeat_times, result
+                    )
 
             print(result)
 
@@ -152,23 +604,56 @@ def main():
 
     benchmarks = list_benchmarks()
 
+    options = {
+        "verbose": args.verbose,
+        "dedup": args.dedup,
+        "object_cache": args.object_cache,
+        "threshold": args.threshold,
+        "margin": args.margin,
+    }
+    if args.adaptive:
+        options["adaptive"] = {
+            "sample_repeat": args.sample_repeat,
+            "rel_ci": args.rel_ci,
+            "time_budget": args.time_budget,
+            "min_samples": args.min_samples,
+            "max_samples": args.max_samples,
+        }
+
+    if args.benchmark == "all":
+        selected = benchmarks
+    else:
+        selected = args.benchmark.split(",")
+        invalid = [b for b in selected if b not in benchmarks]
+        if invalid:
+            print(f"Error: Invalid benchmark {', '.join(invalid)}")
+            selected = []
+
     result_dict = {}
     original_paranoid = get_perf_event_paranoid()
     try:
         set_perf_event_paranoid(0)
-        if args.benchmark == "all":
-            for benchmark in benchmarks:
+        if args.jobs > 1:
+            # Benchmarks change the working directory, so use processes
+            with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                futures = {
+                    benchmark: executor.submit(
+                        compile_and_run_benchmark,
+                        benchmark,
+                        args.compiler,
+                        args.flags,
+                        **options,
+                    )
+                    for benchmark in selected
+                }
+                for benchmark, future in futures.items():
+                    result_dict[benchmark] = future.result()
+        else:
+            for benchmark in selected:
                 result = compile_and_run_benchmark(
-                    benchmark, args.compiler, args.flags, args.verbose
+                    benchmark, args.compiler, args.flags, **options
                 )
                 result_dict[benchmark] = result
-        elif args.benchmark in benchmarks:
-            result = compile_and_run_benchmark(
-                args.benchmark, args.compiler, args.flags, args.verbose
-            )
-            result_dict[args.benchmark] = result
-        else:
-            print(f"Error: Invalid benchmark {args.benchmark}")
 
     finally:
         set_perf_event_paranoid(original_paranoid)
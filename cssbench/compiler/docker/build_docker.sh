@@ -1,7 +1,7 @@
 #!/bin/bash
 set -euo pipefail
 
-image_name="csstuning-compiler:0.1"
+image_name="csstuning-compiler:0.2"
 
 echo "Building docker image $image_name"
 
@@ -0,0 +1,64 @@
+import asyncio
+import functools
+from datetime import datetime, timezone
+
+import docker.errors
+
+
+async def call(func, *args, **kwargs):
+    """Run a blocking docker SDK call in the default executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+async def wait_container(container, on_line=None, poll_interval=0.5) -> int:
+    """
+    Await the exit of a detached container and return its exit code.
+
+    The container is polled with short API calls, so no thread is held while
+    it runs. When on_line is given, it is called with each new line of the
+    container output as it appears.
+    """
+    # Docker timestamps have a fixed width, so they compare as strings
+    last_timestamp = None
+    while True:
+        await call(container.reload)
+        exited = container.status in ("exited", "dead")
+
+        if on_line is not None:
+            # Only fetch the output since the last line seen, from the start
+            # of its second since that is the resolution used here
+            since = None
+            if last_timestamp is not None:
+                since = _timestamp_seconds(last_timestamp)
+            output = await call(
+                container.logs,
+                stdout=True,
+                stderr=True,
+                timestamps=True,
+                since=since,
+            )
+            for line in output.decode("utf-8", "replace").splitlines():
+                timestamp, _, text = line.partition(" ")
+                if last_timestamp is not None and timestamp <= last_timestamp:
+                    continue
+                last_timestamp = timestamp
+                on_line(text.strip())
+
+        if exited:
+            return container.attrs["State"]["ExitCode"]
+
+        await asyncio.sleep(poll_interval)
+
+
+def _timestamp_seconds(timestamp) -> int:
+    """Whole epoch seconds of a docker log timestamp."""
+    moment = datetime.strptime(timestamp[:19], "%Y-%m-%dT%H:%M:%S")
+    return int(moment.replace(tzinfo=timezone.utc).timestamp())
+
+
+async def remove_container(container):
+    try:
+        await call(container.remove, force=True)
+    except docker.errors.NotFound:
+        pass
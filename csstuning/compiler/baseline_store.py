@@ -0,0 +1,56 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+from csstuning.logger import logger
+
+
+class BaselineStore:
+    """
+    Persisted results of the default optimization levels (-O0 to -O3), keyed
+    by compiler, docker image, optimization level and workload.
+
+    The store is a plain JSON file so that it can be inspected and copied
+    between hosts.
+    """
+
+    def __init__(self, store_file):
+        self.store_file = Path(store_file)
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self) -> dict:
+        if not self.store_file.exists():
+            return {}
+
+        try:
+            with open(self.store_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable baseline store {self.store_file}: {e}")
+            return {}
+
+    def get(self, compiler, image_id, level, workload):
+        with self._lock:
+            levels = self._data.get(compiler, {}).get(image_id, {})
+            return levels.get(level, {}).get(workload)
+
+    def get_all(self, compiler, image_id) -> dict:
+        """Return the baselines of an image as {level: {workload: result}}."""
+        with self._lock:
+            levels = self._data.get(compiler, {}).get(image_id, {})
+            return json.loads(json.dumps(levels))
+
+    def put(self, compiler, image_id, level, workload, result):
+        with self._lock:
+            levels = self._data.setdefault(compiler, {}).setdefault(image_id, {})
+            levels.setdefault(level, {})[workload] = result
+            self._save()
+
+    def _save(self):
+        self.store_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.store_file.with_name(f"{self.store_file.name}.tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(self._data, f, indent=4)
+        os.replace(tmp_file, self.store_file)
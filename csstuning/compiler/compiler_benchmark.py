@@ -1,20 +1,42 @@
+import asyncio
+import contextlib
+import itertools
 import json
+import math
 import os
+import queue
 import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from importlib import resources
 from pathlib import Path
 
 import docker
 from docker.errors import ContainerError
 
+from csstuning import async_docker
+from csstuning.compiler.baseline_store import BaselineStore
 from csstuning.compiler.compiler_config_space import (GCCConfigSpace,
                                                       LLVMConfigSpace)
 from csstuning.config import config_loader
 from csstuning.logger import logger
+from csstuning.monitor import ResourceMonitor
+from csstuning.result_cache import ResultCache
 
 
 class CompilerBenchmarkBase:
+    # Set by subclasses, passed to run.py inside the container.
+    COMPILER_TYPE = None
+    # Whether the order of flags changes the generated code (e.g. LLVM passes)
+    FLAG_ORDER_MATTERS = False
+    # Flags of the optimization levels that speedups are reported against.
+    # run.py always prepends -O1 for GCC, and the last level wins.
+    BASELINE_FLAGS = {"O0": "-O0", "O1": "-O1", "O2": "-O2", "O3": "-O3"}
+    # Exit code of run.py's argparse for unknown arguments, which happens when
+    # the image predates them
+    RUNNER_USAGE_ERROR = 2
+
     AVAILABLE_WORKLOADS = [
         "cbench-automotive-bitcount",
         "cbench-security-rijndael",
@@ -85,12 +107,82 @@ class CompilerBenchmarkBase:
         self.docker_image = env_conf.get("compiler", "compiler_image")
         self.container_name = env_conf.get("compiler", "container_name")
         self.results_dir = Path(env_conf.get("compiler", "compiler_results_dir"))
+        self.cache_dir = Path(
+            env_conf.get(
+                "compiler",
+                "compiler_cache_dir",
+                fallback=str(self.results_dir.parent / "cache"),
+            )
+        )
 
         self.debug_mode = env_conf.getboolean("general", "debug_mode")
+        self.resource_monitor = env_conf.getboolean(
+            "general", "resource_monitor", fallback=False
+        )
+        self.monitor_interval = env_conf.getfloat(
+            "general", "monitor_interval", fallback=1.0
+        )
+        logs_dir = Path(env_conf.get("general", "logs_dir"))
+        self.telemetry_dir = Path(
+            env_conf.get(
+                "general", "telemetry_dir", fallback=str(logs_dir.parent / "telemetry")
+            )
+        )
+
+        self.pool_size = env_conf.getint("compiler", "pool_size", fallback=1)
+        self.pool_cpusets = env_conf.get("compiler", "pool_cpusets", fallback="")
+        self.binary_dedup = env_conf.getboolean(
+            "compiler", "binary_dedup", fallback=False
+        )
+        self.object_cache = env_conf.getboolean(
+            "compiler", "object_cache", fallback=False
+        )
+        self.adaptive_repeat = env_conf.getboolean(
+            "compiler", "adaptive_repeat", fallback=False
+        )
+        self.adaptive_rel_ci = env_conf.getfloat(
+            "compiler", "adaptive_rel_ci", fallback=0.02
+        )
+        self.adaptive_time_budget = env_conf.getfloat(
+            "compiler", "adaptive_time_budget", fallback=60.0
+        )
+        self.racing_margin = env_conf.getfloat(
+            "compiler", "racing_margin", fallback=0.1
+        )
 
         self.workload = workload
         self.docker_client = docker.from_env()
 
+        # Warm containers kept alive by start_session(), keyed by name
+        self._sessions = {}
+        self._session_locks = {}
+
+        # Containers of concurrent evaluate() and arun() calls, by slot number
+        self._async_slot_ids = itertools.count()
+        self._free_async_slots = []
+        # Serialize the baseline measurements of concurrent evaluations; the
+        # asyncio one of arun() is created on first use in the event loop
+        self._baseline_lock = threading.Lock()
+        self._async_baseline_lock = None
+
+        # Results of the optimization levels, persisted across campaigns
+        self.baseline_store = BaselineStore(
+            env_conf.get(
+                "compiler",
+                "baseline_file",
+                fallback=str(self.results_dir.parent / "baselines.json"),
+            )
+        )
+
+        self.result_cache = None
+        self._image_id = None
+        if env_conf.getboolean("compiler", "result_cache", fallback=False):
+            self.result_cache = ResultCache(
+                env_conf.get("general", "cache_file"),
+                max_entries=env_conf.getint("general", "cache_max_entries"),
+                max_age=env_conf.getfloat("general", "cache_max_age_days") * 86400,
+            )
+
     @staticmethod
     def _load_available_workloads(file_path):
         try:
@@ -132,32 +224,29 @@ class CompilerBenchmarkBase:
             logger.error(f"Error removing container {container_name}: {e}")
             raise e
 
-    def __del__(self):
-        if hasattr(self, "docker_client"):
-            self.docker_client.close()
-
-
-class GCCBenchmark(CompilerBenchmarkBase):
-    def __init__(self, workload):
-        super().__init__(workload)
-        self.config_space = GCCConfigSpace()
-
-    def execute_benchmark(self, flags_str):
-        self._remove_existing_container(self.container_name)
-
-        # Map papi_events.txt and results directory to the container
-        papi_file = self.config_dir / "papi_events.txt"
-        volumes_mapping = {
-            papi_file: {
-                "bind": "/benchmark/utilities/papi_events.txt",
-                "mode": "rw",
-            },
-            self.results_dir: {
-                "bind": "/benchmark/results",
-                "mode": "rw",
-            },
-        }
-
+    def execute_benchmark(
+        self,
+        flags_str,
+        container_name=None,
+        results_dir=None,
+        cpuset=None,
+        threshold=None,
+        workloads=None,
+        jobs=1,
+    ):
+        """
+        Run the benchmark in a container. With the resource monitor enabled,
+        returns the resource usage summary of the container.
+        """
+        container_name = container_name or self.container_name
+        results_dir = Path(results_dir or self.results_dir)
+        self._clear_results(results_dir)
+        command = self._benchmark_command(flags_str, threshold, workloads, jobs)
+
+        if container_name in self._sessions:
+            return self._exec_in_session(container_name, command)
+
+        self._remove_existing_container(container_name)
 
         try:
             attempt = 0
@@ -165,20 +254,16 @@ class GCCBenchmark(CompilerBenchmarkBase):
                 try:
                     container = self.docker_client.containers.run(
                         self.docker_image,
-                        name=self.container_name,
-                        volumes=volumes_mapping,
-                        command=[
-                            "GCC",
-                            self.workload,
-                            f"--flags={flags_str}",
-                        ],
+                        name=container_name,
+                        volumes=self._volumes_mapping(results_dir),
+                        command=command,
+                        cpuset_cpus=cpuset,
                         privileged=True,
-                        remove=True,
                         detach=True,
                         stdout=True,
                         stderr=True,
                     )
-            
+
                     # If the container runs successfully, break out of the retry loop
                     break
 
@@ -187,55 +272,791 @@ class GCCBenchmark(CompilerBenchmarkBase):
                     time.sleep(1.5 ** attempt)  # Exponential backoff
                     attempt += 1
 
-            if self.debug_mode:
-                for line in container.logs(stream=True, follow=True):
-                    logger.info(line.strip().decode("utf-8"))
-            else:
-                container.wait()
+            resource_monitor = self._start_resource_monitor(container)
+            try:
+                if self.debug_mode:
+                    for line in container.logs(stream=True, follow=True):
+                        logger.info(line.strip().decode("utf-8"))
+                # Removed only afterwards, so that the exit code can be read
+                exit_code = container.wait().get("StatusCode")
+            finally:
+                resources = self._stop_resource_monitor(resource_monitor)
+                try:
+                    container.remove(force=True)
+                except docker.errors.NotFound:
+                    pass
 
         except docker.errors.NotFound as e:
             logger.error("The container might already be removed.")
+            return None
+        except docker.errors.DockerException as e:
+            logger.error(f"Error running compiler container: {e}")
+            raise RuntimeError("Failed to run compiler benchmark.")
+
+        self._check_exit_code(exit_code, container_name)
+        return resources
+
+    def _check_exit_code(self, exit_code, container_name):
+        if exit_code == self.RUNNER_USAGE_ERROR:
+            logger.error(f"run.py in {container_name} rejected its arguments.")
+            raise RuntimeError(
+                f"The benchmark runner of {self.docker_image} is outdated. Rebuild "
+                "the image with cssbench/compiler/docker/build_docker.sh."
+            )
+        if exit_code != 0:
+            raise RuntimeError(
+                f"Benchmark exited with code {exit_code} in {container_name}."
+            )
+
+    def _start_resource_monitor(self, container):
+        if not self.resource_monitor:
+            return None
+
+        monitor = ResourceMonitor(self.monitor_interval)
+        monitor.watch("compiler", container)
+        return monitor
+
+    def _stop_resource_monitor(self, monitor):
+        if monitor is None:
+            return None
+        return monitor.stop(
+            self.telemetry_dir, prefix=f"{self.COMPILER_TYPE.lower()}_{self.workload}"
+        )
+
+    async def aexecute_benchmark(
+        self, flags_str, container_name, results_dir, threshold=None
+    ):
+        """
+        asyncio counterpart of execute_benchmark(). The container is polled
+        instead of waited on, so no thread is held while it runs.
+        """
+        results_dir = Path(results_dir)
+        self._clear_results(results_dir)
+        command = self._benchmark_command(flags_str, threshold)
+
+        await async_docker.call(self._remove_existing_container, container_name)
+        try:
+            # Kept after exit so that its status and output can still be read
+            container = await async_docker.call(
+                self.docker_client.containers.run,
+                self.docker_image,
+                name=container_name,
+                volumes=self._volumes_mapping(results_dir),
+                command=command,
+                privileged=True,
+                detach=True,
+            )
         except docker.errors.DockerException as e:
-            logger.error(f"Error running BenchBase container: {e}")
-            raise RuntimeError("Failed to run BenchBase.")
+            logger.error(f"Error running compiler container: {e}")
+            raise RuntimeError("Failed to run compiler benchmark.")
 
-    def run(self, flags: dict) -> dict:
+        resource_monitor = self._start_resource_monitor(container)
+        try:
+            exit_code = await async_docker.wait_container(
+                container, on_line=logger.info if self.debug_mode else None
+            )
+        except docker.errors.DockerException as e:
+            logger.error(f"Error waiting for compiler container: {e}")
+            raise RuntimeError("Failed to run compiler benchmark.")
+        finally:
+            resources = await async_docker.call(
+                self._stop_resource_monitor, resource_monitor
+            )
+            await async_docker.remove_container(container)
+
+        self._check_exit_code(exit_code, container_name)
+        return resources
+
+    def _clear_results(self, results_dir):
+        # Never parse the results of a previous evaluation by accident
+        results_dir.mkdir(parents=True, exist_ok=True)
+        results_file = results_dir / self._results_file_name()
+        if results_file.exists():
+            results_file.unlink()
+
+    def _benchmark_command(self, flags_str, threshold=None, workloads=None, jobs=1):
+        command = [
+            self.COMPILER_TYPE,
+            ",".join(workloads) if workloads else self.workload,
+            f"--flags={flags_str}",
+        ] + self._runner_args(threshold)
+        if jobs > 1:
+            command.append(f"--jobs={jobs}")
+        return command
+
+    def run(self, flags: dict, baseline=None, threshold=None, normalize=False) -> dict:
+        """
+        Evaluate the flags. Given the result of an incumbent configuration as
+        baseline, or directly a threshold on the average execution time in
+        seconds, runs that are clearly slower are aborted early and their
+        partial result is flagged as censored.
+
+        With normalize, the result is also reported relative to the stored
+        optimization level baselines, see normalize_result().
+        """
         self.config_space.set_current_config(flags)
+        return self._evaluate_flags(
+            self.config_space.generate_flags_str(), baseline, threshold, normalize
+        )
 
+    def evaluate(self, config, baseline=None, threshold=None, normalize=False) -> dict:
+        """
+        Evaluate a Configuration of the config space, or a dict of flags
+        applied on top of the defaults. Unlike run(), the flags are derived
+        from the configuration alone and the config space is left untouched,
+        and each call evaluates in its own container, so threads may call it
+        concurrently. With a session started for run(), calls take turns in
+        its warm container instead.
+        """
+        config = self.config_space.make_config(config)
+        flags_str = self.config_space.generate_flags_str(config=config)
+        if self.container_name in self._sessions:
+            return self._evaluate_flags(flags_str, baseline, threshold, normalize)
+
+        slot = self._acquire_slot()
+        try:
+            return self._evaluate_flags(
+                flags_str,
+                baseline,
+                threshold,
+                normalize,
+                container_name=f"{self.container_name}_async_{slot}",
+                results_dir=self.results_dir / f"async_{slot}",
+            )
+        finally:
+            self._free_async_slots.append(slot)
+
+    def _acquire_slot(self) -> int:
+        """Number of a container and results directory no evaluation is using."""
+        # Reuse the names and directories of finished evaluations
+        try:
+            return self._free_async_slots.pop()
+        except IndexError:
+            return next(self._async_slot_ids)
+
+    def _evaluate_flags(
+        self,
+        flags_str,
+        baseline,
+        threshold,
+        normalize,
+        container_name=None,
+        results_dir=None,
+    ) -> dict:
+        try:
+            result = self._evaluate(
+                flags_str,
+                container_name=container_name,
+                results_dir=results_dir,
+                threshold=self._racing_threshold(baseline, threshold),
+            )
+            if normalize:
+                result = self.normalize_result(result)
+            return result
+        except Exception as e:
+            logger.error(f"Error running benchmark: {e}")
+            raise
+
+    async def arun(
+        self, flags: dict, baseline=None, threshold=None, normalize=False
+    ) -> dict:
+        """
+        asyncio counterpart of run(). Each call evaluates in its own
+        container, so one event loop can await many evaluations concurrently.
+        """
+        self.config_space.set_current_config(flags)
         flags_str = self.config_space.generate_flags_str()
+        threshold = self._racing_threshold(baseline, threshold)
 
         try:
-            self.execute_benchmark(flags_str)
-            return self.parse_results()
+            if normalize:
+                baselines = await self._ameasure_baselines()
+            result = await self._aevaluate(flags_str, threshold)
+            if normalize:
+                result = self.normalize_result(result, baselines)
+            return result
         except Exception as e:
             logger.error(f"Error running benchmark: {e}")
             raise
 
+    async def _ameasure_baselines(self) -> dict:
+        """
+        Return {level: baseline} of the workload. The missing baselines are
+        measured on the benchmark container, by one arun() call at a time.
+        """
+        if self._async_baseline_lock is None:
+            self._async_baseline_lock = asyncio.Lock()
+        async with self._async_baseline_lock:
+            baselines = await async_docker.call(self.measure_baselines)
+        return {level: results[self.workload] for level, results in baselines.items()}
+
+    async def _aevaluate(self, flags_str, threshold=None) -> dict:
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = await async_docker.call(
+                self._cache_key, flags_str, racing=threshold is not None
+            )
+            result = self.result_cache.get(cache_key)
+            if result is not None:
+                logger.info(f"Using cached result for {self.workload}.")
+                return result
+
+        slot = self._acquire_slot()
+        results_dir = self.results_dir / f"async_{slot}"
+        try:
+            resources = await self.aexecute_benchmark(
+                flags_str, f"{self.container_name}_async_{slot}", results_dir, threshold
+            )
+            result = self.parse_results(results_dir)
+        finally:
+            self._free_async_slots.append(slot)
+
+        if result and resources:
+            result["resources"] = resources
+
+        if cache_key is not None and result and not result.get("censored"):
+            self.result_cache.put(cache_key, result)
+
+        return result
+
     def run_with_random(self) -> dict:
         self.config_space.set_random_config()
         flags_str = self.config_space.generate_flags_str()
 
         try:
-            self.execute_benchmark(flags_str)
-            return self.parse_results()
+            return self._evaluate(flags_str)
         except Exception as e:
             logger.error(f"Error running benchmark: {e}")
             raise
 
-    def parse_results(self) -> dict:
+    def run_batch(
+        self,
+        flags_list,
+        num_workers=None,
+        cpusets=None,
+        baseline=None,
+        threshold=None,
+        normalize=False,
+    ) -> list:
+        """
+        Evaluate several flag configurations concurrently.
+
+        Each worker owns a uniquely named container and its own results
+        directory, and can be pinned to a CPU set so that concurrent
+        measurements don't interfere. Each configuration is applied on top
+        of the defaults. Results are returned in submission order; a
+        configuration that fails to evaluate yields None. baseline,
+        threshold and normalize behave as in run().
+        """
+        num_workers = num_workers or self.pool_size
+        threshold = self._racing_threshold(baseline, threshold)
+        slots = queue.Queue()
+        for slot in self._create_worker_slots(num_workers, cpusets):
+            slots.put(slot)
+
+        flags_strs = [
+            self.config_space.generate_flags_str(
+                config=self.config_space.make_config(flags)
+            )
+            for flags in flags_list
+        ]
+
+        def evaluate(flags_str):
+            slot = slots.get()
+            try:
+                return self._evaluate(flags_str, threshold=threshold, **slot)
+            except Exception as e:
+                logger.error(
+                    f"Error running benchmark in {slot['container_name']}: {e}"
+                )
+                return None
+            finally:
+                slots.put(slot)
+
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            results = list(executor.map(evaluate, flags_strs))
+
+        if normalize:
+            results = [
+                self.normalize_result(result) if result is not None else None
+                for result in results
+            ]
+        return results
+
+    def run_workloads(self, flags: dict, workloads=None, jobs=1) -> dict:
+        """
+        Evaluate one flag configuration on several workloads (all by default)
+        in a single container, running jobs workloads in parallel inside it.
+
+        Returns the result of each workload under "results", and under
+        "aggregate" the geometric mean speedup of the average execution time
+        relative to each optimization level in BASELINE_FLAGS.
+        """
+        workloads = list(workloads or self.AVAILABLE_WORKLOADS)
+        invalid = [w for w in workloads if w not in self.AVAILABLE_WORKLOADS]
+        if invalid:
+            logger.error(f"Workloads {invalid} are not supported.")
+            raise ValueError(f"Workloads {invalid} are not supported.")
+
+        self.config_space.set_current_config(flags)
+        flags_str = self.config_space.generate_flags_str()
+
         try:
-            with open(self.results_dir / "gcc_results.json", "r") as f:
+            results = self._evaluate_workloads(flags_str, workloads, jobs)
+            aggregate = {}
+            for level in self.BASELINE_FLAGS:
+                baselines = self._get_baselines(level, workloads, jobs)
+                aggregate[f"geomean_speedup_{level}"] = self._geomean_speedup(
+                    results, baselines
+                )
+        except Exception as e:
+            logger.error(f"Error running benchmark: {e}")
+            raise
+
+        return {"results": results, "aggregate": aggregate}
+
+    def _evaluate_workloads(self, flags_str, workloads, jobs=1, use_cache=True) -> dict:
+        results = {}
+        if self.result_cache is not None and use_cache:
+            for workload in workloads:
+                result = self.result_cache.get(
+                    self._cache_key(flags_str, workload, jobs)
+                )
+                if result is not None:
+                    results[workload] = result
+
+        missing = [w for w in workloads if w not in results]
+        if missing:
+            with self._session_lock():
+                self.execute_benchmark(flags_str, workloads=missing, jobs=jobs)
+                measured = self.parse_results(workloads=missing)
+            for workload, result in measured.items():
+                results[workload] = result
+                if (
+                    self.result_cache is not None
+                    and result
+                    and not result.get("censored")
+                ):
+                    self.result_cache.put(
+                        self._cache_key(flags_str, workload, jobs), result
+                    )
+
+        return {workload: results[workload] for workload in workloads}
+
+    def measure_baselines(
+        self, workloads=None, levels=None, jobs=1, force=False
+    ) -> dict:
+        """
+        Measure the optimization levels (all of BASELINE_FLAGS by default) on
+        the workloads (the benchmark's workload by default) and persist them
+        for the compiler image. Stored baselines are only re-measured with
+        force, and those measured with jobs > 1 are stored as
+        "{level}_jobs{jobs}". Returns {level: {workload: result}}.
+        """
+        workloads = list(workloads or [self.workload])
+        levels = list(levels or self.BASELINE_FLAGS)
+        invalid = [level for level in levels if level not in self.BASELINE_FLAGS]
+        if invalid:
+            raise ValueError(f"Optimization levels {invalid} are not supported.")
+
+        return {
+            level: self._get_baselines(level, workloads, jobs, force)
+            for level in levels
+        }
+
+    def get_baselines(self) -> dict:
+        """Return all stored baselines of the compiler image."""
+        return self.baseline_store.get_all(self.COMPILER_TYPE, self._get_image_id())
+
+    def normalize_result(self, result, baselines=None) -> dict:
+        """
+        Add the result relative to each stored optimization level, measuring
+        missing baselines first unless baselines maps the levels to them.
+        "speedup" maps each level to the ratio of its average execution time
+        to the result's, and "normalized" maps each level to the ratio of
+        every numeric metric to the level's.
+        """
+        if not result:
+            return result
+
+        result = dict(result)
+        result["speedup"] = {}
+        result["normalized"] = {}
+        for level in self.BASELINE_FLAGS:
+            if baselines is not None:
+                baseline = baselines.get(level)
+            else:
+                baseline = self._get_baselines(level, [self.workload])[self.workload]
+            if not baseline:
+                continue
+
+            result["normalized"][level] = {
+                metric: value / baseline[metric]
+                for metric, value in result.items()
+                if self._is_metric(value)
+                and self._is_metric(baseline.get(metric))
+                and baseline[metric] != 0
+            }
+            if result.get("avrg_exec_time") and baseline.get("avrg_exec_time"):
+                result["speedup"][level] = (
+                    baseline["avrg_exec_time"] / result["avrg_exec_time"]
+                )
+
+        return result
+
+    @staticmethod
+    def _is_metric(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def _get_baselines(self, level, workloads, jobs=1, force=False) -> dict:
+        image_id = self._get_image_id()
+        # Workloads run in parallel slow each other down, so their baselines
+        # are only comparable to results measured the same way
+        stored_level = level if jobs == 1 else f"{level}_jobs{jobs}"
+        # Concurrent evaluations wait for each other's measurements to be stored
+        with self._baseline_lock:
+            measured = {}
+            if not force:
+                for workload in workloads:
+                    result = self.baseline_store.get(
+                        self.COMPILER_TYPE, image_id, stored_level, workload
+                    )
+                    if result is not None:
+                        measured[workload] = result
+
+            missing = [w for w in workloads if w not in measured]
+            if missing:
+                logger.info(
+                    f"Measuring -{level} baselines of {len(missing)} workloads..."
+                )
+                for workload, result in self._evaluate_workloads(
+                    self.BASELINE_FLAGS[level], missing, jobs, use_cache=not force
+                ).items():
+                    measured[workload] = result
+                    # Failed and aborted runs are not worth keeping
+                    if result and not result.get("censored"):
+                        self.baseline_store.put(
+                            self.COMPILER_TYPE,
+                            image_id,
+                            stored_level,
+                            workload,
+                            result,
+                        )
+
+        return {workload: measured[workload] for workload in workloads}
+
+    @staticmethod
+    def _geomean_speedup(results, baselines):
+        log_speedups = [
+            math.log(baselines[w]["avrg_exec_time"] / result["avrg_exec_time"])
+            for w, result in results.items()
+            if result
+            and baselines.get(w)
+            and result["avrg_exec_time"] > 0
+            and baselines[w]["avrg_exec_time"] > 0
+        ]
+        if not log_speedups:
+            return None
+        return math.exp(sum(log_speedups) / len(log_speedups))
+
+    def _evaluate(
+        self,
+        flags_str,
+        container_name=None,
+        results_dir=None,
+        cpuset=None,
+        threshold=None,
+    ) -> dict:
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = self._cache_key(flags_str, racing=threshold is not None)
+        if cache_key is not None:
+            result = self.result_cache.get(cache_key)
+            if result is not None:
+                logger.info(f"Using cached result for {self.workload}.")
+                return result
+
+        with self._session_lock(container_name):
+            resources = self.execute_benchmark(
+                flags_str, container_name, results_dir, cpuset, threshold
+            )
+            result = self.parse_results(results_dir)
+        if result and resources:
+            result["resources"] = resources
+
+        # Failed builds produce no result and are worth retrying, and censored
+        # results are only valid relative to their threshold
+        if cache_key is not None and result and not result.get("censored"):
+            self.result_cache.put(cache_key, result)
+
+        return result
+
+    def _cache_key(self, flags_str, workload=None, jobs=1, racing=False) -> str:
+        parts = [
+            self.COMPILER_TYPE,
+            workload or self.workload,
+            self._canonical_flags(flags_str),
+            self._get_image_id(),
+            # Results of other measurement modes are not interchangeable
+            *self._runner_args(),
+        ]
+        # Racing runs measure in samples, and results measured alongside
+        # other workloads are slowed down by them
+        if racing:
+            parts.append("racing")
+        if jobs > 1:
+            parts.append(f"jobs={jobs}")
+        return ResultCache.make_key(*parts)
+
+    def _canonical_flags(self, flags_str) -> str:
+        flags = flags_str.split()
+        if not self.FLAG_ORDER_MATTERS:
+            flags = sorted(flags)
+        return " ".join(flags)
+
+    def _get_image_id(self) -> str:
+        if self._image_id is None:
+            try:
+                self._image_id = self.docker_client.images.get(self.docker_image).id
+            except docker.errors.DockerException as e:
+                logger.error(f"Error inspecting image {self.docker_image}: {e}")
+                raise RuntimeError("Failed to resolve the compiler image digest.")
+        return self._image_id
+
+    def get_cache_stats(self) -> dict:
+        if self.result_cache is None:
+            return {}
+        return self.result_cache.stats()
+
+    def _create_worker_slots(self, num_workers, cpusets=None) -> list:
+        if cpusets is None:
+            cpusets = self._parse_cpusets(self.pool_cpusets, num_workers)
+        if cpusets and len(cpusets) < num_workers:
+            raise ValueError(
+                f"{len(cpusets)} CPU sets given for {num_workers} workers."
+            )
+
+        return [
+            {
+                "container_name": f"{self.container_name}_{i}",
+                "results_dir": self.results_dir / f"worker_{i}",
+                "cpuset": cpusets[i] if cpusets else None,
+            }
+            for i in range(num_workers)
+        ]
+
+    @staticmethod
+    def _parse_cpusets(cpusets_str, num_workers) -> list:
+        """
+        Parse CPU sets such as "0-7;8-15". "auto" splits the host CPUs evenly
+        between the workers; an empty string disables pinning.
+        """
+        cpusets_str = cpusets_str.strip()
+        if not cpusets_str:
+            return []
+
+        if cpusets_str == "auto":
+            cpus_per_worker = (os.cpu_count() or 1) // num_workers
+            if cpus_per_worker == 0:
+                raise ValueError(f"Not enough CPUs to pin {num_workers} workers.")
+            return [
+                f"{i * cpus_per_worker}-{(i + 1) * cpus_per_worker - 1}"
+                for i in range(num_workers)
+            ]
+
+        return [cpuset.strip() for cpuset in cpusets_str.split(";")]
+
+    def _results_file_name(self):
+        return f"{self.COMPILER_TYPE.lower()}_results.json"
+
+    def parse_results(self, results_dir=None, workloads=None) -> dict:
+        """
+        Return the result of the benchmark's workload, or with workloads a
+        dict of the results of each of them.
+        """
+        results_dir = Path(results_dir or self.results_dir)
+        try:
+            with open(results_dir / self._results_file_name(), "r") as f:
                 result = json.load(f)
         except Exception as e:
             logger.error(f"Error parsing benchmark results: {e}")
             raise RuntimeError("Failed to parse benchmark results.")
 
+        if workloads is not None:
+            return {workload: result.get(workload) for workload in workloads}
+
         result = result.get(self.workload, {})
         return result
 
     def get_config_space(self) -> dict:
         return self.config_space.get_all_details()
-    
+
+    def _racing_threshold(self, baseline=None, threshold=None):
+        if threshold is None and baseline:
+            threshold = baseline.get("avrg_exec_time")
+        return threshold
+
+    def _runner_args(self, threshold=None) -> list:
+        """Extra options passed to run.py inside the container."""
+        args = []
+        if self.binary_dedup:
+            args.append("--dedup")
+        if self.object_cache:
+            args.append("--object-cache")
+        if self.adaptive_repeat:
+            args += [
+                "--adaptive",
+                f"--rel-ci={self.adaptive_rel_ci}",
+                f"--time-budget={self.adaptive_time_budget}",
+            ]
+        if threshold is not None:
+            args += [f"--threshold={threshold}", f"--margin={self.racing_margin}"]
+        return args
+
+    def _volumes_mapping(self, results_dir):
+        # Map papi_events.txt, results and cache directories to the container.
+        # The cache directory is shared by all containers.
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        papi_file = self.config_dir / "papi_events.txt"
+        return {
+            papi_file: {
+                "bind": "/benchmark/utilities/papi_events.txt",
+                "mode": "rw",
+            },
+            results_dir: {
+                "bind": "/benchmark/results",
+                "mode": "rw",
+            },
+            self.cache_dir: {
+                "bind": "/benchmark/cache",
+                "mode": "rw",
+            },
+        }
+
+    def start_session(self, num_workers=None, cpusets=None):
+        """
+        Keep warm containers running so that evaluations are dispatched via
+        exec instead of creating and removing a container each time.
+
+        Without num_workers a single container backs run(); otherwise one
+        container is started for each run_batch() worker.
+        """
+        if num_workers:
+            slots = self._create_worker_slots(num_workers, cpusets)
+        else:
+            slots = [
+                {
+                    "container_name": self.container_name,
+                    "results_dir": self.results_dir,
+                    "cpuset": None,
+                }
+            ]
+
+        for slot in slots:
+            self._start_session_container(**slot)
+
+    def _start_session_container(self, container_name, results_dir, cpuset=None):
+        if container_name in self._sessions:
+            return
+
+        self._remove_existing_container(container_name)
+        results_dir = Path(results_dir)
+        results_dir.mkdir(parents=True, exist_ok=True)
+
+        logger.info(f"Starting session container {container_name}...")
+        try:
+            container = self.docker_client.containers.run(
+                self.docker_image,
+                name=container_name,
+                volumes=self._volumes_mapping(results_dir),
+                entrypoint=["sleep", "infinity"],
+                cpuset_cpus=cpuset,
+                privileged=True,
+                remove=True,
+                detach=True,
+            )
+        except docker.errors.DockerException as e:
+            logger.error(f"Error starting session container {container_name}: {e}")
+            raise RuntimeError("Failed to start compiler session.")
+
+        self._sessions[container_name] = container
+        # Reentrant, as it is held from clearing the results to parsing them
+        self._session_locks[container_name] = threading.RLock()
+
+    def _session_lock(self, container_name=None):
+        """
+        The lock of a session container, whose results directory is shared
+        by its evaluations, or a no-op for a container of its own.
+        """
+        return self._session_locks.get(
+            container_name or self.container_name, contextlib.nullcontext()
+        )
+
+    def _exec_in_session(self, container_name, command):
+        container = self._sessions[container_name]
+        api = self.docker_client.api
+
+        # run.py builds in place, so evaluations in one container must not overlap
+        with self._session_locks[container_name]:
+            resource_monitor = self._start_resource_monitor(container)
+            try:
+                exec_id = api.exec_create(
+                    container.id,
+                    ["python3", "/benchmark/run.py"] + command,
+                    stdout=True,
+                    stderr=True,
+                )
+                for chunk in api.exec_start(exec_id, stream=True):
+                    if self.debug_mode:
+                        for line in chunk.decode("utf-8").splitlines():
+                            logger.info(line.strip())
+
+                exit_code = api.exec_inspect(exec_id)["ExitCode"]
+            except docker.errors.DockerException as e:
+                logger.error(f"Error executing in session container: {e}")
+                raise RuntimeError("Failed to run compiler benchmark.")
+            finally:
+                resources = self._stop_resource_monitor(resource_monitor)
+
+        self._check_exit_code(exit_code, container_name)
+        return resources
+
+    def stop_session(self):
+        for container_name, container in self._sessions.items():
+            try:
+                # The container was started with remove=True
+                container.kill()
+            except docker.errors.NotFound:
+                pass
+            except docker.errors.DockerException as e:
+                logger.warning(f"Error stopping session container {container_name}: {e}")
+
+        self._sessions.clear()
+        self._session_locks.clear()
+
+    def __enter__(self):
+        self.start_session()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop_session()
+
+    def __del__(self):
+        if getattr(self, "_sessions", None):
+            self.stop_session()
+        if getattr(self, "result_cache", None):
+            self.result_cache.close()
+        if hasattr(self, "docker_client"):
+            self.docker_client.close()
+
+
+class GCCBenchmark(CompilerBenchmarkBase):
+    COMPILER_TYPE = "GCC"
+
+    def __init__(self, workload):
+        super().__init__(workload)
+        self.config_space = GCCConfigSpace()
+
     # Deprecated
     def _run_in_local(self, benchmark, flagstr="") -> dict:
         benchmark_path = resources.path(
@@ -297,102 +1118,13 @@ class GCCBenchmark(CompilerBenchmarkBase):
 
 
 class LLVMBenchmark(CompilerBenchmarkBase):
+    COMPILER_TYPE = "LLVM"
+    FLAG_ORDER_MATTERS = True
+
     def __init__(self, workload):
         super().__init__(workload)
         self.config_space = LLVMConfigSpace()
 
-    def execute_benchmark(self, flags_str):
-        self._remove_existing_container(self.container_name)
-
-        # Map papi_events.txt and results directory to the container
-        papi_file = self.config_dir / "papi_events.txt"
-        volumes_mapping = {
-            papi_file: {
-                "bind": "/benchmark/utilities/papi_events.txt",
-                "mode": "rw",
-            },
-            self.results_dir: {
-                "bind": "/benchmark/results",
-                "mode": "rw",
-            },
-        }
-
-        try:
-            attempt = 0
-            while attempt < 3:
-                try:
-                    container = self.docker_client.containers.run(
-                        self.docker_image,
-                        name=self.container_name,
-                        volumes=volumes_mapping,
-                        command=[
-                            # "-v",
-                            "LLVM",
-                            self.workload,
-                            f"--flags={flags_str}",
-                        ],
-                        privileged=True,
-                        remove=True,
-                        detach=True,
-                        stdout=True,
-                        stderr=True,
-                    )
-                    # If the container runs successfully, break out of the retry loop
-                    break
-                except TimeoutError as te:
-                    logger.warning(f"Attempt {attempt + 1} timed out: {te}")
-                    time.sleep(1.5 ** attempt)
-                    attempt += 1
-
-            if self.debug_mode:
-                for line in container.logs(stream=True, follow=True):
-                    logger.info(line.strip().decode("utf-8"))
-            else:
-                container.wait()
-
-        except docker.errors.NotFound as e:
-            logger.error(f"The container might already be removed.")
-
-        except docker.errors.DockerException as e:
-            logger.error(f"Error running BenchBase container: {e}")
-            raise RuntimeError("Failed to run BenchBase.")
-
-    def run(self, flags: dict) -> dict:
-        self.config_space.set_current_config(flags)
-        flags_str = self.config_space.generate_flags_str()
-
-        try:
-            self.execute_benchmark(flags_str)
-            return self.parse_results()
-        except Exception as e:
-            logger.error(f"Error running benchmark: {e}")
-            raise
-
-    def run_with_random(self) -> dict:
-        self.config_space.set_random_config()
-        flags_str = self.config_space.generate_flags_str()
-
-        try:
-            self.execute_benchmark(flags_str)
-            return self.parse_results()
-        except Exception as e:
-            logger.error(f"Error running benchmark: {e}")
-            raise
-
-    def parse_results(self) -> dict:
-        try:
-            with open(self.results_dir / "llvm_results.json", "r") as f:
-                result = json.load(f)
-        except Exception as e:
-            logger.error(f"Error parsing benchmark results: {e}")
-            raise RuntimeError("Failed to parse benchmark results.")
-
-        result = result.get(self.workload, {})
-        return result
-
-    def get_config_space(self) -> dict:
-        return self.config_space.get_all_details()
-    
     # Deprecated
     def _run_in_local(self, benchmark, flagstr="") -> dict:
         # pkg_path = Path(pkg_resources.get_distribution("csstuning").location)
@@ -1,13 +1,15 @@
 import json
 from pathlib import Path
 
+from csstuning.compiler.flags_codec import (QUATERNIONS, parse_gcc_flags,
+                                            parse_llvm_passes)
 from csstuning.config import config_loader
-from csstuning.config_space import ConfigSpace
+from csstuning.config_space import ConfigSpace, Configuration
 
 
 class GCCConfigSpace(ConfigSpace):
-    def __init__(self):
-        super().__init__(self._load_config())
+    def __init__(self, seed=None):
+        super().__init__(self._load_config(), seed)
 
         self.align_flags = [
             "align-functions",
@@ -15,7 +17,7 @@ class GCCConfigSpace(ConfigSpace):
             "align-labels",
             "align-loops",
         ]
-        self.quaternions = self._create_quaternions_mapping()
+        self.quaternions = QUATERNIONS
         self._setup_align_flags()
 
     @staticmethod
@@ -35,22 +37,22 @@ class GCCConfigSpace(ConfigSpace):
             if item.type == "enum" and item.scope != "Param":
                 item.current_value = "ON"
 
-    def generate_flags_str(self) -> str:
+    def generate_flags_str(self, config=None) -> str:
+        """Flags of a configuration, or of the current config by default."""
+        if config is None:
+            config = self.get_current_config()
         flag_parts = []
 
         for name, entry in self.config_items.items():
+            value = config[name]
             if entry.type == "enum":
                 if entry.scope != "Param":
-                    flag_parts.append(
-                        f"-f{name}" if entry.current_value == "ON" else f"-fno-{name}"
-                    )
+                    flag_parts.append(f"-f{name}" if value == "ON" else f"-fno-{name}")
                 else:
-                    flag_parts.append(f"-f{name}={entry.current_value}")
+                    flag_parts.append(f"-f{name}={value}")
 
             elif entry.type == "integer" and entry.scope == "Align":
-                quaternion_value = self.integer_to_quaternion(
-                    entry.current_value
-                ).strip()
+                quaternion_value = self.integer_to_quaternion(int(value)).strip()
                 flag_parts.append(
                     f"-f{name}={quaternion_value}"
                     if quaternion_value
@@ -59,6 +61,13 @@ class GCCConfigSpace(ConfigSpace):
 
         return " ".join(flag_parts)
 
+    def parse_flags_str(self, flags_str, strict=False) -> Configuration:
+        """
+        Configuration of the flags of a command line, on top of the defaults.
+        The inverse of generate_flags_str(), see flags_codec.parse_gcc_flags().
+        """
+        return self.make_config(parse_gcc_flags(flags_str, self, strict))
+
     def integer_to_quaternion(self, value):
         return self.quaternions[value]
 
@@ -69,46 +78,19 @@ class GCCConfigSpace(ConfigSpace):
 
     @staticmethod
     def _create_quaternions_mapping():
-        n_values = [0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
-        m_values = [0, 1, 3, 7, 15, 31, 63]
-
-        # handle the case where n, n1, m, m1 = 0
-        def format_quaternion(n, m, n1, m1):
-            parts = []
-            if n > 0:
-                parts.append(str(n))
-                if m > 0:
-                    parts.append(str(m))
-            if n1 > 0:
-                parts.append(str(n1))
-                if m1 > 0:
-                    parts.append(str(m1))
-            return ":".join(parts)
-
-        return [
-            format_quaternion(n, m, n1, m1)
-            for n in n_values
-            for m in m_values
-            if m < n
-            for n1 in n_values
-            if n1 < n
-            for m1 in m_values
-            if m1 < n1
-        ]
-    
+        return list(QUATERNIONS)
+
     @staticmethod
     def map_integer_to_quaternion(index):
-        quaternions_list = GCCConfigSpace._create_quaternions_mapping()
-        
-        if 0 <= index < len(quaternions_list):
-            return quaternions_list[index]
+        if 0 <= index < len(QUATERNIONS):
+            return QUATERNIONS[index]
         else:
             return None
 
 
 class LLVMConfigSpace(ConfigSpace):
-    def __init__(self):
-        super().__init__(self._load_config())
+    def __init__(self, seed=None):
+        super().__init__(self._load_config(), seed)
 
     @staticmethod
     def _load_config():
@@ -127,33 +109,39 @@ class LLVMConfigSpace(ConfigSpace):
             if item.type == "enum" and item.scope != "Param":
                 item.current_value = "ON"
     
-    def generate_flags_str(self, order_list=None) -> str:
+    def parse_flags_str(self, passes_str, strict=False) -> Configuration:
         """
-        Generates a flags string for LLVM optimization passes.
+        Configuration enabling exactly the passes of a command line. The
+        inverse of generate_flags_str(), see flags_codec.parse_llvm_passes().
+        """
+        return self.make_config(parse_llvm_passes(passes_str, self, strict))
+
+    def generate_flags_str(self, order_list=None, config=None) -> str:
+        """
+        Generates a flags string for LLVM optimization passes of a
+        configuration, or of the current config by default.
         Note: The sequence of passes is critical in LLVM.
         Currently, analysis passes are prioritized before transformation passes.
         TODO:
         - Implement functionality to allow custom ordering of passes by the user.
         """
+        if config is None:
+            config = self.get_current_config()
         flags = []
 
         if order_list is None:
             analysis_flags = [
                 f"-{name}"
                 for name, entry in self.config_items.items()
-                if entry.current_value == "ON" and entry.scope == "Analysis"
+                if config[name] == "ON" and entry.scope == "Analysis"
             ]
             transform_flags = [
                 f"-{name}"
                 for name, entry in self.config_items.items()
-                if entry.current_value == "ON" and entry.scope == "Transform"
+                if config[name] == "ON" and entry.scope == "Transform"
             ]
             flags = analysis_flags + transform_flags
         else:
-            flags = [
-                f"-{name}"
-                for name in order_list
-                if self.config_items[name].current_value == "ON"
-            ]
+            flags = [f"-{name}" for name in order_list if config[name] == "ON"]
 
         return " ".join(flags)
@@ -0,0 +1,124 @@
+from csstuning.logger import logger
+
+
+def _build_quaternions() -> tuple:
+    """The n:m:n1:m1 values of the -falign-* flags, indexed by their integer."""
+    n_values = [0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+    m_values = [0, 1, 3, 7, 15, 31, 63]
+
+    # handle the case where n, n1, m, m1 = 0
+    def format_quaternion(n, m, n1, m1):
+        parts = []
+        if n > 0:
+            parts.append(str(n))
+            if m > 0:
+                parts.append(str(m))
+        if n1 > 0:
+            parts.append(str(n1))
+            if m1 > 0:
+                parts.append(str(m1))
+        return ":".join(parts)
+
+    return tuple(
+        format_quaternion(n, m, n1, m1)
+        for n in n_values
+        for m in m_values
+        if m < n
+        for n1 in n_values
+        if n1 < n
+        for m1 in m_values
+        if m1 < n1
+    )
+
+
+QUATERNIONS = _build_quaternions()
+QUATERNION_INDEX = {quaternion: i for i, quaternion in enumerate(QUATERNIONS)}
+
+
+def quaternion_to_integer(value) -> int:
+    """Integer of an alignment value such as "16:7:8", ValueError if unknown."""
+    parts = value.strip().split(":")
+    # "16:0" aligns the same as "16"
+    while len(parts) > 1 and parts[-1] == "0":
+        parts.pop()
+    try:
+        return QUATERNION_INDEX[":".join(parts)]
+    except KeyError:
+        raise ValueError(f"Alignment '{value}' is not in the config space.")
+
+
+def parse_gcc_flags(flags_str, config_space, strict=False) -> dict:
+    """
+    Return the options of a GCC config space set by a command line, e.g.
+    "-O2 -funroll-loops -fno-gcse -falign-loops=16:7:8". Flags outside the
+    config space are logged and skipped, or raise ValueError with strict.
+    """
+    # Some option names of the config files end with a space
+    names = {name.strip(): name for name in config_space.config_items}
+    config = {}
+    skipped = []
+    for token in flags_str.split():
+        name, value = token[2:], None
+        if "=" in name:
+            name, value = name.split("=", 1)
+        negated = name.startswith("no-") and value is None
+        if negated:
+            name = name[3:]
+
+        name = names.get(name)
+        item = config_space.config_items.get(name)
+        if not token.startswith("-f") or item is None:
+            skipped.append(token)
+        elif item.scope == "Align":
+            # -falign-* without a value or -fno-align-* have no integer
+            if value is None:
+                skipped.append(token)
+                continue
+            try:
+                config[name] = quaternion_to_integer(value)
+            except ValueError:
+                skipped.append(token)
+        elif item.scope == "Param":
+            if value in item.enum_values:
+                config[name] = value
+            else:
+                skipped.append(token)
+        elif value is None:
+            config[name] = "OFF" if negated else "ON"
+        else:
+            skipped.append(token)
+
+    _report_skipped(skipped, strict)
+    return config
+
+
+def parse_llvm_passes(passes_str, config_space, strict=False) -> dict:
+    """
+    Return the configuration of an LLVM config space that enables exactly
+    the passes of a command line, e.g. "-basic-aa -licm -gvn". Passes
+    outside the config space are logged and skipped, or raise ValueError
+    with strict.
+    """
+    names = {name.strip(): name for name in config_space.config_items}
+    enabled = set()
+    skipped = []
+    for token in passes_str.split():
+        name = names.get(token[1:])
+        if token.startswith("-") and name is not None:
+            enabled.add(name)
+        else:
+            skipped.append(token)
+
+    _report_skipped(skipped, strict)
+    return {
+        name: "ON" if name in enabled else "OFF"
+        for name in config_space.config_items
+    }
+
+
+def _report_skipped(skipped, strict):
+    if not skipped:
+        return
+    if strict:
+        raise ValueError(f"Flags {skipped} are not in the config space.")
+    logger.warning(f"Skipped flags {skipped} that are not in the config space.")
@@ -1,7 +1,15 @@
-import random
+import math
+from collections.abc import Mapping
+
+import numpy as np
+
+# Integer ranges beyond int64 and the precision of floats, e.g. up to 2^64 - 1
+_EXACT_SPAN = 2**53
 
 
 class ConfigItem:
+    TRANSFORMS = ("linear", "log")
+
     def __init__(self, name, data):
         self.name = name
         self.type = data.get("type")
@@ -9,6 +17,15 @@ class ConfigItem:
         self.min_value = data.get("min")  # Minimum value for integers
         self.max_value = data.get("max")  # Maximum value for integers
         self.scope = data.get("scope")
+        # Whether the option can be changed at runtime, e.g. with SET GLOBAL
+        self.dynamic = data.get("dynamic") == "Yes"
+        # How integers are spread over [0, 1] for sampling and encoding: log
+        # gives each decade of a wide range the same share
+        self.transform = data.get("transform", "linear")
+        if self.transform not in self.TRANSFORMS:
+            raise ValueError(f"{name} has an unknown transform '{self.transform}'.")
+        # Sampled and decoded integers are multiples of the quantum
+        self.quantum = data.get("quantum")
 
         if self.type == "integer":
             self.default = int(data.get("default", self.min_value))
@@ -21,6 +38,10 @@ class ConfigItem:
         return self.current_value
 
     def set_current_value(self, value):
+        self.validate_value(value)
+        self.current_value = value
+
+    def validate_value(self, value):
         # For integer type, check if the value is within the min and max range
         if self.type == "integer":
             if not (self.min_value <= int(value) <= self.max_value):
@@ -31,15 +52,86 @@ class ConfigItem:
         elif self.type == "enum" and value not in self.enum_values:
             raise ValueError(f"{self.name} must be one of {self.enum_values}.")
 
-        self.current_value = value
+    def to_unit(self, values) -> np.ndarray:
+        """Map integer values to [0, 1] according to the transform."""
+        values = np.asarray(values, dtype=float)
+        span = self.max_value - self.min_value
+        if span == 0:
+            return np.zeros_like(values)
+        if self.transform == "log":
+            low, high = self._log_bounds()
+            return (np.log(values + self._log_shift()) - low) / (high - low)
+        return (values - self.min_value) / span
 
-    def set_random_value(self):
-        if self.type == "integer":
-            self.current_value = random.randint(self.min_value, self.max_value)
-        elif self.type == "enum":
-            self.current_value = random.choice(self.enum_values)
+    def from_unit(self, u, sample=False) -> list:
+        """
+        Map points of [0, 1] to integer values, the inverse of to_unit().
+        With sample, points are taken as uniform draws from [0, 1) and every
+        integer of the range (or of its decade, for log) is equally likely.
+        """
+        u = np.clip(np.asarray(u, dtype=float), 0.0, 1.0)
+        span = self.max_value - self.min_value
+        # Sampling spreads u over span + 1 values instead of rounding to them
+        extra = 1 if sample else 0
+        if self.transform == "log":
+            low, high = self._log_bounds(extra)
+            values = np.exp(low + u * (high - low)) - self._log_shift()
+            offsets = values - self.min_value
         else:
-            raise TypeError(f"Random value is not defined for type '{self.type}'.")
+            offsets = u * (span + extra)
+        offsets = np.maximum(np.floor(offsets) if sample else np.rint(offsets), 0)
+
+        if span >= _EXACT_SPAN:
+            if not sample:
+                return self._invert_unit(u)
+            # Sampled values encode and decode exactly
+            values = [min(self.min_value + int(x), self.max_value) for x in offsets]
+            return self._invert_unit(self.to_unit(values))
+        values = self.min_value + np.minimum(offsets, span).astype(np.int64)
+        return self._quantize(values).tolist()
+
+    def _invert_unit(self, u) -> list:
+        """
+        Decode points of [0, 1] of ranges wider than the precision of floats,
+        where several integers share an encoding, to the smallest integer
+        encoded at or above each point, or the maximum at the top.
+        """
+        u = np.asarray(u, dtype=float)
+        top = u >= self.to_unit([self.max_value])[0]
+        # Binary search of the offsets from the minimum in exact integers
+        low = np.zeros(len(u), dtype=np.uint64)
+        high = np.full(len(u), self.max_value - self.min_value, dtype=np.uint64)
+        while (low < high).any():
+            middle = low + (high - low) // np.uint64(2)
+            above = self.to_unit(np.uint64(self.min_value) + middle) >= u
+            high = np.where(above, middle, high)
+            low = np.where(above, low, middle + np.uint64(1))
+        return [
+            self.max_value if is_top else self.min_value + int(offset)
+            for is_top, offset in zip(top, low)
+        ]
+
+    def _log_shift(self):
+        # Ranges starting at 0 are shifted to start at 1
+        return 1 if self.min_value < 1 else 0
+
+    def _log_bounds(self, extra=0):
+        shift = self._log_shift()
+        return (
+            math.log(self.min_value + shift),
+            math.log(self.max_value + shift + extra),
+        )
+
+    def _quantize(self, values) -> np.ndarray:
+        if not self.quantum:
+            return values
+        low = -(-self.min_value // self.quantum) * self.quantum
+        high = self.max_value // self.quantum * self.quantum
+        if low > high:
+            # No multiple of the quantum in the range
+            return values
+        quantized = np.rint(values / self.quantum).astype(np.int64) * self.quantum
+        return np.clip(quantized, low, high)
 
     def get_default_value(self):
         return self.default
@@ -69,11 +161,79 @@ class ConfigItem:
         return details
 
 
+class Configuration(Mapping):
+    """
+    An immutable, hashable {option: value} of a config space, as made by
+    ConfigSpace.make_config(). Configurations of a space share its option
+    index and only hold a tuple of values, so they are cheap to create, copy
+    and use as cache keys.
+    """
+
+    __slots__ = ("_index", "_values", "_hash")
+
+    def __init__(self, index, values):
+        object.__setattr__(self, "_index", index)
+        object.__setattr__(self, "_values", tuple(values))
+        object.__setattr__(self, "_hash", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Configurations are immutable.")
+
+    def __getitem__(self, name):
+        return self._values[self._index[name]]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __eq__(self, other):
+        if isinstance(other, Configuration):
+            return self._values == other._values and (
+                self._index is other._index or self._index == other._index
+            )
+        return super().__eq__(other)
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash(self._values))
+        return self._hash
+
+    def __repr__(self):
+        return f"Configuration({dict(self)})"
+
+    def __reduce__(self):
+        return (Configuration, (self._index, self._values))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def replace(self, changes: dict) -> "Configuration":
+        """Return a copy with some values changed. They are not validated."""
+        values = list(self._values)
+        for name, value in changes.items():
+            values[self._index[name]] = value
+        return Configuration(self._index, values)
+
+
 class ConfigSpace:
-    def __init__(self, config_data):
+    SAMPLING_METHODS = ("uniform", "lhs", "sobol")
+
+    def __init__(self, config_data, seed=None):
         self.config_items = {
             name: ConfigItem(name, data) for name, data in config_data.items()
         }
+        # Random state of the samplers, see set_seed()
+        self.rng = np.random.default_rng(seed)
+        # Shared by the configurations made by make_config()
+        self._config_index = {name: i for i, name in enumerate(self.config_items)}
+
+    def set_seed(self, seed):
+        self.rng = np.random.default_rng(seed)
 
     def get_current_config(self) -> dict:
         return {
@@ -87,9 +247,206 @@ class ConfigSpace:
         for name, value in config.items():
             self.set_option_value(name, value)
 
+    def make_config(self, values=None) -> Configuration:
+        """
+        Make a configuration of the defaults overridden by values, a dict or
+        another configuration. Raises ValueError for invalid values.
+        """
+        if isinstance(values, Configuration) and values._index is self._config_index:
+            # Already validated
+            return values
+
+        values = values or {}
+        unknown = [name for name in values if name not in self.config_items]
+        if unknown:
+            raise KeyError(f"The options {unknown} are not in the configuration space.")
+
+        config_values = []
+        for name, item in self.config_items.items():
+            if name in values:
+                # Some defaults are not in the exact form of enum_values
+                if values[name] != item.default:
+                    item.validate_value(values[name])
+                config_values.append(values[name])
+            else:
+                config_values.append(item.default)
+
+        config = Configuration(self._config_index, config_values)
+        self._validate_config(config)
+        return config
+
+    def _validate_config(self, config):
+        """Check constraints between options, raising ValueError."""
+
     def set_random_config(self):
-        for item in self.config_items.values():
-            item.set_random_value()
+        for name, value in self.sample_batch(1)[0].items():
+            self.config_items[name].current_value = value
+
+    def sample_batch(self, n, method="uniform") -> list:
+        """
+        Draw n random configurations. method is "uniform" for independent
+        draws, or "lhs" (Latin hypercube) or "sobol" (scrambled Sobol
+        sequence, requires scipy) for space-filling initial designs.
+        """
+        points = self._sample_points(n, method)
+        columns = self._points_to_columns(points)
+        names = list(columns)
+        return [
+            dict(zip(names, row))
+            for row in zip(*(column.tolist() for column in columns.values()))
+        ]
+
+    def _sample_points(self, n, method) -> np.ndarray:
+        """n points of the unit hypercube, one dimension per option."""
+        dims = len(self.config_items)
+        if method == "uniform":
+            return self.rng.random((n, dims))
+
+        if method == "lhs":
+            # One point in each of the n strata of every dimension
+            strata = self.rng.permuted(np.tile(np.arange(n), (dims, 1)), axis=1).T
+            return (strata + self.rng.random((n, dims))) / n
+
+        if method == "sobol":
+            try:
+                from scipy.stats import qmc
+            except ImportError:
+                raise RuntimeError(
+                    "Sobol sampling requires scipy, install it or use method='lhs'."
+                )
+            return qmc.Sobol(dims, scramble=True, seed=self.rng).random(n)
+
+        raise ValueError(
+            f"Unknown sampling method '{method}', use one of {self.SAMPLING_METHODS}."
+        )
+
+    def _points_to_columns(self, points) -> dict:
+        """
+        Map points of the unit hypercube to {name: array of values}, each
+        value of an option being equally likely.
+        """
+        columns = {}
+        for i, (name, item) in enumerate(self.config_items.items()):
+            if item.type == "integer":
+                values = item.from_unit(points[:, i], sample=True)
+                huge = item.max_value - item.min_value >= _EXACT_SPAN
+                columns[name] = np.array(values, dtype=object if huge else np.int64)
+            elif item.type == "enum":
+                count = len(item.enum_values)
+                codes = np.minimum((points[:, i] * count).astype(int), count - 1)
+                columns[name] = np.array(item.enum_values, dtype=object)[codes]
+            else:
+                raise TypeError(f"Random value is not defined for type '{item.type}'.")
+        return columns
+
+    @staticmethod
+    def _scale_integer(u, low, high) -> np.ndarray:
+        """Integers in [low, high] from u in [0, 1). high may be an array."""
+        span = high - low
+        offsets = np.minimum(np.floor(u * (span + 1)), span).astype(np.int64)
+        return low + offsets
+
+    def encode_batch(self, configs, one_hot=False) -> np.ndarray:
+        """
+        Encode configurations as rows of an array with values in [0, 1].
+        Integers are min-max normalized, after taking the logarithm for the
+        ones with a log transform. Enums are encoded as their index
+        scaled to [0, 1], or as one column per value with one_hot. Options
+        missing from a configuration take their default value.
+        """
+        layout = self._codec_layout(one_hot)
+        array = np.zeros((len(configs), layout[-1][3] if layout else 0))
+
+        for name, item, start, stop in layout:
+            column = [config.get(name, item.default) for config in configs]
+
+            if item.type == "integer":
+                # Compared as integers, floats round the bounds of 2^64 ranges
+                invalid = [
+                    value
+                    for value in column
+                    if not item.min_value <= int(value) <= item.max_value
+                ]
+                if invalid:
+                    raise ValueError(
+                        f"{name} must be between {item.min_value} and "
+                        f"{item.max_value}, got {invalid[0]}."
+                    )
+                array[:, start] = item.to_unit(column)
+                continue
+
+            # Some enums of numbers have their default as a number
+            index = {str(value): i for i, value in enumerate(item.enum_values)}
+            try:
+                codes = np.array([index[str(value)] for value in column], dtype=int)
+            except KeyError as e:
+                raise ValueError(f"{name} must be one of {item.enum_values}, got {e}.")
+            if one_hot:
+                array[np.arange(len(configs)), start + codes] = 1.0
+            elif len(item.enum_values) > 1:
+                array[:, start] = codes / (len(item.enum_values) - 1)
+
+        return array
+
+    def decode_batch(self, array, one_hot=False) -> list:
+        """
+        Decode rows encoded by encode_batch() into configurations. Values
+        outside [0, 1] are clipped and integers rounded, so that any point of
+        the unit hypercube decodes to a valid configuration. Integers with
+        ranges wider than the precision of floats, e.g. up to 2^64 - 1,
+        share encodings and decode to the smallest integer of theirs, or the
+        maximum for the top one; sampled values are such integers, so
+        sampled configurations decode to themselves.
+        """
+        layout = self._codec_layout(one_hot)
+        array = np.atleast_2d(np.asarray(array, dtype=float))
+        width = layout[-1][3] if layout else 0
+        if array.shape[1] != width:
+            raise ValueError(f"Expected {width} columns, got {array.shape[1]}.")
+
+        columns = []
+        for name, item, start, stop in layout:
+            if item.type == "integer":
+                columns.append(item.from_unit(array[:, start]))
+                continue
+
+            if one_hot:
+                codes = array[:, start:stop].argmax(axis=1)
+            else:
+                codes = np.rint(
+                    np.clip(array[:, start], 0.0, 1.0) * (len(item.enum_values) - 1)
+                ).astype(int)
+            enum_values = np.array(item.enum_values, dtype=object)
+            columns.append(enum_values[codes].tolist())
+
+        names = [name for name, _, _, _ in layout]
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+    def get_encoded_names(self, one_hot=False) -> list:
+        """Names of the columns of encode_batch(), e.g. "binlog_format=ROW"."""
+        names = []
+        for name, item, start, stop in self._codec_layout(one_hot):
+            if stop - start == 1:
+                names.append(name)
+            else:
+                names.extend(f"{name}={value}" for value in item.enum_values)
+        return names
+
+    def _codec_layout(self, one_hot) -> list:
+        """(name, item, first column, end column) of each option."""
+        # Not cached, subclasses may adjust the ranges after __init__
+        layout = []
+        start = 0
+        for name, item in self.config_items.items():
+            if item.type == "enum" and one_hot:
+                width = len(item.enum_values)
+            elif item.type in ("integer", "enum"):
+                width = 1
+            else:
+                raise TypeError(f"Encoding is not defined for type '{item.type}'.")
+            layout.append((name, item, start, start + width))
+            start += width
+        return layout
 
     def reset_all_to_defaults(self):
         for item in self.config_items.values():
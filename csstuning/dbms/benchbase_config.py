@@ -0,0 +1,44 @@
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+# Settings of a BenchBase workload config that can be overridden per run.
+# terminals applies to the whole run, the others to every phase in <works>.
+WORKLOAD_OVERRIDES = ("time", "terminals", "rate", "warmup")
+
+
+def write_workload_config(template_file, output_file, overrides):
+    """
+    Write a copy of a BenchBase workload config with some of its settings
+    overridden, e.g. {"time": 10, "terminals": 16}. rate may be "unlimited".
+    """
+    invalid = [name for name in overrides if name not in WORKLOAD_OVERRIDES]
+    if invalid:
+        raise ValueError(
+            f"Cannot override {invalid} of BenchBase configs, "
+            f"only {WORKLOAD_OVERRIDES}."
+        )
+
+    tree = ET.parse(template_file)
+    root = tree.getroot()
+
+    for name, value in overrides.items():
+        if name == "terminals":
+            _set_child(root, name, value)
+            continue
+
+        works = root.findall("./works/work")
+        if not works:
+            raise ValueError(f"No <works> phases in {template_file}.")
+        for work in works:
+            _set_child(work, name, value)
+
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    tree.write(output_file, encoding="utf-8", xml_declaration=True)
+
+
+def _set_child(element, name, value):
+    child = element.find(name)
+    if child is None:
+        child = ET.SubElement(element, name)
+    child.text = str(value)
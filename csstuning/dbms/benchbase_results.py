@@ -0,0 +1,215 @@
+import csv
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+
+from csstuning.logger import logger
+
+
+class BenchBaseResults:
+    """
+    Results of a BenchBase run loaded from its output files: the latency of
+    every transaction from *.raw.csv and the per-second throughput from
+    *.samples.csv (or from the raw latencies when sampling was off).
+
+    The leading trim fraction of the run is considered warm-up and left out of
+    the steady-state metrics.
+    """
+
+    PERCENTILES = {"p50": 50, "p95": 95, "p99": 99, "p999": 99.9}
+    HISTOGRAM_BINS = 50
+
+    def __init__(self, results_dir, trim=0.1):
+        self.results_dir = Path(results_dir)
+        self.trim = trim
+
+        self.summary = self._load_summary()
+        self.txn_names = {}
+        # Per transaction: type index, start time (s) and latency (us)
+        self.txn_types, self.start_times, self.latencies = self._load_raw()
+        # Per second of the run: time (s) and throughput (requests/s)
+        self.sample_times, self.throughputs = self._load_samples()
+
+    def _find_file(self, suffix):
+        for item in sorted(self.results_dir.iterdir()):
+            if item.is_file() and item.name.endswith(suffix):
+                return item
+        return None
+
+    def _load_summary(self) -> dict:
+        summary_file = self._find_file(".summary.json")
+        if summary_file is None:
+            logger.error(f"No results found in {self.results_dir}")
+            raise RuntimeError("No results found in the results directory.")
+
+        with open(summary_file) as f:
+            return json.load(f)
+
+    def _load_raw(self):
+        raw_file = self._find_file(".raw.csv")
+        if raw_file is None:
+            logger.warning(f"No raw BenchBase results in {self.results_dir}.")
+            return np.empty(0, dtype=int), np.empty(0), np.empty(0)
+
+        types, starts, latencies = [], [], []
+        with open(raw_file, newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                # Index, name, start time, latency, worker, phase
+                txn_type = int(row[0])
+                self.txn_names.setdefault(txn_type, row[1])
+                types.append(txn_type)
+                starts.append(float(row[2]))
+                latencies.append(float(row[3]))
+
+        return (
+            np.array(types, dtype=int),
+            np.array(starts, dtype=float),
+            np.array(latencies, dtype=float),
+        )
+
+    def _load_samples(self):
+        samples_file = self._find_file(".samples.csv")
+        if samples_file is not None:
+            with open(samples_file, newline="") as f:
+                rows = list(csv.DictReader(f))
+            if rows:
+                return (
+                    np.array([float(r["Time (seconds)"]) for r in rows]),
+                    np.array([float(r["Throughput (requests/second)"]) for r in rows]),
+                )
+
+        # Count the transactions started in each second instead
+        if self.start_times.size == 0:
+            return np.empty(0), np.empty(0)
+        offsets = self.start_times - self.start_times.min()
+        counts = np.bincount(offsets.astype(int))
+        return np.arange(counts.size, dtype=float), counts.astype(float)
+
+    def _steady_start(self) -> float:
+        """Start time of the steady state, relative to the first transaction."""
+        if self.sample_times.size == 0:
+            return 0.0
+        duration = self.sample_times[-1] - self.sample_times[0] + 1
+        return self.sample_times[0] + self.trim * duration
+
+    def _percentiles(self, latencies, prefix="latency_") -> dict:
+        if latencies.size == 0:
+            return {}
+        values = np.percentile(latencies, list(self.PERCENTILES.values()))
+        return {
+            f"{prefix}{name}": float(value)
+            for name, value in zip(self.PERCENTILES, values)
+        }
+
+    def histograms(self) -> dict:
+        """Latency histograms of each transaction type over log-spaced bins."""
+        if self.latencies.size == 0:
+            return {}
+
+        edges = np.geomspace(
+            max(self.latencies.min(), 1.0),
+            max(self.latencies.max(), 2.0),
+            self.HISTOGRAM_BINS + 1,
+        )
+        histograms = {"bin_edges": edges.tolist()}
+        for txn_type, name in sorted(self.txn_names.items()):
+            counts, _ = np.histogram(self.latencies[self.txn_types == txn_type], edges)
+            histograms[name] = counts.tolist()
+        return histograms
+
+    def metrics(self) -> dict:
+        """
+        Summarize the run. latency (95th percentile, us) and throughput
+        (requests/s) are the ones of the BenchBase summary.
+        """
+        result = {
+            "latency": self.summary["Latency Distribution"][
+                "95th Percentile Latency (microseconds)"
+            ],
+            "throughput": self.summary["Throughput (requests/second)"],
+        }
+        result.update(self._percentiles(self.latencies))
+
+        throughputs = self.throughputs
+        if throughputs.size > 2:
+            # Leave out the last second, which is usually incomplete
+            throughputs = throughputs[:-1]
+        if throughputs.size and throughputs.mean() > 0:
+            result["throughput_cov"] = float(throughputs.std() / throughputs.mean())
+
+        steady_start = self._steady_start()
+        steady = self.sample_times[: throughputs.size] >= steady_start
+        if steady.any():
+            result["steady_throughput"] = float(throughputs[steady].mean())
+        if self.start_times.size:
+            offsets = self.start_times - self.start_times.min()
+            result.update(
+                self._percentiles(
+                    self.latencies[offsets >= steady_start], "steady_latency_"
+                )
+            )
+
+        result["transactions"] = {
+            name: {
+                "count": int((self.txn_types == txn_type).sum()),
+                **self._percentiles(
+                    self.latencies[self.txn_types == txn_type], "latency_"
+                ),
+            }
+            for txn_type, name in sorted(self.txn_names.items())
+        }
+        result["latency_histograms"] = self.histograms()
+        return result
+
+
+class ThroughputMonitor:
+    """
+    Watches the --interval-monitor output of a running BenchBase and tells
+    when its throughput is clearly below a threshold: once past the grace
+    period, every sample of the last window is below the threshold and their
+    mean is lower by more than the relative margin.
+    """
+
+    PATTERN = re.compile(r"Throughput:\s*([0-9.]+)\s*txn/sec", re.IGNORECASE)
+
+    def __init__(self, threshold, window=10, grace=10, margin=0.1):
+        self.threshold = threshold
+        self.window = window
+        self.grace = grace
+        self.margin = margin
+        self.throughputs = []
+
+    def feed(self, line) -> bool:
+        """Parse an output line, return whether the run should be aborted."""
+        match = self.PATTERN.search(line)
+        if match is None:
+            return False
+
+        self.throughputs.append(float(match.group(1)))
+        return self.is_clearly_slower()
+
+    def is_clearly_slower(self) -> bool:
+        samples = self.throughputs[self.grace :]
+        if len(samples) < self.window:
+            return False
+
+        recent = samples[-self.window :]
+        mean = sum(recent) / len(recent)
+        return (
+            max(recent) < self.threshold
+            and mean * (1 + self.margin) < self.threshold
+        )
+
+    def censored_result(self) -> dict:
+        """Partial result of an aborted run."""
+        samples = self.throughputs[self.grace :] or self.throughputs
+        return {
+            "latency": None,
+            "throughput": sum(samples) / len(samples) if samples else 0.0,
+            "censored": True,
+            "monitor_throughputs": self.throughputs,
+        }
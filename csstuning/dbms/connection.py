@@ -0,0 +1,77 @@
+import pymysql
+
+from csstuning.config import config_loader
+from csstuning.logger import logger
+
+
+class MySQLConnection:
+    """
+    A pymysql connection that is kept open and reused, so that callers don't
+    pay the handshake each time. It is reconnected when the server was
+    restarted in the meantime.
+
+    Not thread-safe: each benchmark (or pool instance) has its own.
+    """
+
+    def __init__(self, host, port, user, password, **connect_args):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.connect_args = connect_args
+        self._connection = None
+
+    @classmethod
+    def from_config(cls, port=None, **connect_args):
+        """Connection with the host, port and credentials of the config."""
+        env_config = config_loader.get_config()
+        return cls(
+            env_config.get("database", "mysql_host", fallback="127.0.0.1"),
+            port or env_config.getint("database", "mysql_port", fallback=3307),
+            env_config.get("database", "mysql_user", fallback="root"),
+            env_config.get("database", "mysql_password", fallback="password"),
+            **connect_args,
+        )
+
+    def get(self):
+        """
+        Return the open connection, connecting or reconnecting as needed.
+        Raises pymysql.err.OperationalError if the server can't be reached.
+        """
+        try:
+            if self._connection is None:
+                self._connection = pymysql.connect(
+                    host=self.host,
+                    port=self.port,
+                    user=self.user,
+                    password=self.password,
+                    autocommit=True,
+                    **self.connect_args,
+                )
+            else:
+                self._connection.ping(reconnect=True)
+        except pymysql.err.OperationalError:
+            # Start over with a new connection next time
+            self.close()
+            raise
+        return self._connection
+
+    def cursor(self, cursor=None):
+        return self.get().cursor(cursor)
+
+    def is_healthy(self) -> bool:
+        """Return whether the server can be reached."""
+        try:
+            self.get()
+            return True
+        except pymysql.err.OperationalError as e:
+            logger.debug(f"MySQL at {self.host}:{self.port} is unreachable: {e}")
+            return False
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except pymysql.err.Error:
+                pass
+            self._connection = None
@@ -1,7 +1,12 @@
-import json
+import asyncio
+import math
 import os
+import queue
+import re
 import shutil
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from importlib import resources
 from pathlib import Path
 
@@ -9,12 +14,31 @@ import docker
 import docker.errors
 import pymysql
 
+from csstuning import async_docker
 from csstuning.config import config_loader
+from csstuning.dbms.benchbase_config import write_workload_config
+from csstuning.dbms.benchbase_results import BenchBaseResults, ThroughputMonitor
+from csstuning.dbms.connection import MySQLConnection
 from csstuning.dbms.dbms_config_space import MySQLConfigSpace
+from csstuning.dbms.mysql_metrics import MySQLInternalMetrics
+from csstuning.dbms.snapshot import DataDirSnapshots
 from csstuning.logger import logger
+from csstuning.monitor import ResourceMonitor
 
 
 class MySQLBenchmark:
+    # Readiness polling starts fast and backs off, as startup takes from a
+    # second (small databases) to minutes (crash recovery of large ones)
+    READY_POLL_MIN_INTERVAL = 0.1
+    READY_POLL_MAX_INTERVAL = 2.0
+    READY_POLL_BACKOFF = 1.5
+    INNODB_STARTED_PATTERN = re.compile(r"InnoDB: .* started; log sequence number")
+    # MySQL 5.7 logs the port on the line following the marker
+    READY_PATTERN = re.compile(r"ready for connections.*?port: (\d+)", re.DOTALL)
+    # Dynamic knobs that are only changed by a restart: SET GLOBAL returns
+    # while InnoDB still resizes the buffer pool in the background
+    RESTART_KNOBS = ["innodb_buffer_pool_size"]
+
     AVAILABLE_WORKLOADS = [
         "sibench",
         "voter",
@@ -25,7 +49,12 @@ class MySQLBenchmark:
         "tpcc",
     ]
 
-    def __init__(self, workload):
+    def __init__(self, workload, instance_id=None):
+        """
+        With an instance_id, the benchmark is one instance of a pool used by
+        run_batch(): its containers, port, data directory, config files,
+        results and CPUs are all separate from the other instances.
+        """
         if workload not in self.AVAILABLE_WORKLOADS:
             logger.error(
                 f"Workload '{workload}' is not supported. Supported workloads: {self.AVAILABLE_WORKLOADS}"
@@ -36,12 +65,42 @@ class MySQLBenchmark:
 
         # Update to use configuration values from config_loader
         self.debug_mode = env_config.getboolean("general", "debug_mode")
+        self.resource_monitor = env_config.getboolean(
+            "general", "resource_monitor", fallback=False
+        )
+        self.monitor_interval = env_config.getfloat(
+            "general", "monitor_interval", fallback=1.0
+        )
+        logs_dir = Path(env_config.get("general", "logs_dir"))
+        self.telemetry_dir = Path(
+            env_config.get(
+                "general", "telemetry_dir", fallback=str(logs_dir.parent / "telemetry")
+            )
+        )
+        # Resource usage summary of the last BenchBase run
+        self.last_resources = None
         self.mysql_image = env_config.get("database", "mysql_image")
         self.mysql_container_name = env_config.get("database", "mysql_container_name")
+        self.mysql_port = env_config.getint("database", "mysql_port", fallback=3307)
         self.vcpus = env_config.getfloat("database", "mysql_vcpus")
         self.mem = env_config.getfloat("database", "mysql_mem")
         self.mysql_config_file = Path(env_config.get("database", "mysql_config_file"))
         self.mysql_data_dir = Path(env_config.get("database", "mysql_data_dir"))
+        self.pool_size = env_config.getint("database", "pool_size", fallback=1)
+        self.hot_apply = env_config.getboolean("database", "hot_apply", fallback=False)
+        self.restore_snapshot = env_config.getboolean(
+            "database", "restore_snapshot", fallback=False
+        )
+        self.snapshots = DataDirSnapshots(
+            env_config.get(
+                "database",
+                "snapshot_dir",
+                fallback=str(self.mysql_data_dir.parent / "snapshots"),
+            )
+        )
+        # Time taken to restore the data directory for the last evaluation
+        self.last_restore_time = None
+        self._warned_no_snapshot = False
 
         self.benchbase_image = env_config.get("database", "benchbase_image")
         self.benchbase_container_name = env_config.get(
@@ -54,13 +113,102 @@ class MySQLBenchmark:
             env_config.get("database", "benchbase_results_dir")
         )
 
+        self.steady_state_trim = env_config.getfloat(
+            "database", "steady_state_trim", fallback=0.1
+        )
+        self.last_results = None
+        self.collect_internal_metrics = env_config.getboolean(
+            "database", "internal_metrics", fallback=True
+        )
+        self.internal_metrics = MySQLInternalMetrics()
+        # Internal metric changes over the last BenchBase run
+        self.last_internal_metrics = None
+        self.early_stop_window = env_config.getint(
+            "database", "early_stop_window", fallback=10
+        )
+        self.early_stop_grace = env_config.getint(
+            "database", "early_stop_grace", fallback=10
+        )
+        self.early_stop_margin = env_config.getfloat(
+            "database", "early_stop_margin", fallback=0.1
+        )
+
+        self.instance_id = instance_id
+        self.cpuset = None
+        if instance_id is not None:
+            self._isolate_instance(instance_id)
+        # Shared by the readiness checks, hot-apply and internal metrics
+        self.connection = MySQLConnection.from_config(port=self.mysql_port)
+        # Instances of the pool used by run_batch()
+        self._pool = []
+
         self.workload = workload
         self.config_space = MySQLConfigSpace()
+        if env_config.getboolean("database", "fit_knobs_to_resources", fallback=True):
+            self.config_space.apply_resource_limits(self.mem, self.vcpus)
         self.docker_client = docker.from_env()
         self.mysql_container = None
+        # When the MySQL container was started and how long docker took
+        self._mysql_started_at = None
+        self._mysql_start_time = None
+        # Phase timings of the last MySQL startup in seconds: how long docker
+        # took to start the container, and from then until InnoDB finished
+        # recovery and until MySQL accepted connections
+        self.startup_timings = None
+        # Knobs the running MySQL server was configured with, None if unknown
+        self._applied_config = None
+        # Values MySQL adjusted the last knobs applied online to, by name
+        self.adjusted_knobs = None
+        # Serializes the evaluate() calls of threads sharing the MySQL container
+        self._evaluate_lock = threading.Lock()
+        # Created by arun(), in the running event loop
+        self._async_lock = None
 
         # self.initialize_benchmark_data_dir()
 
+    def _isolate_instance(self, instance_id):
+        suffix = f"_{instance_id}"
+        self.mysql_container_name += suffix
+        self.benchbase_container_name += suffix
+        # Keep clear of the port of the benchmark that owns the pool
+        self.mysql_port += instance_id + 1
+        self.mysql_config_file = self.mysql_config_file.with_name(
+            f"{self.mysql_config_file.stem}{suffix}{self.mysql_config_file.suffix}"
+        )
+        self.mysql_data_dir = self.mysql_data_dir.with_name(
+            self.mysql_data_dir.name + suffix
+        )
+
+        # BenchBase configs pointing to the instance's port
+        shared_config_dir = self.benchbase_config_dir
+        self.benchbase_config_dir = shared_config_dir / f"instance{suffix}"
+        self.benchbase_results_dir = self.benchbase_results_dir / f"instance{suffix}"
+        self._write_benchbase_configs(shared_config_dir)
+        self.benchbase_results_dir.mkdir(parents=True, exist_ok=True)
+
+        # Give each instance its own CPUs, as many as its CPU quota
+        cpus_per_instance = math.ceil(self.vcpus)
+        first_cpu = instance_id * cpus_per_instance
+        if first_cpu + cpus_per_instance <= (os.cpu_count() or 1):
+            self.cpuset = f"{first_cpu}-{first_cpu + cpus_per_instance - 1}"
+        else:
+            logger.warning(
+                f"Not enough CPUs to pin MySQL instance {instance_id}, "
+                "it only gets a CPU quota."
+            )
+
+    def _write_benchbase_configs(self, shared_config_dir):
+        self.benchbase_config_dir.mkdir(parents=True, exist_ok=True)
+        for config_file in shared_config_dir.glob("*.xml"):
+            content = config_file.read_text()
+            # Same pattern as update_port.sh
+            content = re.sub(
+                r"jdbc:mysql://localhost:[0-9]+/benchbase",
+                f"jdbc:mysql://localhost:{self.mysql_port}/benchbase",
+                content,
+            )
+            (self.benchbase_config_dir / config_file.name).write_text(content)
+
     # Deprecated. Directories are now created in setup.py
     def initialize_benchmark_data_dir(self):
         pass
@@ -132,6 +280,8 @@ class MySQLBenchmark:
                 logger.error(f"Error cleaning up MySQL data directory: {e}")
 
     def _gracefully_stop_mysql_container(self, container_name):
+        self._applied_config = None
+        self.connection.close()
         try:
             container = self.docker_client.containers.get(container_name)
 
@@ -140,7 +290,10 @@ class MySQLBenchmark:
 
             logger.info(f"Sending shutdown command to MySQL container...")
 
-            shutdown_command = "mysqladmin shutdown -u root -ppassword"
+            shutdown_command = (
+                f"mysqladmin shutdown -u {self.connection.user} "
+                f"-p{self.connection.password}"
+            )
             container.exec_run(shutdown_command)
 
             logger.info("Waiting for MySQL container to stop...")
@@ -181,15 +334,17 @@ class MySQLBenchmark:
                 "mode": "rw",
             }
 
+        # The root password only takes effect on a fresh data directory
         environment = {
-            "MYSQL_ROOT_PASSWORD": "password",
+            "MYSQL_ROOT_PASSWORD": self.connection.password,
             "MYSQL_USER": "admin",
             "MYSQL_PASSWORD": "password",
             "MYSQL_DATABASE": "benchbase",
         }
-        ports = {"3306/tcp": 3307}
+        ports = {"3306/tcp": self.mysql_port}
 
         logger.info("Starting MySQL container...")
+        requested_at = time.time()
         if limit_resources:
             self.mysql_container = self.docker_client.containers.run(
                 self.mysql_image,
@@ -199,6 +354,7 @@ class MySQLBenchmark:
                 ports=ports,
                 user=f"{os.getuid()}:{os.getgid()}",
                 cpu_quota=int(self.vcpus * 100000),
+                cpuset_cpus=self.cpuset,
                 mem_limit=f"{self.mem}g",
                 detach=True,
             )
@@ -212,6 +368,8 @@ class MySQLBenchmark:
                 user=f"{os.getuid()}:{os.getgid()}",
                 detach=True,
             )
+        self._mysql_started_at = time.time()
+        self._mysql_start_time = self._mysql_started_at - requested_at
 
     def start_mysql_and_wait(
         self, custom_config=True, limit_resources=True, timeout=None
@@ -219,6 +377,99 @@ class MySQLBenchmark:
         self.start_mysql(custom_config, limit_resources)
         return self._wait_for_mysql_ready(timeout)
 
+    def apply_config(self, config=None):
+        """
+        Bring the MySQL server to a configuration whose config file was
+        generated, the current config by default. With hot_apply, knobs
+        of a running server are changed with SET GLOBAL if only dynamic knobs
+        differ from the ones it runs with, except RESTART_KNOBS; otherwise
+        MySQL is restarted with the generated config file. Integer knobs that
+        MySQL rounded or clamped when set online are read back and reported
+        as "adjusted_knobs" in the result.
+
+        With restore_snapshot, the server is always restarted on a fresh copy
+        of the workload's data directory snapshot.
+        """
+        if config is None:
+            config = self.config_space.get_current_config()
+        config = dict(config)
+        if self._begin_apply_config(config):
+            self._wait_for_mysql_ready()
+            self._applied_config = config
+
+    def _begin_apply_config(self, config) -> bool:
+        """
+        Apply the knobs online if possible, or else start MySQL on them.
+        Returns whether MySQL was started, in which case the caller waits for
+        it to be ready before recording the config as applied.
+        """
+        self.last_restore_time = None
+        self.startup_timings = None
+        self.adjusted_knobs = None
+        if not self.restore_snapshot and self._hot_apply_config(config):
+            return False
+
+        if self.restore_snapshot or self._needs_data_dir():
+            self._restore_data_dir()
+        self.start_mysql()
+        return True
+
+    def _hot_apply_config(self, config) -> bool:
+        if not self.hot_apply or self._applied_config is None:
+            return False
+
+        changed = {
+            name: value
+            for name, value in config.items()
+            if value != self._applied_config.get(name)
+        }
+        items = self.config_space.config_items
+        static = [
+            name
+            for name in changed
+            if not items[name].dynamic or name in self.RESTART_KNOBS
+        ]
+        if static:
+            logger.info(f"Restarting MySQL to change knobs {static}.")
+            return False
+
+        try:
+            self.mysql_container.reload()
+            if self.mysql_container.status != "running":
+                return False
+        except docker.errors.DockerException:
+            return False
+
+        start_time = time.time()
+        adjusted = {}
+        try:
+            with self.connection.cursor() as cursor:
+                for name, value in changed.items():
+                    # Numeric variables reject quoted values
+                    if items[name].type == "integer" or str(value).isdigit():
+                        value = int(value)
+                    cursor.execute(f"SET GLOBAL {name} = %s", (value,))
+                    if items[name].type != "integer":
+                        continue
+
+                    # MySQL rounds and clamps numbers with a warning only
+                    cursor.execute(f"SELECT @@GLOBAL.{name}")
+                    applied = int(cursor.fetchone()[0])
+                    if applied != value:
+                        adjusted[name] = applied
+        except pymysql.err.MySQLError as e:
+            logger.warning(f"Failed to apply knobs online: {e}. Restarting MySQL...")
+            return False
+
+        if adjusted:
+            logger.warning(f"MySQL adjusted knobs applied online to {adjusted}.")
+            self.adjusted_knobs = adjusted
+        self._applied_config = config
+        logger.info(
+            f"Applied {len(changed)} knobs online in {time.time() - start_time:.3f} seconds."
+        )
+        return True
+
     def create_database(self):
         env_conf = config_loader.get_config()
         conf_dir = Path(env_conf.get("database", "dbms_config_dir"))
@@ -276,7 +527,48 @@ class MySQLBenchmark:
 
         self._gracefully_stop_mysql_container(self.mysql_container_name)
 
+        if self.restore_snapshot:
+            self.create_snapshot()
+
+    def create_snapshot(self):
+        """Snapshot the data directory as the pristine state of the workload."""
+        self._gracefully_stop_mysql_container(self.mysql_container_name)
+        self.snapshots.capture(self.mysql_data_dir, self.workload)
+
+    def _needs_data_dir(self):
+        # Pool instances start from a copy of the workload's snapshot
+        return self.instance_id is not None and not (
+            self.mysql_data_dir.is_dir() and any(self.mysql_data_dir.iterdir())
+        )
+
+    def _restore_data_dir(self):
+        self._gracefully_stop_mysql_container(self.mysql_container_name)
+        if not self.snapshots.exists(self.workload):
+            if not self._warned_no_snapshot:
+                logger.warning(
+                    f"No snapshot of {self.workload} data to restore, run "
+                    "create_snapshot() on freshly loaded data first."
+                )
+                self._warned_no_snapshot = True
+            return
+
+        self.last_restore_time = self.snapshots.restore(
+            self.mysql_data_dir, self.workload
+        )
+
     def _wait_for_mysql_ready(self, timeout=None):
+        probe = self._start_readiness_probe(timeout)
+        while not self._probe_mysql_ready(probe):
+            time.sleep(self._next_probe_interval(probe))
+        return True
+
+    async def _await_mysql_ready(self, timeout=None):
+        probe = self._start_readiness_probe(timeout)
+        while not await async_docker.call(self._probe_mysql_ready, probe):
+            await asyncio.sleep(self._next_probe_interval(probe))
+        return True
+
+    def _start_readiness_probe(self, timeout=None) -> dict:
         default_timeout = config_loader.get_config().getint(
             "database", "mysql_start_timeout"
         )
@@ -284,41 +576,108 @@ class MySQLBenchmark:
 
         logger.info(f"Waiting for MySQL to start (timeout: {timeout} seconds)...")
 
-        start_time = time.time()
-        while True:
-            if self._is_mysql_ready():
-                logger.info("MySQL is ready!")
-                return True
-            if time.time() - start_time >= timeout:
-                logger.error(f"MySQL is not ready after {timeout} seconds.")
-                raise RuntimeError("MySQL container failed to start.")
-                # It may be better to keep the container existing for debugging
-                # self.mysql_container.stop()
-                # self.mysql_container.remove()
-                return False
-            time.sleep(5)
+        return {
+            "timeout": timeout,
+            "start_time": self._mysql_started_at or time.time(),
+            "interval": self.READY_POLL_MIN_INTERVAL,
+            "log_offset": 0,
+            "innodb_started_at": None,
+            "last_error": None,
+        }
+
+    def _next_probe_interval(self, probe) -> float:
+        interval = probe["interval"]
+        probe["interval"] = min(
+            interval * self.READY_POLL_BACKOFF, self.READY_POLL_MAX_INTERVAL
+        )
+        return interval
+
+    def _probe_mysql_ready(self, probe) -> bool:
+        """
+        Check once whether MySQL accepts connections. New lines of the
+        container log are scanned for startup markers, which record the phase
+        timings and make the next checks more frequent once InnoDB is up.
+        """
+        self._scan_startup_log(probe)
+
+        if self._is_mysql_ready(probe):
+            start_time = probe["start_time"]
+            innodb_started_at = probe["innodb_started_at"]
+            self.startup_timings = {
+                "container_start": self._mysql_start_time,
+                "innodb_recovery": (
+                    innodb_started_at - start_time if innodb_started_at else None
+                ),
+                "ready": time.time() - start_time,
+            }
+            logger.info(
+                f"MySQL is ready after {self.startup_timings['ready']:.2f} seconds!"
+            )
+            return True
+
+        if time.time() - probe["start_time"] >= probe["timeout"]:
+            logger.error(
+                f"MySQL is not ready after {probe['timeout']} seconds: "
+                f"{probe['last_error']}"
+            )
+            raise RuntimeError("MySQL container failed to start.")
+            # It may be better to keep the container existing for debugging
+            # self.mysql_container.stop()
+            # self.mysql_container.remove()
+        return False
+
+    def _scan_startup_log(self, probe):
+        if self.mysql_container is None:
+            return
 
-    def _is_mysql_ready(self):
+        try:
+            # Also refreshes the status checked by _is_mysql_ready()
+            self.mysql_container.reload()
+            output = self.mysql_container.logs(stdout=True, stderr=True)
+        except docker.errors.DockerException:
+            return
+
+        end = output.rfind(b"\n") + 1
+        new_output = output[probe["log_offset"] : end].decode("utf-8", "replace")
+        probe["log_offset"] = max(end, probe["log_offset"])
+
+        if probe["innodb_started_at"] is None and (
+            self.INNODB_STARTED_PATTERN.search(new_output)
+        ):
+            probe["innodb_started_at"] = time.time()
+            probe["interval"] = self.READY_POLL_MIN_INTERVAL
+
+        # The entrypoint's temporary server for initialization has port 0
+        for match in self.READY_PATTERN.finditer(new_output):
+            if match.group(1) != "0":
+                probe["interval"] = self.READY_POLL_MIN_INTERVAL
+
+    def _is_mysql_ready(self, probe=None):
+        """
+        Return whether MySQL accepts connections. Failures are logged unless
+        a readiness probe is given, which keeps the last error instead.
+        """
         try:
             if self.mysql_container and self.mysql_container.status == "exited":
                 raise RuntimeError("MySQL container failed to start.")
 
-            with pymysql.connect(
-                host="127.0.0.1", port=3307, user="admin", password="password"
-            ):
-                return True
+            # Stays open for the evaluations that follow
+            self.connection.get()
+            return True
         except pymysql.err.OperationalError as e:
-            logger.warning(f"MySQL is not ready yet: {e}. Retrying...")
+            if probe is None:
+                logger.warning(f"MySQL is not ready yet: {e}. Retrying...")
+            else:
+                probe["last_error"] = e
             return False
 
-    def execute_benchmark(self):
-        self._remove_existing_container(self.benchbase_container_name)
-        # Clean up the results directory
+    def _clear_benchbase_results(self):
         for item in self.benchbase_results_dir.iterdir():
             if item.is_file():
                 item.unlink()
 
-        volumes_mapping = {
+    def _benchbase_volumes(self):
+        return {
             self.benchbase_config_dir: {
                 "bind": "/benchbase/config",
                 "mode": "rw",
@@ -328,38 +687,205 @@ class MySQLBenchmark:
                 "mode": "rw",
             },
         }
+
+    def _benchbase_config(self, overrides=None) -> str:
+        """
+        Return the path in the container of the workload config to run,
+        generated into the run subdirectory when settings are overridden.
+        """
+        config_name = f"sample_{self.workload}_config.xml"
+        if not overrides:
+            return f"/benchbase/config/{config_name}"
+
+        write_workload_config(
+            self.benchbase_config_dir / config_name,
+            self.benchbase_config_dir / "run" / config_name,
+            overrides,
+        )
+        return f"/benchbase/config/run/{config_name}"
+
+    def _benchbase_command(self, config_path):
+        return [
+            "--bench",
+            self.workload,
+            "--config",
+            config_path,
+            "--execute=true",
+            "--sample 1",
+            "--interval-monitor 1000",
+            # "--json-histograms /benchbase/results/histograms.json",
+        ]
+
+    def execute_benchmark(self, threshold=None, overrides=None):
+        """
+        Run BenchBase. Given a threshold on the throughput (requests/second),
+        its output is monitored and runs that are clearly slower are aborted,
+        returning their censored partial result. Otherwise returns None.
+
+        overrides change the duration ("time" and "warmup" in seconds),
+        "terminals" and "rate" of the workload config for this run only.
+        """
+        self._remove_existing_container(self.benchbase_container_name)
+        self._clear_benchbase_results()
+        monitor = self._throughput_monitor(threshold)
+        config_path = self._benchbase_config(overrides)
+        metrics_before = self._snapshot_internal_metrics()
+
         try:
             container = self.docker_client.containers.run(
                 self.benchbase_image,
                 name=self.benchbase_container_name,
                 network_mode="host",
-                volumes=volumes_mapping,
-                command=[
-                    "--bench",
-                    self.workload,
-                    "--config",
-                    f"/benchbase/config/sample_{self.workload}_config.xml",
-                    "--execute=true",
-                    "--sample 1",
-                    "--interval-monitor 1000",
-                    # "--json-histograms /benchbase/results/histograms.json",
-                ],
+                volumes=self._benchbase_volumes(),
+                command=self._benchbase_command(config_path),
                 stdout=True,
                 stderr=True,
                 remove=True,
                 detach=True,
             )
 
-            if self.debug_mode:
-                for line in container.logs(stream=True, follow=True):
-                    logger.info(line.strip().decode("utf-8"))
-            else:
-                container.wait()
+            resource_monitor = self._start_resource_monitor(container)
+            try:
+                if monitor is not None:
+                    for line in container.logs(stream=True, follow=True):
+                        line = line.strip().decode("utf-8")
+                        if self.debug_mode:
+                            logger.info(line)
+                        if monitor.feed(line):
+                            # The container was started with remove=True
+                            container.kill()
+                            return self._abort_result(monitor)
+                elif self.debug_mode:
+                    for line in container.logs(stream=True, follow=True):
+                        logger.info(line.strip().decode("utf-8"))
+                else:
+                    container.wait()
+            finally:
+                self._stop_resource_monitor(resource_monitor)
+                self._finish_internal_metrics(metrics_before)
 
         except docker.errors.DockerException as e:
             logger.error(f"Error running BenchBase container: {e}")
             raise RuntimeError("Failed to run BenchBase.")
 
+        return None
+
+    def _start_resource_monitor(self, benchbase_container):
+        self.last_resources = None
+        if not self.resource_monitor:
+            return None
+
+        monitor = ResourceMonitor(self.monitor_interval)
+        if self.mysql_container is not None:
+            monitor.watch("mysql", self.mysql_container)
+        monitor.watch("benchbase", benchbase_container)
+        return monitor
+
+    def _stop_resource_monitor(self, monitor):
+        if monitor is not None:
+            self.last_resources = monitor.stop(self.telemetry_dir, prefix=self.workload)
+
+    def _snapshot_internal_metrics(self):
+        self.last_internal_metrics = None
+        if not self.collect_internal_metrics:
+            return None
+
+        try:
+            return self.internal_metrics.snapshot(self.connection)
+        except pymysql.err.MySQLError as e:
+            logger.warning(f"Failed to read MySQL internal metrics: {e}")
+            return None
+
+    def _finish_internal_metrics(self, metrics_before):
+        if metrics_before is None:
+            return
+
+        try:
+            metrics_after = self.internal_metrics.snapshot(self.connection)
+        except pymysql.err.MySQLError as e:
+            logger.warning(f"Failed to read MySQL internal metrics: {e}")
+            return
+        self.last_internal_metrics = self.internal_metrics.delta(
+            metrics_before, metrics_after
+        )
+
+    def _throughput_monitor(self, threshold):
+        if threshold is None:
+            return None
+        return ThroughputMonitor(
+            threshold,
+            window=self.early_stop_window,
+            grace=self.early_stop_grace,
+            margin=self.early_stop_margin,
+        )
+
+    def _abort_result(self, monitor):
+        result = monitor.censored_result()
+        logger.info(
+            f"Aborted BenchBase after {len(monitor.throughputs)} seconds: "
+            f"throughput {result['throughput']:.1f} is clearly below "
+            f"{monitor.threshold:.1f}."
+        )
+        return result
+
+    def _racing_threshold(self, baseline=None, threshold=None):
+        if threshold is None and baseline:
+            threshold = baseline.get("throughput")
+        return threshold
+
+    async def aexecute_benchmark(self, threshold=None, overrides=None):
+        """
+        asyncio counterpart of execute_benchmark(). The container is polled
+        instead of waited on, so no thread is held while it runs.
+        """
+        await async_docker.call(
+            self._remove_existing_container, self.benchbase_container_name
+        )
+        self._clear_benchbase_results()
+        monitor = self._throughput_monitor(threshold)
+        config_path = self._benchbase_config(overrides)
+        metrics_before = await async_docker.call(self._snapshot_internal_metrics)
+        aborted = False
+
+        try:
+            # Kept after exit so that its status and output can still be read
+            container = await async_docker.call(
+                self.docker_client.containers.run,
+                self.benchbase_image,
+                name=self.benchbase_container_name,
+                network_mode="host",
+                volumes=self._benchbase_volumes(),
+                command=self._benchbase_command(config_path),
+                detach=True,
+            )
+        except docker.errors.DockerException as e:
+            logger.error(f"Error running BenchBase container: {e}")
+            raise RuntimeError("Failed to run BenchBase.")
+
+        def on_line(line):
+            nonlocal aborted
+            if self.debug_mode:
+                logger.info(line)
+            if monitor is not None and not aborted and monitor.feed(line):
+                aborted = True
+                container.kill()
+
+        resource_monitor = self._start_resource_monitor(container)
+        try:
+            await async_docker.wait_container(
+                container,
+                on_line=on_line if monitor or self.debug_mode else None,
+            )
+        except docker.errors.DockerException as e:
+            logger.error(f"Error waiting for BenchBase container: {e}")
+            raise RuntimeError("Failed to run BenchBase.")
+        finally:
+            await async_docker.call(self._stop_resource_monitor, resource_monitor)
+            await async_docker.call(self._finish_internal_metrics, metrics_before)
+            await async_docker.remove_container(container)
+
+        return self._abort_result(monitor) if aborted else None
+
     def get_config_space(self) -> dict:
         return self.config_space.get_all_details()
 
@@ -371,45 +897,174 @@ class MySQLBenchmark:
         self.config_space.generate_config_file(self.mysql_config_file)
 
         try:
-            self.start_mysql_and_wait()
-            self.execute_benchmark()
-            return self.parse_results()
+            self.apply_config()
+            return self._collect_results(self.execute_benchmark())
         except Exception as e:
             logger.error(f"Error running MySQL benchmark: {e}")
             raise
 
-    def run(self, knobs: dict) -> dict:
+    def run(
+        self, knobs: dict, baseline=None, threshold=None, overrides=None
+    ) -> dict:
+        """
+        Evaluate the knobs. Given the result of an incumbent configuration as
+        baseline, or directly a threshold on the throughput, BenchBase runs
+        that are clearly slower are aborted early and their partial result is
+        flagged as censored.
+
+        overrides change the BenchBase workload settings for this evaluation,
+        e.g. {"time": 10} for a short screening run, see execute_benchmark().
+        """
         self.config_space.set_current_config(knobs)
         self.config_space.generate_config_file(self.mysql_config_file)
+        threshold = self._racing_threshold(baseline, threshold)
 
         try:
-            self.start_mysql_and_wait()
-            self.execute_benchmark()
-            return self.parse_results()
+            self.apply_config()
+            return self._collect_results(
+                self.execute_benchmark(threshold, overrides), overrides
+            )
         except Exception as e:
             logger.error(f"Error running MySQL benchmark: {e}")
             raise
-    
-    def parse_results(self) -> dict:
-        summary_file = None
-        for item in self.benchbase_results_dir.iterdir():
-            if item.is_file() and item.name.endswith(".summary.json"):
-                summary_file = item
 
-        if summary_file is None:
-            logger.error(f"No results found in {self.benchbase_results_dir}")
-            raise RuntimeError("No results found in the results directory.")
+    def evaluate(self, config, baseline=None, threshold=None, overrides=None) -> dict:
+        """
+        Evaluate a Configuration of the config space, or a dict of knobs
+        applied on top of the defaults, as run() does but without changing
+        the config space. Evaluations share the MySQL container, so
+        concurrent calls are run one after another; run_batch() uses a pool
+        to evaluate concurrently.
+        """
+        config = self.config_space.make_config(config)
+        threshold = self._racing_threshold(baseline, threshold)
 
-        result = {}
-        with open(summary_file) as f:
-            summary = json.load(f)
-            result["latency"] = summary["Latency Distribution"][
-                "95th Percentile Latency (microseconds)"
-            ]
-            result["throughput"] = summary["Throughput (requests/second)"]
+        with self._evaluate_lock:
+            self.config_space.generate_config_file(self.mysql_config_file, config)
+            try:
+                self.apply_config(config)
+                return self._collect_results(
+                    self.execute_benchmark(threshold, overrides), overrides
+                )
+            except Exception as e:
+                logger.error(f"Error running MySQL benchmark: {e}")
+                raise
+
+    def run_batch(
+        self,
+        knob_dicts,
+        num_instances=None,
+        baseline=None,
+        threshold=None,
+        overrides=None,
+    ) -> list:
+        """
+        Evaluate several knob configurations concurrently on a pool of
+        isolated MySQL and BenchBase instances (pool_size by default).
+
+        Each configuration is applied on top of the defaults. Instances start
+        from the workload's data directory snapshot, which is captured from
+        the loaded data directory first if missing. Results are returned in
+        submission order; a configuration that fails to evaluate yields None.
+        baseline, threshold and overrides behave as in run().
+        """
+        instances = self._get_pool(num_instances or self.pool_size)
+        threshold = self._racing_threshold(baseline, threshold)
+        slots = queue.Queue()
+        for instance in instances:
+            slots.put(instance)
+
+        def evaluate(knobs):
+            instance = slots.get()
+            try:
+                return instance.evaluate(knobs, threshold=threshold, overrides=overrides)
+            except Exception as e:
+                logger.error(
+                    f"Error running benchmark in {instance.mysql_container_name}: {e}"
+                )
+                return None
+            finally:
+                slots.put(instance)
+
+        with ThreadPoolExecutor(max_workers=len(instances)) as executor:
+            return list(executor.map(evaluate, knob_dicts))
+
+    def _get_pool(self, num_instances) -> list:
+        if not self.snapshots.exists(self.workload):
+            logger.info(f"Capturing snapshot of {self.workload} data for the pool...")
+            self.create_snapshot()
+
+        while len(self._pool) < num_instances:
+            instance = MySQLBenchmark(self.workload, len(self._pool))
+            # So that the internal metric vectors of all instances line up
+            instance.internal_metrics = self.internal_metrics
+            self._pool.append(instance)
+        return self._pool[:num_instances]
 
+    def stop_pool(self):
+        for instance in self._pool:
+            instance.gracefully_stop_container()
+        self._pool.clear()
+
+    async def arun(
+        self, knobs: dict, baseline=None, threshold=None, overrides=None
+    ) -> dict:
+        """
+        asyncio counterpart of run(). Evaluations of one benchmark share its
+        MySQL container, so concurrent calls are run one after another.
+        """
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+
+        async with self._async_lock:
+            self.config_space.set_current_config(knobs)
+            self.config_space.generate_config_file(self.mysql_config_file)
+
+            try:
+                config = dict(self.config_space.get_current_config())
+                if await async_docker.call(self._begin_apply_config, config):
+                    await self._await_mysql_ready()
+                    self._applied_config = config
+                censored = await self.aexecute_benchmark(
+                    self._racing_threshold(baseline, threshold), overrides
+                )
+                return self._collect_results(censored, overrides)
+            except Exception as e:
+                logger.error(f"Error running MySQL benchmark: {e}")
+                raise
+
+    def _collect_results(self, censored=None, overrides=None) -> dict:
+        result = censored or self.parse_results()
+        if overrides:
+            result["overrides"] = dict(overrides)
+        if self.last_restore_time is not None:
+            result["restore_time"] = self.last_restore_time
+        if self.startup_timings is not None:
+            result["startup_timings"] = self.startup_timings
+        if self.adjusted_knobs:
+            result["adjusted_knobs"] = self.adjusted_knobs
+        if self.last_resources is not None:
+            result["resources"] = self.last_resources
+        if self.last_internal_metrics is not None:
+            # Ordered as internal_metrics.names
+            result["internal_metrics"] = self.internal_metrics.vector(
+                self.last_internal_metrics
+            ).tolist()
         return result
 
+    def parse_results(self) -> dict:
+        """
+        Return the metrics of the last BenchBase run, see
+        BenchBaseResults.metrics(). The loaded results, including the raw
+        latencies and throughput series, are kept as last_results.
+        """
+        self.last_results = BenchBaseResults(
+            self.benchbase_results_dir, trim=self.steady_state_trim
+        )
+        return self.last_results.metrics()
+
     def __del__(self):
+        if hasattr(self, "connection"):
+            self.connection.close()
         if hasattr(self, "docker_client"):
             self.docker_client.close()
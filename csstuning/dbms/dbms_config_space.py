@@ -1,12 +1,71 @@
 import json
+import math
 from pathlib import Path
 
+import numpy as np
+
 from csstuning.config import config_loader
-from csstuning.config_space import ConfigSpace
+from csstuning.config_space import ConfigSpace, Configuration
+from csstuning.logger import logger
 
 
 class MySQLConfigSpace(ConfigSpace):
-    def __init__(self):
+    MAX_LOG_SIZE_BYTES = 512 * 1024**3  # 512GB in bytes
+    # Redo log bytes needed per concurrent InnoDB thread
+    LOG_BYTES_PER_THREAD = 200 * 1024
+
+    # Integer knobs whose max is this many times their min get a log transform
+    LOG_SCALE_RATIO = 1000
+    # Granularity MySQL rounds these knobs to anyway
+    QUANTA = {
+        "innodb_buffer_pool_size": 128 * 1024**2,
+        "innodb_log_file_size": 1024**2,
+        "read_buffer_size": 4096,
+        "key_cache_block_size": 512,
+    }
+
+    # Knob bounds derived from the memory and CPUs of the MySQL container, see
+    # apply_resource_limits(). Memory bounds are fractions of the memory.
+    BUFFER_POOL_FRACTIONS = (0.6, 0.9)
+    GLOBAL_BUFFER_FRACTION = 0.25
+    GLOBAL_BUFFERS = (
+        "innodb_ft_total_cache_size",
+        "innodb_log_buffer_size",
+        "key_buffer_size",
+        "query_cache_size",
+    )
+    # Allocated by each connection or temporary table
+    SESSION_BUFFER_FRACTION = 0.05
+    SESSION_BUFFERS = (
+        "binlog_cache_size",
+        "binlog_stmt_cache_size",
+        "bulk_insert_buffer_size",
+        "join_buffer_size",
+        "max_heap_table_size",
+        "preload_buffer_size",
+        "read_buffer_size",
+        "read_rnd_buffer_size",
+        "sort_buffer_size",
+        "tmp_table_size",
+    )
+    THREADS_PER_VCPU = 4
+    # The buffer pool, global buffers and session buffers of the connections
+    # must fit in the memory together. Connections beyond the threads the
+    # CPUs run are assumed not to hold their session buffers at the same time.
+    MEMORY_KNOBS = (
+        ("innodb_buffer_pool_size", "max_connections")
+        + GLOBAL_BUFFERS
+        + SESSION_BUFFERS
+    )
+    THREAD_KNOBS = (
+        "innodb_commit_concurrency",
+        "innodb_purge_threads",
+        "innodb_read_io_threads",
+        "innodb_thread_concurrency",
+        "innodb_write_io_threads",
+    )
+
+    def __init__(self, seed=None):
         config_data = None
 
         env_conf = config_loader.get_config()
@@ -19,58 +78,261 @@ class MySQLConfigSpace(ConfigSpace):
         except Exception as e:
             raise FileNotFoundError(f"Unable to load the configuration file: {e}")
 
-        super().__init__(config_data)
+        for name, data in config_data.items():
+            if data["type"] != "integer":
+                continue
+            if (data["max"] + 1) / (data["min"] + 1) >= self.LOG_SCALE_RATIO:
+                data.setdefault("transform", "log")
+            if name in self.QUANTA:
+                data.setdefault("quantum", self.QUANTA[name])
+
+        super().__init__(config_data, seed)
+        # Bounds of the knobs before apply_resource_limits()
+        self._unlimited_ranges = {}
+        # Bytes and concurrent sessions of the memory budget, see MEMORY_KNOBS
+        self._memory_budget = None
+        self._memory_sessions = None
+
+    def apply_resource_limits(self, mem, vcpus):
+        """
+        Narrow the ranges of memory and thread knobs to a MySQL container
+        with mem GB of memory and vcpus CPUs, so that sampled configurations
+        don't get it killed for running out of memory. Defaults are clamped
+        to the new ranges, and so are knob values set later, with a warning.
+
+        The buffers of a configuration must also fit in the memory together,
+        see MEMORY_KNOBS. Where they don't, the global and session buffers
+        are scaled down.
+        """
+        mem_bytes = int(mem * 1024**3)
+        threads = self.THREADS_PER_VCPU * math.ceil(vcpus)
+
+        limits = {
+            "innodb_buffer_pool_size": tuple(
+                int(fraction * mem_bytes) for fraction in self.BUFFER_POOL_FRACTIONS
+            )
+        }
+        for names, upper in (
+            (self.GLOBAL_BUFFERS, int(self.GLOBAL_BUFFER_FRACTION * mem_bytes)),
+            (self.SESSION_BUFFERS, int(self.SESSION_BUFFER_FRACTION * mem_bytes)),
+            (self.THREAD_KNOBS, threads),
+        ):
+            for name in names:
+                low, high = self._unlimited_ranges.get(
+                    name, self.config_items[name].get_range()
+                )
+                limits[name] = (low, max(low, min(high, upper)))
+
+        for name, (low, high) in limits.items():
+            item = self.config_items[name]
+            self._unlimited_ranges.setdefault(name, item.get_range())
+            item.min_value, item.max_value = low, high
+            item.default = min(max(item.default, low), high)
+            item.current_value = min(max(int(item.current_value), low), high)
+
+        self._memory_budget = mem_bytes
+        self._memory_sessions = threads
+        for attribute in ("default", "current_value"):
+            values = {
+                name: getattr(self.config_items[name], attribute)
+                for name in self.MEMORY_KNOBS
+            }
+            for name, value in self._fit_memory_budget(values).items():
+                setattr(self.config_items[name], attribute, int(value))
+
+    def _clamp_values(self, values, base=None):
+        """
+        Clamp the knobs of values narrowed by apply_resource_limits(), and
+        scale the buffers down to the memory budget. Knobs missing from
+        values are taken from base, the defaults by default.
+        """
+        clamped = {}
+        for name in self._unlimited_ranges:
+            if name not in values:
+                continue
+            item = self.config_items[name]
+            value = min(max(int(values[name]), item.min_value), item.max_value)
+            if value != int(values[name]):
+                logger.warning(
+                    f"Clamped {name} from {values[name]} to {value} to fit the "
+                    "resources of the MySQL container."
+                )
+                clamped[name] = value
+
+        if self._memory_budget is not None:
+            if base is None:
+                base = {name: item.default for name, item in self.config_items.items()}
+            budget_values = {
+                name: clamped.get(name, values.get(name, base[name]))
+                for name in self.MEMORY_KNOBS
+            }
+            fitted = {
+                name: int(value)
+                for name, value in self._fit_memory_budget(budget_values).items()
+                if value != int(budget_values[name])
+            }
+            if fitted:
+                logger.warning(
+                    f"Scaled {list(fitted)} down so that the buffers fit in the "
+                    "memory of the MySQL container."
+                )
+                clamped.update(fitted)
+
+        if not clamped:
+            return values
+        if isinstance(values, Configuration):
+            return values.replace(clamped)
+        return {**values, **clamped}
+
+    def make_config(self, values=None) -> Configuration:
+        return super().make_config(self._clamp_values(values or {}))
 
     def set_current_config(self, config):
         if config is None:
             return
 
+        config = self._clamp_values(config, base=self.get_current_config())
         for name, value in config.items():
             self.set_option_value(name, value)
 
         if self._validate_constraint() is False:
-            log_file_size = self.config_items["innodb_log_file_size"].current_value
-            log_files_in_group = self.config_items["innodb_log_files_in_group"].current_value
-            thread_concurrency = self.config_items["innodb_thread_concurrency"].current_value
-
-            raise ValueError(
-                f"Invalid configuration detected:\n"
-                f" - Current 'innodb_log_file_size': {log_file_size} (Bytes)\n"
-                f" - Current 'innodb_log_files_in_group': {log_files_in_group}\n"
-                f" - Current 'innodb_thread_concurrency': {thread_concurrency}\n\n"
-                "Constraints violated:\n"
-                "1. 'innodb_log_file_size' * 'innodb_log_files_in_group' should be <= 512GB.\n"
-                "2. 'innodb_thread_concurrency' * 200 * 1024 should be <= 'innodb_log_file_size' * 'innodb_log_files_in_group'.\n\n"
-                "Please adjust your configuration to meet these constraints."
+            self._raise_constraint_error(self.get_current_config())
+
+    def _validate_config(self, config):
+        if not self._constraint_mask(config):
+            self._raise_constraint_error(config)
+
+    def _raise_constraint_error(self, config):
+        log_file_size = config["innodb_log_file_size"]
+        log_files_in_group = config["innodb_log_files_in_group"]
+        thread_concurrency = config["innodb_thread_concurrency"]
+
+        memory = ""
+        if self._memory_budget is not None:
+            memory = (
+                f"3. The buffers may take {int(self._memory_usage(config))} bytes, "
+                f"which should be <= the {self._memory_budget} bytes of memory.\n"
             )
-        
-    def set_random_config(self):
-        valid_config = False
-        while not valid_config:
-            # Set random values for each configuration item
-            for item in self.config_items.values():
-                item.set_random_value()
 
-            # Check if the random configuration is valid
-            valid_config = self._validate_constraint()
+        raise ValueError(
+            f"Invalid configuration detected:\n"
+            f" - Current 'innodb_log_file_size': {log_file_size} (Bytes)\n"
+            f" - Current 'innodb_log_files_in_group': {log_files_in_group}\n"
+            f" - Current 'innodb_thread_concurrency': {thread_concurrency}\n\n"
+            "Constraints violated:\n"
+            "1. 'innodb_log_file_size' * 'innodb_log_files_in_group' should be <= 512GB.\n"
+            "2. 'innodb_thread_concurrency' * 200 * 1024 should be <= 'innodb_log_file_size' * 'innodb_log_files_in_group'.\n"
+            f"{memory}\n"
+            "Please adjust your configuration to meet these constraints."
+        )
+
+    def _points_to_columns(self, points) -> dict:
+        """
+        Sample the knobs of the constraints directly within what the others
+        allow, so that every configuration is valid without redrawing it:
+        innodb_log_files_in_group given innodb_log_file_size, then
+        innodb_thread_concurrency given the total log size. Buffers that
+        exceed the memory budget are scaled down to it.
+        """
+        columns = super()._points_to_columns(points)
+        names = list(self.config_items)
+
+        files = self.config_items["innodb_log_files_in_group"]
+        log_file_size = columns["innodb_log_file_size"]
+        columns[files.name] = self._scale_integer(
+            points[:, names.index(files.name)],
+            files.min_value,
+            np.minimum(files.max_value, self.MAX_LOG_SIZE_BYTES // log_file_size),
+        )
+
+        threads = self.config_items["innodb_thread_concurrency"]
+        log_size = log_file_size * columns[files.name]
+        columns[threads.name] = self._scale_integer(
+            points[:, names.index(threads.name)],
+            threads.min_value,
+            np.minimum(threads.max_value, log_size // self.LOG_BYTES_PER_THREAD),
+        )
+
+        if self._memory_budget is not None:
+            columns.update(self._fit_memory_budget(columns))
+
+        if not self._constraint_mask(columns).all():
+            raise RuntimeError(
+                "The ranges of the log and buffer knobs don't allow any valid "
+                "configuration."
+            )
+        return columns
 
     def _validate_constraint(self):
-        # Constraint 1: innodb_log_file_size * innodb_log_files_in_group <= 512GB
-        # Constraint 2: innodb_thread_concurrency * 200 * 1024 <= innodb_log_file_size * innodb_log_files_in_group
-        log_file_size = self.config_items["innodb_log_file_size"].current_value
-        log_files_in_group = self.config_items["innodb_log_files_in_group"].current_value
-        thread_concurrency = self.config_items["innodb_thread_concurrency"].current_value
+        return bool(self._constraint_mask(self.get_current_config()))
 
-        MAX_LOG_SIZE_BYTES = 512 * 1024**3  # 512GB in bytes
+    def _constraint_mask(self, values):
+        """
+        Whether the knobs of values, a configuration or arrays of knob
+        values, satisfy the constraints:
+        1. innodb_log_file_size * innodb_log_files_in_group <= 512GB
+        2. innodb_thread_concurrency * 200 * 1024
+           <= innodb_log_file_size * innodb_log_files_in_group
+        3. After apply_resource_limits(), the buffers fit in the memory
+        """
+        log_size = np.asarray(values["innodb_log_file_size"]) * np.asarray(
+            values["innodb_log_files_in_group"]
+        )
+        valid = (log_size <= self.MAX_LOG_SIZE_BYTES) & (
+            np.asarray(values["innodb_thread_concurrency"]) * self.LOG_BYTES_PER_THREAD
+            <= log_size
+        )
+        if self._memory_budget is not None:
+            valid &= self._memory_usage(values) <= self._memory_budget
+        return valid
+
+    def _memory_usage(self, values):
+        """Bytes the buffers of values, or of arrays of them, may take at once."""
+
+        def total(names):
+            return sum(np.asarray(values[name], dtype=float) for name in names)
 
+        sessions = np.minimum(
+            np.asarray(values["max_connections"], dtype=float), self._memory_sessions
+        )
         return (
-            log_file_size * log_files_in_group <= MAX_LOG_SIZE_BYTES
-            and thread_concurrency * 200 * 1024 <= log_file_size * log_files_in_group
+            np.asarray(values["innodb_buffer_pool_size"], dtype=float)
+            + total(self.GLOBAL_BUFFERS)
+            + sessions * total(self.SESSION_BUFFERS)
         )
 
-    def generate_config_file(self, output_file_path):
+    def _fit_memory_budget(self, values) -> dict:
+        """
+        Where the global and session buffers of values, or of arrays of them,
+        don't fit in the memory left by the buffer pool, scale the part of
+        each above its minimum down by the same factor. Returns the arrays of
+        the buffers.
+        """
+        minimums = {
+            name: self.config_items[name].min_value
+            for name in self.GLOBAL_BUFFERS + self.SESSION_BUFFERS
+        }
+        at_minimums = self._memory_usage({**values, **minimums})
+        excess = self._memory_usage(values) - at_minimums
+        room = self._memory_budget - at_minimums
+        with np.errstate(divide="ignore", invalid="ignore"):
+            factor = np.where(excess > 0, room / excess, 1.0)
+        factor = np.clip(factor, 0.0, 1.0)
+
+        fitted = {}
+        for name, low in minimums.items():
+            value = np.asarray(values[name], dtype=np.int64)
+            quantum = self.config_items[name].quantum or 1
+            scaled = low + (value - low) * factor // quantum * quantum
+            fitted[name] = np.where(factor < 1, scaled, value).astype(np.int64)
+        return fitted
+
+    def generate_config_file(self, output_file_path, config=None):
+        """Write a configuration, or the current config by default, as a cnf."""
+        if config is None:
+            config = self.get_current_config()
         config_lines = ["[mysqld]"]
-        for key, value in self.get_current_config().items():
+        for key, value in config.items():
             config_line = f"{key} = {value}"
             config_lines.append(config_line)
 
@@ -0,0 +1,88 @@
+import re
+import threading
+
+import numpy as np
+
+from csstuning.logger import logger
+
+
+class MySQLInternalMetrics:
+    """
+    Internal metrics of a MySQL server from SHOW GLOBAL STATUS and
+    information_schema.innodb_metrics, the kind knob tuners like OtterTune
+    learn from.
+
+    Counters are reported as their change over a benchmark run and gauges as
+    their value at its end. The names of the metric vector are fixed by the
+    first run, so that every vector has the same layout.
+    """
+
+    # Status variables that are current values rather than cumulative counters
+    STATUS_GAUGES = re.compile(
+        r"^(Innodb_buffer_pool_bytes_"
+        r"|Innodb_buffer_pool_pages_(data|dirty|free|misc|total)$"
+        r"|Innodb_data_pending_"
+        r"|Innodb_os_log_pending_"
+        r"|Innodb_row_lock_current_waits$"
+        r"|Innodb_row_lock_time_(avg|max)$"
+        r"|Innodb_num_open_files$"
+        r"|Innodb_page_size$"
+        r"|Key_blocks_"
+        r"|Max_used_"
+        r"|Open_"
+        r"|Qcache_(free_|queries_in_cache$|total_blocks$)"
+        r"|Threads_)"
+    )
+
+    def __init__(self):
+        # Names of the vector elements, fixed by the first call to vector()
+        self.names = None
+        # Shared by the instances of a pool, which evaluate concurrently
+        self._lock = threading.Lock()
+
+    def snapshot(self, connection) -> dict:
+        """Read {name: (value, is_gauge)} of the numeric metrics of a server."""
+        metrics = {}
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW GLOBAL STATUS")
+            for name, value in cursor.fetchall():
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    # e.g. ON/OFF or the SSL cipher
+                    continue
+                gauge = self.STATUS_GAUGES.match(name) is not None
+                metrics[f"status.{name}"] = (value, gauge)
+
+            cursor.execute(
+                "SELECT NAME, COUNT, TYPE FROM information_schema.innodb_metrics "
+                "WHERE STATUS = 'enabled'"
+            )
+            for name, count, metric_type in cursor.fetchall():
+                metrics[f"innodb.{name}"] = (float(count), metric_type == "value")
+        return metrics
+
+    @staticmethod
+    def delta(before, after) -> dict:
+        """Change of the counters and end value of the gauges between snapshots."""
+        deltas = {}
+        for name, (value, gauge) in after.items():
+            if gauge:
+                deltas[name] = value
+            elif name in before:
+                deltas[name] = value - before[name][0]
+        return deltas
+
+    def vector(self, deltas) -> np.ndarray:
+        """
+        Return the deltas as an array ordered by names. Metrics missing from
+        the deltas are 0, new ones are left out.
+        """
+        with self._lock:
+            if self.names is None:
+                self.names = sorted(deltas)
+
+        missing = [name for name in self.names if name not in deltas]
+        if missing:
+            logger.debug(f"Internal metrics {missing} are missing, using 0.")
+        return np.array([deltas.get(name, 0.0) for name in self.names], dtype=float)
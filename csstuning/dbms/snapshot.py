@@ -0,0 +1,76 @@
+import shutil
+import subprocess
+import time
+from pathlib import Path
+
+from csstuning.logger import logger
+
+
+class DataDirSnapshots:
+    """
+    Pristine copies of the MySQL data directory, one per workload, that are
+    restored before each evaluation so that it starts from identical data.
+
+    Copies are made with reflinks where the filesystem supports them (e.g.
+    btrfs, XFS), which makes them nearly instant, and fall back to regular
+    copies elsewhere. Hard links are not an option, as InnoDB modifies its
+    files in place.
+    """
+
+    def __init__(self, snapshot_dir):
+        self.snapshot_dir = Path(snapshot_dir)
+
+    def path(self, workload) -> Path:
+        return self.snapshot_dir / workload
+
+    def exists(self, workload) -> bool:
+        return self.path(workload).is_dir()
+
+    def capture(self, data_dir, workload) -> float:
+        """Snapshot the data directory of a stopped server, return the time taken."""
+        start_time = time.time()
+        snapshot = self.path(workload)
+        tmp_snapshot = snapshot.with_name(f"{snapshot.name}.tmp")
+        if tmp_snapshot.exists():
+            shutil.rmtree(tmp_snapshot)
+
+        self._copy_dir(Path(data_dir), tmp_snapshot)
+        if snapshot.exists():
+            shutil.rmtree(snapshot)
+        tmp_snapshot.rename(snapshot)
+
+        elapsed = time.time() - start_time
+        logger.info(f"Captured snapshot of {workload} data in {elapsed:.2f} seconds.")
+        return elapsed
+
+    def restore(self, data_dir, workload) -> float:
+        """Restore the data directory of a stopped server, return the time taken."""
+        snapshot = self.path(workload)
+        if not snapshot.is_dir():
+            raise FileNotFoundError(f"No snapshot of {workload} in {self.snapshot_dir}.")
+
+        start_time = time.time()
+        data_dir = Path(data_dir)
+        if data_dir.exists():
+            shutil.rmtree(data_dir)
+        self._copy_dir(snapshot, data_dir)
+
+        elapsed = time.time() - start_time
+        logger.info(f"Restored snapshot of {workload} data in {elapsed:.2f} seconds.")
+        return elapsed
+
+    @staticmethod
+    def _copy_dir(src, dst):
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            subprocess.run(
+                ["cp", "-a", "--reflink=auto", str(src), str(dst)],
+                check=True,
+                capture_output=True,
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            # e.g. a cp without --reflink
+            logger.warning(f"Falling back to a regular copy of {src}: {e}")
+            if dst.exists():
+                shutil.rmtree(dst)
+            shutil.copytree(src, dst, symlinks=True)
@@ -42,24 +42,21 @@ estimated_sizes = {
 
 
 def get_benchmark_size(cursor, tables):
-    total_size = 0
-    for table in tables:
-        query = f"""
-            SELECT
-                ROUND(SUM(data_length + index_length) / 1024 / 1024, 2) AS 'size_in_mb' 
-            FROM 
-                tables 
-            WHERE 
-                table_schema = 'benchbase' AND
-                table_name = '{table}';
-        """
-        cursor.execute(query)
-        result = cursor.fetchone()
-        if result and result["size_in_mb"] is not None:
-            total_size += result["size_in_mb"]
-        else:
-            total_size += 0
-    return float(total_size)
+    placeholders = ", ".join(["%s"] * len(tables))
+    query = f"""
+        SELECT
+            ROUND(SUM(data_length + index_length) / 1024 / 1024, 2) AS 'size_in_mb'
+        FROM
+            information_schema.tables
+        WHERE
+            table_schema = 'benchbase' AND
+            table_name IN ({placeholders});
+    """
+    cursor.execute(query, tables)
+    result = cursor.fetchone()
+    if result and result["size_in_mb"] is not None:
+        return float(result["size_in_mb"])
+    return 0.0
 
 
 def main():
@@ -78,18 +75,9 @@ def main():
         bench.start_mysql_and_wait(custom_config=False, limit_resources=False)
         need_stop = True
 
-    connection = pymysql.connect(
-        host="127.0.0.1",
-        port=3307,
-        user="admin",
-        password="password",
-        db="information_schema",
-        charset="utf8mb4",
-        cursorclass=pymysql.cursors.DictCursor,
-    )
-
     try:
-        with connection.cursor() as cursor:
+        # Reuses the connection of the readiness check
+        with bench.connection.cursor(pymysql.cursors.DictCursor) as cursor:
             if benchmark == "all":
                 pbar_dict = {}
                 for bench_name in benchmarks.keys():
@@ -130,7 +118,7 @@ def main():
             else:
                 print(f"Benchmark '{benchmark}' not found.")
     finally:
-        connection.close()
+        bench.connection.close()
         if need_stop:
             bench.gracefully_stop_container()
 
@@ -0,0 +1,173 @@
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import docker.errors
+import numpy as np
+
+from csstuning.logger import logger
+
+
+class ResourceMonitor:
+    """
+    Samples the CPU, memory, block I/O and network usage of containers from
+    the docker stats API in background threads.
+
+    Docker produces stats about once per second, so intervals below that
+    have no effect. Block I/O and network counters are cumulative.
+    """
+
+    COUNTERS = (
+        "blkio_read_bytes",
+        "blkio_write_bytes",
+        "net_rx_bytes",
+        "net_tx_bytes",
+    )
+    METRICS = (
+        "time",
+        "cpu_percent",
+        "memory_bytes",
+    ) + COUNTERS
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.start_time = time.time()
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._samples = {}
+
+    def watch(self, name, container):
+        """Start sampling a running container under the given name."""
+        self._samples[name] = []
+        thread = threading.Thread(
+            target=self._sample, args=(name, container), daemon=True
+        )
+        thread.start()
+        self._threads.append(thread)
+
+    def _sample(self, name, container):
+        last_time = None
+        try:
+            # Yields until the container stops
+            for stats in container.stats(stream=True, decode=True):
+                if self._stop_event.is_set():
+                    break
+
+                now = time.time()
+                if last_time is not None and now - last_time < self.interval:
+                    continue
+                last_time = now
+
+                sample = self._parse_stats(stats)
+                if sample is not None:
+                    self._samples[name].append((now - self.start_time,) + sample)
+        except (docker.errors.DockerException, ValueError) as e:
+            logger.debug(f"Stopped monitoring {name}: {e}")
+
+    @staticmethod
+    def _parse_stats(stats):
+        cpu, precpu = stats.get("cpu_stats", {}), stats.get("precpu_stats", {})
+        try:
+            cpu_delta = (
+                cpu["cpu_usage"]["total_usage"] - precpu["cpu_usage"]["total_usage"]
+            )
+            system_delta = cpu["system_cpu_usage"] - precpu["system_cpu_usage"]
+        except KeyError:
+            # The first sample of a container, or it has stopped
+            return None
+        online_cpus = cpu.get("online_cpus") or len(
+            cpu["cpu_usage"].get("percpu_usage") or [1]
+        )
+        cpu_percent = (
+            cpu_delta / system_delta * online_cpus * 100 if system_delta > 0 else 0.0
+        )
+
+        # Page cache can be reclaimed, so don't count it (cgroup v1 and v2)
+        memory = stats.get("memory_stats", {})
+        memory_stats = memory.get("stats", {})
+        cache = memory_stats.get(
+            "total_inactive_file", memory_stats.get("inactive_file", 0)
+        )
+        memory_bytes = max(memory.get("usage", 0) - cache, 0)
+
+        blkio = {"read": 0, "write": 0}
+        blkio_stats = stats.get("blkio_stats", {})
+        for entry in blkio_stats.get("io_service_bytes_recursive") or []:
+            op = entry.get("op", "").lower()
+            if op in blkio:
+                blkio[op] += entry.get("value", 0)
+
+        # Containers on the host network have no network stats
+        networks = (stats.get("networks") or {}).values()
+        rx_bytes = sum(network.get("rx_bytes", 0) for network in networks)
+        tx_bytes = sum(network.get("tx_bytes", 0) for network in networks)
+
+        return (
+            cpu_percent,
+            memory_bytes,
+            blkio["read"],
+            blkio["write"],
+            rx_bytes,
+            tx_bytes,
+        )
+
+    def stop(self, telemetry_dir=None, prefix="telemetry") -> dict:
+        """
+        Stop sampling and return summary stats of each container. With
+        telemetry_dir, the time series are also saved there as an .npz file
+        whose path is returned under "telemetry_file".
+        """
+        self._stop_event.set()
+        for thread in self._threads:
+            # Each thread notices the event on its next stats sample
+            thread.join(timeout=5)
+
+        series = self.series()
+        summary = {name: self.summarize(values) for name, values in series.items()}
+
+        if telemetry_dir is not None and series:
+            telemetry_dir = Path(telemetry_dir)
+            telemetry_dir.mkdir(parents=True, exist_ok=True)
+            timestamp = time.strftime("%Y%m%d-%H%M%S")
+            telemetry_file = (
+                telemetry_dir / f"{prefix}_{timestamp}_{uuid.uuid4().hex[:8]}.npz"
+            )
+            np.savez_compressed(
+                telemetry_file,
+                **{
+                    f"{name}_{metric}": array
+                    for name, values in series.items()
+                    for metric, array in values.items()
+                },
+            )
+            summary["telemetry_file"] = str(telemetry_file)
+
+        return summary
+
+    def series(self) -> dict:
+        """Return {container name: {metric: array}} of the samples so far."""
+        series = {}
+        for name, samples in list(self._samples.items()):
+            array = np.array(samples, dtype=float).reshape(-1, len(self.METRICS))
+            series[name] = {
+                metric: array[:, i] for i, metric in enumerate(self.METRICS)
+            }
+        return series
+
+    @staticmethod
+    def summarize(values) -> dict:
+        if values["time"].size == 0:
+            return {}
+
+        summary = {
+            "samples": int(values["time"].size),
+            "cpu_percent_mean": float(values["cpu_percent"].mean()),
+            "cpu_percent_max": float(values["cpu_percent"].max()),
+            "memory_bytes_mean": float(values["memory_bytes"].mean()),
+            "memory_bytes_max": float(values["memory_bytes"].max()),
+        }
+        # Counters are cumulative, report what was transferred while sampled
+        for metric in ResourceMonitor.COUNTERS:
+            summary[metric] = float(values[metric][-1] - values[metric][0])
+        return summary
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from csstuning.logger import logger
+
+
+class ResultCache:
+    """
+    On-disk cache of evaluation results, stored in SQLite.
+
+    Entries older than max_age seconds are ignored and evicted. When the cache
+    grows beyond max_entries, the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_file, max_entries=None, max_age=None):
+        self.cache_file = Path(cache_file)
+        self.max_entries = max_entries
+        self.max_age = max_age
+
+        self.hits = 0
+        self.misses = 0
+
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # Benchmarks evaluate in worker threads, so share one guarded connection
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            str(self.cache_file), check_same_thread=False
+        )
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )
+                """
+            )
+
+        self.evict()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Hash the given JSON-serializable parts into a cache key."""
+        data = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT value, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self._is_expired(row[1], now):
+                self._connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._connection.execute(
+                "UPDATE results SET accessed = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def put(self, key, result):
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (key, json.dumps(result), now, now),
+            )
+
+        self.evict()
+
+    def evict(self):
+        with self._lock, self._connection:
+            if self.max_age:
+                self._connection.execute(
+                    "DELETE FROM results WHERE created < ?",
+                    (time.time() - self.max_age,),
+                )
+
+            if self.max_entries:
+                self._connection.execute(
+                    """
+                    DELETE FROM results WHERE key IN (
+                        SELECT key FROM results ORDER BY accessed DESC
+                        LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_entries,),
+                )
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM results")
+
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._connection.execute(
+                "SELECT COUNT(*) FROM results"
+            ).fetchone()[0]
+
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self):
+        try:
+            self._connection.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Error closing result cache: {e}")
+
+    def _is_expired(self, created, now):
+        return bool(self.max_age) and now - created > self.max_age
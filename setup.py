@@ -125,7 +125,8 @@ setup(
             "csstuning_dbms_check=csstuning.dbms.utils.check_create_process:main"
         ]
     },
-    install_requires=["docker", "pymysql", "cffi", "tqdm"],
+    install_requires=["docker", "pymysql", "cffi", "tqdm", "numpy"],
+    extras_require={"sobol": ["scipy"]},
     zip_safe=False,
     cmdclass={
         "install": CustomInstall,
@@ -0,0 +1,95 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import asyncio
+import unittest
+from datetime import datetime, timezone
+
+from csstuning import async_docker
+
+
+class FakeContainer:
+    """
+    Logs the given batches of (timestamp, text) lines, one batch per poll,
+    then exits. logs() filters on since like docker, to whole seconds.
+    """
+
+    def __init__(self, batches, exit_code=0):
+        self._batches = batches
+        self._written = []
+        self.exit_code = exit_code
+        self.status = "running"
+        self.attrs = {}
+        self.since = []
+
+    def reload(self):
+        if self._batches:
+            self._written += self._batches.pop(0)
+        if not self._batches:
+            self.status = "exited"
+            self.attrs = {"State": {"ExitCode": self.exit_code}}
+
+    def logs(self, stdout=True, stderr=True, timestamps=False, since=None):
+        self.since.append(since)
+        lines = [
+            f"{timestamp} {text}\n"
+            for timestamp, text in self._written
+            if since is None or async_docker._timestamp_seconds(timestamp) >= since
+        ]
+        return "".join(lines).encode()
+
+
+class TestAsyncDocker(unittest.TestCase):
+    def wait(self, container):
+        lines = []
+        exit_code = asyncio.run(
+            async_docker.wait_container(container, lines.append, poll_interval=0)
+        )
+        return exit_code, lines
+
+    def test_01_timestamp_seconds(self):
+        seconds = async_docker._timestamp_seconds("2024-05-01T12:00:03.123456789Z")
+        moment = datetime(2024, 5, 1, 12, 0, 3, tzinfo=timezone.utc)
+        self.assertEqual(seconds, int(moment.timestamp()))
+
+    def test_02_lines_across_polls(self):
+        batches = [
+            [("2024-05-01T12:00:01.100000000Z", "Compiling...")],
+            [],
+            # Same-second lines in one poll and across polls
+            [
+                ("2024-05-01T12:00:01.200000000Z", "Compiled."),
+                ("2024-05-01T12:00:02.000000001Z", "Running 1"),
+            ],
+            [("2024-05-01T12:00:02.000000002Z", "Running 2")],
+            [
+                ("2024-05-01T12:00:02.900000000Z", "Running 3"),
+                ("2024-05-01T12:00:04.000000000Z", "Done"),
+            ],
+        ]
+        texts = [text for batch in batches for _, text in batch]
+        container = FakeContainer(batches, exit_code=3)
+
+        exit_code, lines = self.wait(container)
+        self.assertEqual(exit_code, 3)
+        # No line is lost or repeated
+        self.assertEqual(lines, texts)
+        # Only the output since the second of the last line is fetched
+        self.assertIsNone(container.since[0])
+        self.assertEqual(
+            container.since[-1],
+            async_docker._timestamp_seconds("2024-05-01T12:00:02.000000002Z"),
+        )
+
+    def test_03_without_output(self):
+        container = FakeContainer([[("2024-05-01T12:00:01.000000000Z", "Done")]])
+        self.assertEqual(asyncio.run(async_docker.wait_container(container)), 0)
+        self.assertEqual(container.since, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from csstuning.compiler import baseline_store
+from csstuning.compiler.baseline_store import BaselineStore
+
+
+class TestBaselineStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.store_file = Path(self.tmp_dir.name) / "baselines" / "baselines.json"
+
+    def test_01_persist_across_instances(self):
+        store = BaselineStore(self.store_file)
+        self.assertIsNone(store.get("GCC", "sha256:abc", "O2", "cbench-bzip2"))
+        store.put("GCC", "sha256:abc", "O2", "cbench-bzip2", {"avrg_exec_time": 0.5})
+        store.put("GCC", "sha256:abc", "O3", "cbench-bzip2", {"avrg_exec_time": 0.4})
+
+        store = BaselineStore(self.store_file)
+        self.assertEqual(
+            store.get("GCC", "sha256:abc", "O2", "cbench-bzip2"),
+            {"avrg_exec_time": 0.5},
+        )
+        # Baselines are kept per image
+        self.assertIsNone(store.get("GCC", "sha256:def", "O2", "cbench-bzip2"))
+
+        baselines = store.get_all("GCC", "sha256:abc")
+        self.assertEqual(set(baselines), {"O2", "O3"})
+        # Changing the returned baselines leaves the store alone
+        baselines["O2"]["cbench-bzip2"]["avrg_exec_time"] = 1.0
+        self.assertEqual(
+            store.get("GCC", "sha256:abc", "O2", "cbench-bzip2"),
+            {"avrg_exec_time": 0.5},
+        )
+
+    def test_02_atomic_replace(self):
+        store = BaselineStore(self.store_file)
+        store.put("GCC", "sha256:abc", "O2", "cbench-bzip2", {"avrg_exec_time": 0.5})
+        saved = self.store_file.read_text()
+
+        # A write that fails half way leaves the previous file in place
+        def failing_dump(data, f, **kwargs):
+            f.write('{"GCC": ')
+            raise OSError("No space left on device")
+
+        with mock.patch.object(baseline_store.json, "dump", failing_dump):
+            with self.assertRaises(OSError):
+                store.put("GCC", "sha256:abc", "O3", "cbench-bzip2", {})
+        self.assertEqual(self.store_file.read_text(), saved)
+
+        # The complete file replaces the previous one in a single step
+        replaced = []
+        os_replace = os.replace
+
+        def replace(src, dst):
+            replaced.append((Path(src).name, json.loads(Path(src).read_text())))
+            os_replace(src, dst)
+
+        with mock.patch.object(baseline_store.os, "replace", replace):
+            store.put("GCC", "sha256:abc", "O1", "cbench-bzip2", {})
+        self.assertEqual(len(replaced), 1)
+        self.assertEqual(replaced[0][0], "baselines.json.tmp")
+        self.assertIn("O1", replaced[0][1]["GCC"]["sha256:abc"])
+        self.assertEqual(os.listdir(self.store_file.parent), ["baselines.json"])
+
+    def test_03_unreadable_store(self):
+        self.store_file.parent.mkdir(parents=True)
+        self.store_file.write_text('{"GCC": ')
+        store = BaselineStore(self.store_file)
+        self.assertEqual(store.get_all("GCC", "sha256:abc"), {})
+
+        # The next put starts the store over
+        store.put("GCC", "sha256:abc", "O2", "cbench-bzip2", {"avrg_exec_time": 0.5})
+        self.assertEqual(
+            BaselineStore(self.store_file).get_all("GCC", "sha256:abc"),
+            {"O2": {"cbench-bzip2": {"avrg_exec_time": 0.5}}},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from csstuning.dbms.benchbase_config import write_workload_config
+
+SAMPLE_CONFIG = Path(
+    package_dir, "cssbench", "dbms", "config", "benchbase", "sample_tpcc_config.xml"
+)
+
+PHASED_CONFIG = """<?xml version="1.0"?>
+<parameters>
+    <terminals>8</terminals>
+    <works>
+        <work>
+            <time>30</time>
+            <rate>100</rate>
+        </work>
+        <work>
+            <warmup>5</warmup>
+            <time>60</time>
+            <rate>200</rate>
+        </work>
+    </works>
+</parameters>
+"""
+
+
+class TestBenchBaseConfig(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.output_file = Path(self.tmp_dir.name) / "configs" / "tpcc_config.xml"
+
+    def test_01_overrides(self):
+        template = SAMPLE_CONFIG.read_text()
+        write_workload_config(
+            SAMPLE_CONFIG,
+            self.output_file,
+            {"time": 10, "warmup": 2, "terminals": 16, "rate": 5000},
+        )
+
+        root = ET.parse(self.output_file).getroot()
+        self.assertEqual(root.findtext("terminals"), "16")
+        work = root.find("./works/work")
+        self.assertEqual(work.findtext("time"), "10")
+        self.assertEqual(work.findtext("warmup"), "2")
+        self.assertEqual(work.findtext("rate"), "5000")
+
+        # Everything else is kept, and the template is left alone
+        sample = ET.parse(SAMPLE_CONFIG).getroot()
+        for path in ("url", "scalefactor", "./works/work/weights"):
+            self.assertEqual(root.findtext(path), sample.findtext(path))
+        self.assertEqual(len(root.findall("./transactiontypes/transactiontype")), 5)
+        self.assertEqual(SAMPLE_CONFIG.read_text(), template)
+
+    def test_02_every_phase(self):
+        template_file = Path(self.tmp_dir.name) / "phased_config.xml"
+        template_file.write_text(PHASED_CONFIG)
+        write_workload_config(
+            template_file, self.output_file, {"warmup": 3, "rate": "unlimited"}
+        )
+
+        root = ET.parse(self.output_file).getroot()
+        works = root.findall("./works/work")
+        # Missing settings are added
+        self.assertEqual([w.findtext("warmup") for w in works], ["3", "3"])
+        self.assertEqual([w.findtext("rate") for w in works], ["unlimited"] * 2)
+        self.assertEqual([w.findtext("time") for w in works], ["30", "60"])
+        self.assertEqual(root.findtext("terminals"), "8")
+
+        # Without overrides, the copy has the same settings
+        write_workload_config(template_file, self.output_file, {})
+        root = ET.parse(self.output_file).getroot()
+        self.assertEqual(
+            [w.findtext("rate") for w in root.findall("./works/work")],
+            ["100", "200"],
+        )
+
+    def test_03_invalid_overrides(self):
+        with self.assertRaises(ValueError):
+            write_workload_config(SAMPLE_CONFIG, self.output_file, {"scalefactor": 1})
+
+        template_file = Path(self.tmp_dir.name) / "no_works_config.xml"
+        template_file.write_text("<parameters><terminals>8</terminals></parameters>")
+        with self.assertRaises(ValueError):
+            write_workload_config(template_file, self.output_file, {"time": 10})
+        # terminals needs no phases
+        write_workload_config(template_file, self.output_file, {"terminals": 4})
+        root = ET.parse(self.output_file).getroot()
+        self.assertEqual(root.findtext("terminals"), "4")
+
+
+if __name__ == "__main__":
+    unittest.main()
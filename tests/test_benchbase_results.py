@@ -0,0 +1,79 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from csstuning.dbms.benchbase_results import BenchBaseResults, ThroughputMonitor
+
+
+class TestBenchBaseResults(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.results_dir = Path(self.tmp_dir.name)
+
+        summary = {
+            "Latency Distribution": {"95th Percentile Latency (microseconds)": 950},
+            "Throughput (requests/second)": 90.0,
+        }
+        with open(self.results_dir / "tpcc_1.summary.json", "w") as f:
+            json.dump(summary, f)
+
+        # 10 seconds of 100 transactions, the first second being slow
+        with open(self.results_dir / "tpcc_1.raw.csv", "w") as f:
+            f.write(
+                "Transaction Type Index,Transaction Name,Start Time (microseconds),"
+                "Latency (microseconds),Worker Id (start number),"
+                "Phase Id (index in config file)\n"
+            )
+            for i in range(1000):
+                txn_type, name = (1, "NewOrder") if i % 2 else (2, "Payment")
+                latency = 5000 if i < 100 else 100 + i % 100
+                f.write(f"{txn_type},{name},{1000 + i / 100:.6f},{latency},0,0\n")
+
+    def test_01_metrics(self):
+        metrics = BenchBaseResults(self.results_dir, trim=0.1).metrics()
+
+        self.assertEqual(metrics["latency"], 950)
+        self.assertEqual(metrics["throughput"], 90.0)
+        self.assertGreater(metrics["latency_p99"], metrics["latency_p50"])
+        # The slow first second is trimmed from the steady state
+        self.assertLess(metrics["steady_latency_p999"], 200)
+        self.assertAlmostEqual(metrics["steady_throughput"], 100.0)
+        self.assertAlmostEqual(metrics["throughput_cov"], 0.0)
+        self.assertEqual(metrics["transactions"]["NewOrder"]["count"], 500)
+
+        histograms = metrics["latency_histograms"]
+        self.assertEqual(
+            sum(histograms["NewOrder"]) + sum(histograms["Payment"]), 1000
+        )
+
+    def test_02_missing_results(self):
+        (self.results_dir / "tpcc_1.summary.json").unlink()
+        with self.assertRaises(RuntimeError):
+            BenchBaseResults(self.results_dir)
+
+    def test_03_throughput_monitor(self):
+        monitor = ThroughputMonitor(100.0, window=3, grace=2, margin=0.1)
+        lines = ["[INFO] Throughput: 10.0 txn/sec"] * 2 + ["Starting terminals"]
+        lines += [f"[INFO] Throughput: {tps} txn/sec" for tps in (120.0, 80.0, 80.0)]
+        self.assertFalse(any(monitor.feed(line) for line in lines))
+
+        # The window no longer includes a sample above the threshold
+        self.assertTrue(monitor.feed("[INFO] Throughput: 80.0 txn/sec"))
+        result = monitor.censored_result()
+        self.assertTrue(result["censored"])
+        self.assertAlmostEqual(result["throughput"], 90.0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
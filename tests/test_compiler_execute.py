@@ -0,0 +1,231 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import docker
+
+from csstuning.compiler.compiler_benchmark import GCCBenchmark
+
+
+class TestCompilerExecute(unittest.TestCase):
+    """Running the benchmark container, with docker faked."""
+
+    def setUp(self):
+        patch = mock.patch("docker.from_env")
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.benchmark = GCCBenchmark(workload="cbench-automotive-bitcount")
+        self.benchmark.results_dir = self.benchmark.cache_dir = Path(tmp_dir.name)
+        self.benchmark.resource_monitor = False
+        patch = mock.patch.object(self.benchmark, "_remove_existing_container")
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        self.container = mock.MagicMock()
+        self.container.logs.return_value = iter([b"Compiling...\n"])
+        self.benchmark.docker_client.containers.run.return_value = self.container
+
+    def test_01_exit_codes(self):
+        for debug_mode in (False, True):
+            self.benchmark.debug_mode = debug_mode
+
+            self.container.wait.return_value = {"StatusCode": 0}
+            self.benchmark.execute_benchmark("-O2")
+
+            for exit_code in (1, GCCBenchmark.RUNNER_USAGE_ERROR):
+                self.container.wait.return_value = {"StatusCode": exit_code}
+                with self.assertRaises(RuntimeError):
+                    self.benchmark.execute_benchmark("-O2")
+
+        # The container is removed once its exit code was read
+        self.assertEqual(self.container.remove.call_count, 6)
+
+    def fake_run(self, failing_flags):
+        """Containers write the results of their flags, or fail with them."""
+        runs = []
+
+        def run(image, name, volumes, command, cpuset_cpus, **kwargs):
+            flags = command[2][len("--flags="):]
+            runs.append((name, cpuset_cpus))
+            container = mock.MagicMock()
+            container.wait.return_value = {"StatusCode": 0}
+            if failing_flags in flags.split():
+                container.wait.return_value = {"StatusCode": 1}
+                return container
+
+            results_dir = next(
+                path
+                for path, bind in volumes.items()
+                if bind["bind"] == "/benchmark/results"
+            )
+            # Later configurations finish first
+            time.sleep(0.05 / len(runs))
+            results = {self.benchmark.workload: {"flags": flags, "container": name}}
+            (results_dir / self.benchmark._results_file_name()).write_text(
+                json.dumps(results)
+            )
+            return container
+
+        self.benchmark.docker_client.containers.run.side_effect = run
+        return runs
+
+    def test_02_run_batch(self):
+        runs = self.fake_run(failing_flags="-fdefer-pop")
+        flags_list = [
+            {"branch-count-reg": "ON"},
+            {"defer-pop": "ON"},
+            {},
+            {"compare-elim": "ON"},
+            {"cprop-registers": "ON"},
+        ]
+        results = self.benchmark.run_batch(
+            flags_list, num_workers=2, cpusets=["0-3", "4-7"]
+        )
+
+        # Results are in submission order, with None for the failed one
+        self.assertEqual(len(results), len(flags_list))
+        self.assertIsNone(results[1])
+        config_space = self.benchmark.config_space
+        for flags, result in zip(flags_list, results):
+            if result is not None:
+                expected = config_space.generate_flags_str(
+                    config=config_space.make_config(flags)
+                )
+                self.assertEqual(result["flags"], expected)
+
+        # Each worker runs its own container on its own CPU set
+        name = self.benchmark.container_name
+        self.assertEqual(set(runs), {(f"{name}_0", "0-3"), (f"{name}_1", "4-7")})
+
+    def test_03_cpusets(self):
+        parse_cpusets = GCCBenchmark._parse_cpusets
+        self.assertEqual(parse_cpusets("", 2), [])
+        self.assertEqual(parse_cpusets(" 0-3; 4,5 ", 2), ["0-3", "4,5"])
+        with mock.patch("os.cpu_count", return_value=10):
+            self.assertEqual(parse_cpusets("auto", 3), ["0-2", "3-5", "6-8"])
+            self.assertEqual(parse_cpusets("auto", 10)[-1], "9-9")
+            with self.assertRaises(ValueError):
+                parse_cpusets("auto", 11)
+
+        self.benchmark.pool_cpusets = "0-3"
+        with self.assertRaises(ValueError):
+            self.benchmark._create_worker_slots(2)
+        with self.assertRaises(ValueError):
+            self.benchmark.run_batch([{}, {}], num_workers=3, cpusets=["0", "1"])
+
+        slots = self.benchmark._create_worker_slots(2, cpusets=[])
+        self.assertEqual([slot["cpuset"] for slot in slots], [None, None])
+        self.assertEqual(
+            [slot["results_dir"].name for slot in slots], ["worker_0", "worker_1"]
+        )
+
+    def start_session(self):
+        run = self.benchmark.docker_client.containers.run
+        run.side_effect = lambda image, name, **kwargs: mock.MagicMock(id=name)
+        self.benchmark.start_session(num_workers=2, cpusets=["0-3", "4-7"])
+        self.addCleanup(self.benchmark.stop_session)
+        return [f"{self.benchmark.container_name}_{i}" for i in range(2)]
+
+    def test_04_start_session(self):
+        names = self.start_session()
+        run = self.benchmark.docker_client.containers.run
+        self.assertEqual([c.kwargs["name"] for c in run.call_args_list], names)
+        self.assertEqual(
+            [c.kwargs["cpuset_cpus"] for c in run.call_args_list], ["0-3", "4-7"]
+        )
+        for call in run.call_args_list:
+            self.assertEqual(call.kwargs["entrypoint"], ["sleep", "infinity"])
+        self.assertEqual(set(self.benchmark._sessions), set(names))
+        self.assertEqual(set(self.benchmark._session_locks), set(names))
+
+        # Running sessions are kept
+        self.benchmark.start_session(num_workers=2, cpusets=["0-3", "4-7"])
+        self.assertEqual(run.call_count, 2)
+
+        run.side_effect = docker.errors.APIError("Conflict")
+        with self.assertRaises(RuntimeError):
+            self.benchmark.start_session(num_workers=3, cpusets=["0", "1", "2"])
+
+    def test_05_exec_in_session(self):
+        names = self.start_session()
+        run = self.benchmark.docker_client.containers.run
+        api = self.benchmark.docker_client.api
+        lock = self.benchmark._session_locks[names[1]]
+        lock_free = []
+
+        def exec_start(exec_id, stream=True):
+            # Other evaluations wait for the exec to finish
+            thread = threading.Thread(
+                target=lambda: lock_free.append(lock.acquire(blocking=False))
+            )
+            thread.start()
+            thread.join()
+            return iter([b"Compiling...\n"])
+
+        api.exec_create.return_value = "exec"
+        api.exec_start.side_effect = exec_start
+        api.exec_inspect.return_value = {"ExitCode": 0}
+        self.benchmark.execute_benchmark("-O2", container_name=names[1])
+
+        self.assertEqual(run.call_count, 2)
+        container_id, command = api.exec_create.call_args.args
+        self.assertEqual(container_id, names[1])
+        self.assertEqual(
+            command[:4],
+            ["python3", "/benchmark/run.py", "GCC", self.benchmark.workload],
+        )
+        self.assertIn("--flags=-O2", command)
+        self.assertEqual(lock_free, [False])
+        self.assertTrue(lock.acquire(blocking=False))
+        lock.release()
+
+        # Exit codes are checked as for containers of their own
+        for exit_code, message in (
+            (1, "exited with code 1"),
+            (GCCBenchmark.RUNNER_USAGE_ERROR, "outdated"),
+        ):
+            api.exec_inspect.return_value = {"ExitCode": exit_code}
+            with self.assertRaisesRegex(RuntimeError, message):
+                self.benchmark.execute_benchmark("-O2", container_name=names[1])
+
+        api.exec_create.side_effect = docker.errors.APIError("Gone")
+        with self.assertRaises(RuntimeError):
+            self.benchmark.execute_benchmark("-O2", container_name=names[1])
+
+    def test_06_stop_session(self):
+        names = self.start_session()
+        containers = dict(self.benchmark._sessions)
+        containers[names[0]].kill.side_effect = docker.errors.NotFound("Gone")
+        containers[names[1]].kill.side_effect = docker.errors.APIError("Busy")
+        self.benchmark.stop_session()
+
+        for container in containers.values():
+            container.kill.assert_called_once()
+        self.assertEqual(self.benchmark._sessions, {})
+        self.assertEqual(self.benchmark._session_locks, {})
+
+        # Evaluations are back to containers of their own
+        run = self.benchmark.docker_client.containers.run
+        run.side_effect = None
+        self.container.wait.return_value = {"StatusCode": 0}
+        self.benchmark.execute_benchmark("-O2", container_name=names[0])
+        self.assertEqual(run.call_count, 3)
+        self.benchmark.docker_client.api.exec_create.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
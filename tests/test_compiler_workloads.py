@@ -0,0 +1,208 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from csstuning.compiler.baseline_store import BaselineStore
+from csstuning.compiler.compiler_benchmark import GCCBenchmark
+from csstuning.result_cache import ResultCache
+
+WORKLOADS = ["cbench-automotive-bitcount", "cbench-bzip2"]
+EXEC_TIMES = {"-O0": 4.0, "-O1": 2.0, "-O2": 1.0, "-O3": 1.0}
+
+
+class TestCompilerWorkloads(unittest.TestCase):
+    """Multi-workload runs and their baselines, with the container faked."""
+
+    def setUp(self):
+        patch = mock.patch("docker.from_env")
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = Path(tmp_dir.name)
+        self.benchmark = GCCBenchmark(workload=WORKLOADS[0])
+        self.benchmark._image_id = "sha256:abc"
+        self.benchmark.baseline_store = BaselineStore(self.tmp_dir / "baselines.json")
+        self.benchmark.result_cache = ResultCache(self.tmp_dir / "results.db")
+
+        # Each run measures the execution time of its flags on every workload
+        self.runs = []
+        self.censored = set()
+
+        def execute_benchmark(flags_str, workloads=None, jobs=1):
+            self.runs.append((flags_str, tuple(workloads), jobs))
+
+        def parse_results(workloads=None):
+            # Parallel jobs slow each other down
+            flags_str, _, jobs = self.runs[-1]
+            result = {
+                "avrg_exec_time": EXEC_TIMES.get(flags_str, 0.5) * jobs,
+                "censored": flags_str in self.censored,
+            }
+            return {w: dict(result) for w in workloads}
+
+        for name, side_effect in (
+            ("execute_benchmark", execute_benchmark),
+            ("parse_results", parse_results),
+        ):
+            patch = mock.patch.object(self.benchmark, name, side_effect=side_effect)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_01_geomean_speedup(self):
+        geomean_speedup = GCCBenchmark._geomean_speedup
+        baselines = {"a": {"avrg_exec_time": 4.0}, "b": {"avrg_exec_time": 1.0}}
+        results = {"a": {"avrg_exec_time": 1.0}, "b": {"avrg_exec_time": 1.0}}
+        self.assertAlmostEqual(geomean_speedup(results, baselines), 2.0)
+
+        # Failed, missing and zero entries are left out of the mean
+        results["c"] = None
+        results["d"] = {"avrg_exec_time": 1.0}
+        results["e"] = {"avrg_exec_time": 0.0}
+        baselines["e"] = {"avrg_exec_time": 1.0}
+        self.assertAlmostEqual(geomean_speedup(results, baselines), 2.0)
+
+        self.assertIsNone(geomean_speedup({"a": None}, baselines))
+        self.assertIsNone(geomean_speedup(results, {}))
+
+    def test_02_run_workloads(self):
+        output = self.benchmark.run_workloads({}, workloads=WORKLOADS)
+        self.assertEqual(list(output["results"]), WORKLOADS)
+        aggregate = output["aggregate"]
+        self.assertEqual(
+            set(aggregate),
+            {f"geomean_speedup_{level}" for level in GCCBenchmark.BASELINE_FLAGS},
+        )
+        self.assertAlmostEqual(aggregate["geomean_speedup_O0"], 8.0)
+        self.assertAlmostEqual(aggregate["geomean_speedup_O3"], 2.0)
+
+        # The flags and the baselines are measured once, then taken from storage
+        runs = len(self.runs)
+        self.assertEqual(runs, 1 + len(GCCBenchmark.BASELINE_FLAGS))
+        self.benchmark.run_workloads({}, workloads=WORKLOADS)
+        self.assertEqual(len(self.runs), runs)
+
+        with self.assertRaises(ValueError):
+            self.benchmark.run_workloads({}, workloads=["cbench-unknown"])
+
+    def test_03_jobs_are_stored_apart(self):
+        sequential = self.benchmark.run_workloads({}, workloads=WORKLOADS)
+        runs = len(self.runs)
+
+        # Parallel runs are neither served from nor stored over sequential ones
+        parallel = self.benchmark.run_workloads({}, workloads=WORKLOADS, jobs=2)
+        self.assertEqual(len(self.runs), 2 * runs)
+        self.assertTrue(all(jobs == 2 for _, _, jobs in self.runs[runs:]))
+        self.assertEqual(parallel["results"][WORKLOADS[0]]["avrg_exec_time"], 1.0)
+        self.assertEqual(parallel["aggregate"], sequential["aggregate"])
+
+        stored = self.benchmark.get_baselines()
+        self.assertEqual(stored["O0"][WORKLOADS[0]]["avrg_exec_time"], 4.0)
+        self.assertEqual(stored["O0_jobs2"][WORKLOADS[0]]["avrg_exec_time"], 8.0)
+        self.benchmark.run_workloads({}, workloads=WORKLOADS)
+        self.assertEqual(len(self.runs), 2 * runs)
+
+    def test_04_censored_baselines_are_not_stored(self):
+        self.censored.add("-O2")
+        baselines = self.benchmark.measure_baselines(workloads=WORKLOADS)
+        self.assertTrue(baselines["O2"][WORKLOADS[0]]["censored"])
+
+        stored = self.benchmark.get_baselines()
+        self.assertNotIn("O2", stored)
+        self.assertEqual(set(stored), {"O0", "O1", "O3"})
+
+        # The next call measures the censored level again
+        runs = len(self.runs)
+        self.censored.clear()
+        self.benchmark.measure_baselines(workloads=WORKLOADS, levels=["O2"])
+        self.assertEqual(len(self.runs), runs + 1)
+        stored = self.benchmark.get_baselines()
+        self.assertEqual(stored["O2"][WORKLOADS[1]]["avrg_exec_time"], 1.0)
+
+    def test_05_cache_key(self):
+        benchmark = self.benchmark
+        key = benchmark._cache_key("-O2 -fgcse")
+        self.assertEqual(benchmark._cache_key("-fgcse -O2"), key)
+
+        keys = {
+            key,
+            benchmark._cache_key("-O2 -fgcse", racing=True),
+            benchmark._cache_key("-O2 -fgcse", jobs=2),
+            benchmark._cache_key("-O2 -fgcse", workload=WORKLOADS[1]),
+        }
+        # Each measurement mode of run.py has its own results
+        for name, value in (
+            ("binary_dedup", True),
+            ("object_cache", True),
+            ("adaptive_repeat", True),
+            ("adaptive_rel_ci", 0.05),
+            ("adaptive_time_budget", 30.0),
+        ):
+            with mock.patch.multiple(
+                benchmark, adaptive_repeat=name.startswith("adaptive_")
+            ), mock.patch.object(benchmark, name, value):
+                keys.add(benchmark._cache_key("-O2 -fgcse"))
+        self.assertEqual(len(keys), 9)
+
+        # Racing runs share their results whatever the threshold margin
+        racing_key = benchmark._cache_key("-O2 -fgcse", racing=True)
+        benchmark.racing_margin = 0.5
+        self.assertEqual(benchmark._cache_key("-O2 -fgcse", racing=True), racing_key)
+    def test_06_normalize_result(self):
+        normalize_result = self.benchmark.normalize_result
+        result = {
+            "avrg_exec_time": 0.5,
+            "compilation_time": 3.0,
+            "file_size": 100,
+            "censored": False,
+            "binary_hash": "abc",
+        }
+        baselines = {
+            "O0": {"avrg_exec_time": 2.0, "compilation_time": 1.5, "file_size": 0},
+            "O1": None,
+            "O2": {"compilation_time": 2.0},
+            "O3": {"avrg_exec_time": 0.0, "file_size": 50},
+        }
+        normalized = normalize_result(result, baselines)
+        self.assertAlmostEqual(normalized["speedup"]["O0"], 4.0)
+        # Metrics missing or zero in the baseline are left out, as are flags
+        # and other values that are not numbers
+        self.assertEqual(
+            normalized["normalized"],
+            {
+                "O0": {"avrg_exec_time": 0.25, "compilation_time": 2.0},
+                "O2": {"compilation_time": 1.5},
+                "O3": {"file_size": 2.0},
+            },
+        )
+        self.assertEqual(normalized["speedup"], {"O0": 4.0})
+        self.assertNotIn("speedup", result)
+
+        # Results that took no time have no speedup
+        normalized = normalize_result(dict(result, avrg_exec_time=0.0), baselines)
+        self.assertEqual(normalized["speedup"], {})
+        self.assertEqual(normalized["normalized"]["O0"]["avrg_exec_time"], 0.0)
+
+        # Failed evaluations stay as they are
+        self.assertIsNone(normalize_result(None, baselines))
+        self.assertEqual(normalize_result({}, baselines), {})
+
+        # Without baselines, the stored ones are measured first
+        normalized = normalize_result(result)
+        self.assertEqual(
+            normalized["speedup"], {"O0": 8.0, "O1": 4.0, "O2": 2.0, "O3": 2.0}
+        )
+        self.assertEqual(len(self.runs), len(GCCBenchmark.BASELINE_FLAGS))
+
+
+if __name__ == "__main__":
+    unittest.main()
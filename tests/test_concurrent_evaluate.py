@@ -0,0 +1,140 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import json
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+from csstuning.compiler.compiler_benchmark import GCCBenchmark
+from csstuning.dbms.dbms_benchmark import MySQLBenchmark
+
+
+class TestConcurrentEvaluate(unittest.TestCase):
+    """Two threads calling evaluate() on one benchmark, with docker faked."""
+
+    def setUp(self):
+        patch = mock.patch("docker.from_env")
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_01_compiler_evaluations_use_own_containers(self):
+        benchmark = GCCBenchmark(workload="cbench-automotive-bitcount")
+        benchmark.result_cache = None
+        both_running = threading.Barrier(2, timeout=5)
+        runs = []
+
+        def execute_benchmark(flags_str, container_name, results_dir, *args):
+            runs.append((container_name, results_dir))
+            # Both evaluations are in their container at the same time
+            both_running.wait()
+            return None
+
+        with mock.patch.object(
+            benchmark, "execute_benchmark", side_effect=execute_benchmark
+        ), mock.patch.object(
+            benchmark, "parse_results", side_effect=lambda d: {"results_dir": d}
+        ):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                results = list(executor.map(benchmark.evaluate, [{}, {}]))
+
+        container_names = {name for name, _ in runs}
+        results_dirs = {results_dir for _, results_dir in runs}
+        self.assertEqual(len(container_names), 2)
+        self.assertEqual(len(results_dirs), 2)
+        self.assertNotIn(benchmark.container_name, container_names)
+        # Each result is parsed from the directory of its own evaluation
+        self.assertEqual({r["results_dir"] for r in results}, results_dirs)
+        # Finished slots are reused
+        self.assertEqual(sorted(benchmark._free_async_slots), [0, 1])
+
+    def test_02_compiler_evaluations_take_turns_in_session(self):
+        benchmark = GCCBenchmark(workload="cbench-automotive-bitcount")
+        benchmark.result_cache = None
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        benchmark.results_dir = benchmark.cache_dir = Path(tmp_dir.name)
+        with mock.patch.object(benchmark, "_remove_existing_container"):
+            benchmark.start_session()
+        self.addCleanup(benchmark.stop_session)
+
+        commands = {}
+        api = benchmark.docker_client.api
+
+        def exec_create(container_id, command, **kwargs):
+            exec_id = len(commands)
+            commands[exec_id] = command
+            return exec_id
+
+        def exec_start(exec_id, stream=True):
+            # run.py writes the results of its flags into the shared directory
+            flags = next(a for a in commands[exec_id] if a.startswith("--flags="))
+            time.sleep(0.02)
+            results = {benchmark.workload: {"flags": flags[len("--flags="):]}}
+            results_file = benchmark.results_dir / benchmark._results_file_name()
+            results_file.write_text(json.dumps(results))
+            return iter([])
+
+        api.exec_create.side_effect = exec_create
+        api.exec_start.side_effect = exec_start
+        api.exec_inspect.return_value = {"ExitCode": 0}
+
+        parse_results = benchmark.parse_results
+
+        def slow_parse_results(*args, **kwargs):
+            # Leave the other calls time to clear the results in between
+            time.sleep(0.02)
+            return parse_results(*args, **kwargs)
+
+        configs = [{}, {"branch-count-reg": "ON"}] * 3
+        with mock.patch.object(
+            benchmark, "parse_results", side_effect=slow_parse_results
+        ), ThreadPoolExecutor(max_workers=len(configs)) as executor:
+            results = list(executor.map(benchmark.evaluate, configs))
+
+        # Each call parsed the results of its own flags
+        for config, result in zip(configs, results):
+            expected = benchmark.config_space.generate_flags_str(
+                config=benchmark.config_space.make_config(config)
+            )
+            self.assertEqual(result["flags"], expected)
+        self.assertEqual(len(commands), len(configs))
+
+    def test_03_mysql_evaluations_do_not_overlap(self):
+        benchmark = MySQLBenchmark(workload="tpcc")
+        running = []
+        overlapped = []
+
+        def apply_config(config):
+            running.append(config)
+            overlapped.append(len(running) > 1)
+            time.sleep(0.05)
+
+        def execute_benchmark(threshold, overrides):
+            running.pop()
+            return {"throughput": 1.0}
+
+        with mock.patch.object(
+            benchmark, "apply_config", side_effect=apply_config
+        ), mock.patch.object(
+            benchmark, "execute_benchmark", side_effect=execute_benchmark
+        ), mock.patch.object(
+            benchmark.config_space, "generate_config_file"
+        ):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                results = list(executor.map(benchmark.evaluate, [{}, {}]))
+
+        self.assertEqual(overlapped, [False, False])
+        self.assertEqual([r["throughput"] for r in results], [1.0, 1.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
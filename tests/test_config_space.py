@@ -0,0 +1,132 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import unittest
+
+import numpy as np
+
+from csstuning.config_space import ConfigSpace, Configuration
+
+CONFIG_DATA = {
+    "buffer_size": {"type": "integer", "min": 0, "max": 100, "default": 10},
+    "flush_method": {
+        "type": "enum",
+        "enum_values": ["fsync", "O_DIRECT", "O_DSYNC"],
+        "default": "fsync",
+    },
+    "flush_neighbors": {"type": "enum", "enum_values": ["0", "1"], "default": 1},
+}
+
+
+class TestConfigSpace(unittest.TestCase):
+    def setUp(self):
+        self.config_space = ConfigSpace(CONFIG_DATA)
+        self.configs = [
+            {"buffer_size": 0, "flush_method": "fsync", "flush_neighbors": "0"},
+            {"buffer_size": 50, "flush_method": "O_DSYNC", "flush_neighbors": "1"},
+            {"buffer_size": 100, "flush_method": "O_DIRECT", "flush_neighbors": "0"},
+        ]
+
+    def test_01_encode_ordinal(self):
+        array = self.config_space.encode_batch(self.configs)
+        np.testing.assert_allclose(
+            array, [[0.0, 0.0, 0.0], [0.5, 1.0, 1.0], [1.0, 0.5, 0.0]]
+        )
+        self.assertEqual(self.config_space.decode_batch(array), self.configs)
+
+    def test_02_encode_one_hot(self):
+        array = self.config_space.encode_batch(self.configs, one_hot=True)
+        self.assertEqual(array.shape, (3, 6))
+        self.assertEqual(
+            self.config_space.get_encoded_names(one_hot=True)[1:4],
+            ["flush_method=fsync", "flush_method=O_DIRECT", "flush_method=O_DSYNC"],
+        )
+        self.assertEqual(
+            self.config_space.decode_batch(array, one_hot=True), self.configs
+        )
+
+    def test_03_defaults_and_clipping(self):
+        array = self.config_space.encode_batch([{}])
+        self.assertAlmostEqual(array[0, 0], 0.1)
+        self.assertEqual(array[0, 2], 1.0)
+
+        config = self.config_space.decode_batch([[1.7, -0.2, 0.49]])[0]
+        self.assertEqual(
+            config,
+            {"buffer_size": 100, "flush_method": "fsync", "flush_neighbors": "0"},
+        )
+
+    def test_04_invalid_values(self):
+        with self.assertRaises(ValueError):
+            self.config_space.encode_batch([{"buffer_size": 101}])
+        with self.assertRaises(ValueError):
+            self.config_space.encode_batch([{"flush_method": "nosync"}])
+
+    def test_05_sample_batch(self):
+        configs = ConfigSpace(CONFIG_DATA, seed=0).sample_batch(20)
+        self.assertEqual(configs, ConfigSpace(CONFIG_DATA, seed=0).sample_batch(20))
+        for config in configs:
+            self.assertTrue(0 <= config["buffer_size"] <= 100)
+            self.assertIn(config["flush_neighbors"], ["0", "1"])
+
+    def test_06_latin_hypercube(self):
+        configs = self.config_space.sample_batch(101, method="lhs")
+        # Each of the 101 strata of buffer_size holds exactly one value
+        self.assertEqual(
+            sorted(config["buffer_size"] for config in configs), list(range(101))
+        )
+        with self.assertRaises(ValueError):
+            self.config_space.sample_batch(2, method="grid")
+
+    def test_07_configuration(self):
+        config = self.config_space.make_config({"buffer_size": 50})
+        self.assertIsInstance(config, Configuration)
+        self.assertEqual(config["buffer_size"], 50)
+        self.assertEqual(config["flush_method"], "fsync")
+        self.assertEqual(config, self.config_space.make_config({"buffer_size": 50}))
+        self.assertEqual(len({config, self.config_space.make_config(config)}), 1)
+
+        changed = config.replace({"buffer_size": 60})
+        self.assertEqual((config["buffer_size"], changed["buffer_size"]), (50, 60))
+        with self.assertRaises(AttributeError):
+            config.buffer_size = 60
+        with self.assertRaises(ValueError):
+            self.config_space.make_config({"buffer_size": 101})
+
+    def test_08_transforms(self):
+        config_space = ConfigSpace(
+            {
+                "cache_size": {
+                    "type": "integer",
+                    "min": 1,
+                    "max": 10**6,
+                    "default": 1000,
+                    "transform": "log",
+                },
+                "block_size": {
+                    "type": "integer",
+                    "min": 1000,
+                    "max": 9000,
+                    "default": 4096,
+                    "quantum": 1024,
+                },
+            },
+            seed=0,
+        )
+        configs = config_space.sample_batch(600, method="lhs")
+
+        # Each decade of cache_size gets about the same share of the samples
+        decades = np.floor(np.log10([config["cache_size"] for config in configs]))
+        self.assertEqual(np.bincount(decades.astype(int)).tolist(), [100] * 6)
+        self.assertTrue(all(config["block_size"] % 1024 == 0 for config in configs))
+
+        array = config_space.encode_batch(configs)
+        self.assertEqual(config_space.decode_batch(array), configs)
+
+
+if __name__ == "__main__":
+    unittest.main()
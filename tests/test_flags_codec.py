@@ -0,0 +1,55 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import unittest
+
+from csstuning.compiler.compiler_config_space import GCCConfigSpace, LLVMConfigSpace
+from csstuning.compiler.flags_codec import (QUATERNION_INDEX, QUATERNIONS,
+                                            quaternion_to_integer)
+
+
+class TestFlagsCodec(unittest.TestCase):
+    def setUp(self):
+        self.gcc_space = GCCConfigSpace(seed=0)
+        self.llvm_space = LLVMConfigSpace(seed=0)
+
+    def test_01_quaternions(self):
+        self.assertEqual(len(QUATERNION_INDEX), len(QUATERNIONS))
+        self.assertEqual(quaternion_to_integer(QUATERNIONS[42]), 42)
+        self.assertEqual(
+            quaternion_to_integer("16:7:8:0"), quaternion_to_integer("16:7:8")
+        )
+        with self.assertRaises(ValueError):
+            quaternion_to_integer("3:1:1")
+
+    def test_02_gcc_round_trip(self):
+        for values in self.gcc_space.sample_batch(20):
+            config = self.gcc_space.make_config(values)
+            flags_str = self.gcc_space.generate_flags_str(config=config)
+            parsed = self.gcc_space.parse_flags_str(flags_str, strict=True)
+            self.assertEqual(parsed, config)
+
+    def test_03_gcc_partial_flags(self):
+        config = self.gcc_space.parse_flags_str(
+            "-O2 -fgcse -fno-tree-pre -fvect-cost-model=dynamic -falign-loops=16:7:8"
+        )
+        self.assertEqual(config["gcse"], "ON")
+        self.assertEqual(config["tree-pre"], "OFF")
+        self.assertEqual(config["vect-cost-model"], "dynamic")
+        self.assertEqual(self.gcc_space.quaternions[config["align-loops"]], "16:7:8")
+        with self.assertRaises(ValueError):
+            self.gcc_space.parse_flags_str("-O2", strict=True)
+
+    def test_04_llvm_round_trip(self):
+        for values in self.llvm_space.sample_batch(20):
+            config = self.llvm_space.make_config(values)
+            passes_str = self.llvm_space.generate_flags_str(config=config)
+            self.assertEqual(self.llvm_space.parse_flags_str(passes_str), config)
+
+
+if __name__ == "__main__":
+    unittest.main()
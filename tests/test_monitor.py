@@ -0,0 +1,124 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from csstuning.monitor import ResourceMonitor
+
+
+def make_stats(cpu_usage, system_usage, memory, read=0, write=0, rx=0, tx=0):
+    """Docker stats with the previous sample 100 CPU and 1000 system units ago."""
+    return {
+        "cpu_stats": {
+            "cpu_usage": {"total_usage": cpu_usage},
+            "system_cpu_usage": system_usage,
+            "online_cpus": 4,
+        },
+        "precpu_stats": {
+            "cpu_usage": {"total_usage": cpu_usage - 100},
+            "system_cpu_usage": system_usage - 1000,
+        },
+        "memory_stats": {"usage": memory, "stats": {"inactive_file": 100}},
+        "blkio_stats": {
+            "io_service_bytes_recursive": [
+                {"op": "Read", "value": read},
+                {"op": "Write", "value": write},
+                {"op": "Total", "value": read + write},
+            ]
+        },
+        "networks": {"eth0": {"rx_bytes": rx, "tx_bytes": tx}},
+    }
+
+
+class FakeContainer:
+    """Streams its stats, then empty ones like a container that keeps running."""
+
+    def __init__(self, stats):
+        self._stats = stats
+
+    def stats(self, stream=True, decode=True):
+        yield from self._stats
+        while True:
+            time.sleep(0.01)
+            yield {}
+
+
+class TestResourceMonitor(unittest.TestCase):
+    def test_01_parse_stats(self):
+        sample = ResourceMonitor._parse_stats(
+            make_stats(500, 5000, 1100, read=10, write=20, rx=30, tx=40)
+        )
+        # 100 of 1000 system units on 4 CPUs, without the page cache
+        self.assertEqual(sample, (40.0, 1000, 10, 20, 30, 40))
+
+        # The first sample of a container has no previous CPU usage
+        stats = make_stats(500, 5000, 1100)
+        stats["precpu_stats"] = {}
+        self.assertIsNone(ResourceMonitor._parse_stats(stats))
+
+        # Containers on the host network have no network stats
+        stats = make_stats(500, 5000, 1100)
+        stats["networks"] = None
+        self.assertEqual(ResourceMonitor._parse_stats(stats)[4:], (0, 0))
+
+    def test_02_summarize(self):
+        values = {
+            "time": np.array([0.0, 1.0, 2.0]),
+            "cpu_percent": np.array([10.0, 20.0, 60.0]),
+            "memory_bytes": np.array([100.0, 300.0, 200.0]),
+            "blkio_read_bytes": np.array([5.0, 10.0, 25.0]),
+            "blkio_write_bytes": np.array([0.0, 0.0, 0.0]),
+            "net_rx_bytes": np.array([1.0, 2.0, 3.0]),
+            "net_tx_bytes": np.array([0.0, 4.0, 8.0]),
+        }
+        summary = ResourceMonitor.summarize(values)
+        self.assertEqual(summary["samples"], 3)
+        self.assertAlmostEqual(summary["cpu_percent_mean"], 30.0)
+        self.assertEqual(summary["cpu_percent_max"], 60.0)
+        self.assertAlmostEqual(summary["memory_bytes_mean"], 200.0)
+        self.assertEqual(summary["memory_bytes_max"], 300.0)
+        # Counters report what was transferred while sampled
+        self.assertEqual(summary["blkio_read_bytes"], 20.0)
+        self.assertEqual(summary["net_rx_bytes"], 2.0)
+        self.assertEqual(summary["net_tx_bytes"], 8.0)
+
+        empty = {metric: np.array([]) for metric in ResourceMonitor.METRICS}
+        self.assertEqual(ResourceMonitor.summarize(empty), {})
+
+    def test_03_watch_and_stop(self):
+        container = FakeContainer(
+            [make_stats(100 * i, 1000 * i, 1100, read=i) for i in range(1, 4)]
+        )
+        monitor = ResourceMonitor(interval=0)
+        monitor.watch("mysql", container)
+        # Wait for the stats to be consumed before stopping
+        while len(monitor._samples["mysql"]) < 3:
+            time.sleep(0.01)
+
+        with tempfile.TemporaryDirectory() as telemetry_dir:
+            summary = monitor.stop(telemetry_dir, prefix="tpcc")
+            self.assertEqual(summary["mysql"]["samples"], 3)
+            self.assertEqual(summary["mysql"]["blkio_read_bytes"], 2.0)
+            telemetry_file = summary["telemetry_file"]
+            self.assertTrue(os.path.basename(telemetry_file).startswith("tpcc_"))
+            with np.load(telemetry_file) as telemetry:
+                self.assertEqual(len(telemetry["mysql_cpu_percent"]), 3)
+                self.assertEqual(
+                    set(telemetry.files),
+                    {f"mysql_{metric}" for metric in ResourceMonitor.METRICS},
+                )
+
+        # Sampling has stopped
+        self.assertFalse(any(thread.is_alive() for thread in monitor._threads))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import configparser
+import importlib.util
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from csstuning.dbms.dbms_config_space import MySQLConfigSpace
+
+HAS_SCIPY = importlib.util.find_spec("scipy") is not None
+
+
+class TestMySQLConfigSpace(unittest.TestCase):
+    def setUp(self):
+        # The knob definitions of the source tree
+        env_config = configparser.ConfigParser()
+        env_config.read_dict(
+            {
+                "database": {
+                    "dbms_config_dir": os.path.join(
+                        package_dir, "cssbench", "dbms", "config", "mysql"
+                    )
+                }
+            }
+        )
+        patch = mock.patch(
+            "csstuning.config.config_loader.get_config", return_value=env_config
+        )
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def check_sample_batch(self, method):
+        config_space = MySQLConfigSpace(seed=42)
+        configs = config_space.sample_batch(200, method=method)
+        self.assertEqual(len(configs), 200)
+        for config in configs:
+            # Raises ValueError on a violated constraint
+            config_space._validate_config(config)
+
+        # The same seed draws the same configurations
+        self.assertEqual(
+            MySQLConfigSpace(seed=42).sample_batch(200, method=method), configs
+        )
+
+    def test_01_sample_batch_uniform(self):
+        self.check_sample_batch("uniform")
+
+    def test_02_sample_batch_lhs(self):
+        self.check_sample_batch("lhs")
+
+    @unittest.skipUnless(HAS_SCIPY, "Sobol sampling requires scipy")
+    def test_03_sample_batch_sobol(self):
+        self.check_sample_batch("sobol")
+
+    def test_04_memory_budget(self):
+        config_space = MySQLConfigSpace(seed=42)
+        config_space.apply_resource_limits(mem=4, vcpus=2)
+        budget = 4 * 1024**3
+        sessions = config_space.THREADS_PER_VCPU * 2
+
+        def memory_usage(config):
+            return (
+                config["innodb_buffer_pool_size"]
+                + sum(config[name] for name in config_space.GLOBAL_BUFFERS)
+                + min(config["max_connections"], sessions)
+                * sum(config[name] for name in config_space.SESSION_BUFFERS)
+            )
+
+        self.assertLessEqual(memory_usage(config_space.make_config()), budget)
+        for method in ("uniform", "lhs"):
+            for config in config_space.sample_batch(200, method=method):
+                self.assertLessEqual(memory_usage(config), budget)
+                config_space._validate_config(config)
+
+        # Buffers set beyond the budget are scaled down to it
+        sort_buffer = config_space.config_items["sort_buffer_size"]
+        config = config_space.make_config(
+            {"sort_buffer_size": sort_buffer.max_value, "max_connections": 1000}
+        )
+        self.assertLessEqual(memory_usage(config), budget)
+        self.assertGreaterEqual(config["sort_buffer_size"], sort_buffer.min_value)
+
+        config_space.set_current_config({"join_buffer_size": 1024**3})
+        self.assertLessEqual(memory_usage(config_space.get_current_config()), budget)
+
+    def test_05_encode_decode_round_trip(self):
+        config_space = MySQLConfigSpace(seed=42)
+        configs = config_space.sample_batch(500)
+        for one_hot in (False, True):
+            array = config_space.encode_batch(configs, one_hot=one_hot)
+            self.assertEqual(config_space.decode_batch(array, one_hot=one_hot), configs)
+
+        # The bounds of 2^64 ranges are exact
+        item = config_space.config_items["max_join_size"]
+        self.assertEqual(item.max_value, 2**64 - 1)
+        for value in (item.min_value, item.max_value):
+            config = dict(configs[0], max_join_size=value)
+            decoded = config_space.decode_batch(config_space.encode_batch([config]))
+            self.assertEqual(decoded[0]["max_join_size"], value)
+        with self.assertRaises(ValueError):
+            config_space.encode_batch([dict(configs[0], max_join_size=2**64)])
+
+        # Other values decode to one sharing their encoding
+        config = dict(configs[0], max_join_size=1334720166937747)
+        array = config_space.encode_batch([config])
+        decoded = config_space.decode_batch(array)
+        self.assertAlmostEqual(
+            decoded[0]["max_join_size"] / 1334720166937747, 1.0, places=12
+        )
+        self.assertTrue(np.array_equal(config_space.encode_batch(decoded), array))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import configparser
+import unittest
+from unittest import mock
+
+import pymysql
+
+from csstuning.dbms.connection import MySQLConnection
+
+
+class TestMySQLConnection(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch("pymysql.connect")
+        self.connect = patch.start()
+        self.addCleanup(patch.stop)
+        self.connection = MySQLConnection("127.0.0.1", 3307, "root", "secret")
+
+    def test_01_connection_is_reused(self):
+        first = self.connection.get()
+        self.assertIs(self.connection.get(), first)
+        self.connect.assert_called_once_with(
+            host="127.0.0.1",
+            port=3307,
+            user="root",
+            password="secret",
+            autocommit=True,
+        )
+        # Reused connections are checked, and reconnected if the server restarted
+        first.ping.assert_called_once_with(reconnect=True)
+
+        with self.connection.cursor() as cursor:
+            self.assertIs(cursor, first.cursor.return_value.__enter__.return_value)
+
+    def test_02_reconnect_after_failure(self):
+        first = self.connection.get()
+        first.ping.side_effect = pymysql.err.OperationalError(2013, "Lost connection")
+        with self.assertRaises(pymysql.err.OperationalError):
+            self.connection.get()
+        first.close.assert_called_once()
+
+        # The next call starts over with a new connection
+        self.connect.return_value = mock.MagicMock()
+        self.assertIs(self.connection.get(), self.connect.return_value)
+        self.assertEqual(self.connect.call_count, 2)
+
+    def test_03_is_healthy(self):
+        self.assertTrue(self.connection.is_healthy())
+        self.connection.close()
+
+        self.connect.side_effect = pymysql.err.OperationalError(2003, "Refused")
+        self.assertFalse(self.connection.is_healthy())
+        self.assertIsNone(self.connection._connection)
+
+    def test_04_from_config(self):
+        env_config = configparser.ConfigParser()
+        env_config.read_dict(
+            {
+                "database": {
+                    "mysql_host": "db.local",
+                    "mysql_port": "3310",
+                    "mysql_user": "tuner",
+                    "mysql_password": "hunter2",
+                }
+            }
+        )
+        with mock.patch(
+            "csstuning.config.config_loader.get_config", return_value=env_config
+        ):
+            connection = MySQLConnection.from_config()
+            self.assertEqual(
+                (connection.host, connection.port, connection.user),
+                ("db.local", 3310, "tuner"),
+            )
+            self.assertEqual(connection.password, "hunter2")
+            # Pool instances override the port
+            self.assertEqual(MySQLConnection.from_config(port=3311).port, 3311)
+
+
+if __name__ == "__main__":
+    unittest.main()
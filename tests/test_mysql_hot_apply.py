@@ -0,0 +1,145 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import configparser
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pymysql
+
+from csstuning.dbms.dbms_benchmark import MySQLBenchmark
+
+
+class FakeCursor:
+    """Sets global variables, rounding binlog_cache_size down to 4 KiB."""
+
+    def __init__(self, variables):
+        self.variables = variables
+        self.statements = []
+        self._row = None
+
+    def execute(self, query, args=None):
+        self.statements.append(query)
+        if query.startswith("SET GLOBAL "):
+            name = query.split()[2]
+            value = args[0]
+            if name == "binlog_cache_size":
+                value -= value % 4096
+            self.variables[name] = value
+        elif query.startswith("SELECT @@GLOBAL."):
+            self._row = (self.variables[query[len("SELECT @@GLOBAL."):]],)
+
+    def fetchone(self):
+        return self._row
+
+
+class TestMySQLHotApply(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        env_config = configparser.ConfigParser()
+        env_config.read(Path(package_dir, "csstuning", "config", "default.conf"))
+        for section in env_config.sections():
+            for key, value in env_config.items(section):
+                env_config.set(
+                    section, key, value.replace("{csstuning_dir}", tmp_dir.name)
+                )
+        # The knob definitions of the source tree
+        env_config.set(
+            "database",
+            "dbms_config_dir",
+            os.path.join(package_dir, "cssbench", "dbms", "config", "mysql"),
+        )
+        env_config.set("database", "hot_apply", "True")
+        env_config.set("database", "restore_snapshot", "False")
+
+        for patch in (
+            mock.patch(
+                "csstuning.config.config_loader.get_config", return_value=env_config
+            ),
+            mock.patch("docker.from_env"),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.benchmark = MySQLBenchmark("tpcc")
+        self.benchmark.mysql_container = mock.MagicMock(status="running")
+        self.cursor = FakeCursor({})
+        self.benchmark.connection = mock.MagicMock()
+        self.benchmark.connection.cursor.return_value.__enter__.return_value = (
+            self.cursor
+        )
+
+        # Restarts are recorded instead of starting a container
+        for name in ("start_mysql", "_needs_data_dir", "_wait_for_mysql_ready"):
+            patch = mock.patch.object(self.benchmark, name, return_value=False)
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.restart = self.benchmark.start_mysql
+
+        # MySQL was started on the default configuration
+        self.config = dict(self.benchmark.config_space.get_current_config())
+        self.benchmark.apply_config(self.config)
+        self.restart.reset_mock()
+
+    def apply(self, **knobs):
+        self.cursor.statements.clear()
+        self.config = dict(self.config, **knobs)
+        self.benchmark.apply_config(self.config)
+        return self.restart.called
+
+    def test_01_dynamic_knobs_are_set_online(self):
+        self.assertFalse(self.apply(binlog_cache_size=65536, autocommit="OFF"))
+        self.assertEqual(
+            self.cursor.statements,
+            [
+                "SET GLOBAL autocommit = %s",
+                "SET GLOBAL binlog_cache_size = %s",
+                "SELECT @@GLOBAL.binlog_cache_size",
+            ],
+        )
+        self.assertEqual(self.cursor.variables["binlog_cache_size"], 65536)
+        self.assertIsNone(self.benchmark.adjusted_knobs)
+
+        # Unchanged knobs are not set again
+        self.assertFalse(self.apply())
+        self.assertEqual(self.cursor.statements, [])
+
+    def test_02_adjusted_knobs_are_reported(self):
+        self.assertFalse(self.apply(binlog_cache_size=65537))
+        self.assertEqual(self.benchmark.adjusted_knobs, {"binlog_cache_size": 65536})
+        with mock.patch.object(self.benchmark, "parse_results", return_value={}):
+            result = self.benchmark._collect_results()
+        self.assertEqual(result["adjusted_knobs"], {"binlog_cache_size": 65536})
+
+    def test_03_restart_fallback(self):
+        # Static knobs and the buffer pool size are only changed by a restart
+        self.assertTrue(self.apply(back_log=1000))
+        self.restart.reset_mock()
+        pool_size = self.config["innodb_buffer_pool_size"]
+        self.assertTrue(self.apply(innodb_buffer_pool_size=pool_size + 2**20))
+        self.assertEqual(self.cursor.statements, [])
+
+        # So are knobs MySQL rejects
+        self.restart.reset_mock()
+        with mock.patch.object(
+            self.cursor,
+            "execute",
+            side_effect=pymysql.err.OperationalError(1231, "Wrong value"),
+        ):
+            self.assertTrue(self.apply(binlog_cache_size=8192))
+
+        # And knobs of a stopped server
+        self.restart.reset_mock()
+        self.benchmark.mysql_container.status = "exited"
+        self.assertTrue(self.apply(binlog_cache_size=16384))
+
+
+if __name__ == "__main__":
+    unittest.main()
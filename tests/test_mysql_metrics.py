@@ -0,0 +1,50 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import unittest
+
+from csstuning.dbms.mysql_metrics import MySQLInternalMetrics
+
+
+class TestMySQLInternalMetrics(unittest.TestCase):
+    def test_01_delta(self):
+        before = {
+            "status.Innodb_rows_read": (100.0, False),
+            "status.Threads_running": (1.0, True),
+        }
+        after = {
+            "status.Innodb_rows_read": (250.0, False),
+            "status.Threads_running": (4.0, True),
+            "innodb.dml_reads": (10.0, False),
+        }
+        deltas = MySQLInternalMetrics.delta(before, after)
+
+        # Counters missing from the first snapshot have no delta
+        self.assertEqual(
+            deltas, {"status.Innodb_rows_read": 150.0, "status.Threads_running": 4.0}
+        )
+
+    def test_02_vector_order(self):
+        metrics = MySQLInternalMetrics()
+        first = metrics.vector({"b": 2.0, "a": 1.0})
+        self.assertEqual(metrics.names, ["a", "b"])
+        self.assertEqual(first.tolist(), [1.0, 2.0])
+
+        # The layout stays the one of the first vector
+        second = metrics.vector({"c": 3.0, "b": 5.0})
+        self.assertEqual(second.tolist(), [0.0, 5.0])
+
+    def test_03_status_gauges(self):
+        gauges = MySQLInternalMetrics.STATUS_GAUGES
+        self.assertTrue(gauges.match("Threads_connected"))
+        self.assertTrue(gauges.match("Innodb_buffer_pool_pages_dirty"))
+        self.assertFalse(gauges.match("Innodb_buffer_pool_pages_flushed"))
+        self.assertFalse(gauges.match("Opened_tables"))
+
+
+if __name__ == "__main__":
+    unittest.main()
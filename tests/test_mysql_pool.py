@@ -0,0 +1,115 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import configparser
+import math
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from csstuning.dbms.dbms_benchmark import MySQLBenchmark
+
+BENCHBASE_CONFIG = """<?xml version="1.0"?>
+<parameters>
+    <url>jdbc:mysql://localhost:3307/benchbase?rewriteBatchedStatements=true</url>
+</parameters>
+"""
+
+
+class TestMySQLPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        env_config = configparser.ConfigParser()
+        env_config.read(Path(package_dir, "csstuning", "config", "default.conf"))
+        for section in env_config.sections():
+            for key, value in env_config.items(section):
+                env_config.set(
+                    section, key, value.replace("{csstuning_dir}", self.tmp_dir.name)
+                )
+        # The knob definitions of the source tree
+        env_config.set(
+            "database",
+            "dbms_config_dir",
+            os.path.join(package_dir, "cssbench", "dbms", "config", "mysql"),
+        )
+
+        self.patches = [
+            mock.patch(
+                "csstuning.config.config_loader.get_config", return_value=env_config
+            ),
+            mock.patch("docker.from_env"),
+            mock.patch("os.cpu_count", return_value=64),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+        self.benchmark = MySQLBenchmark("tpcc")
+        self.benchmark.benchbase_config_dir.mkdir(parents=True)
+        (self.benchmark.benchbase_config_dir / "sample_tpcc_config.xml").write_text(
+            BENCHBASE_CONFIG
+        )
+        # The pool starts from the workload's snapshot
+        self.benchmark.snapshots.path("tpcc").mkdir(parents=True)
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.tmp_dir.cleanup()
+
+    def test_01_instances_are_isolated(self):
+        instances = self.benchmark._get_pool(2)
+        self.assertEqual([i.instance_id for i in instances], [0, 1])
+
+        cpus = math.ceil(self.benchmark.vcpus)
+        for i, instance in enumerate(instances):
+            self.assertEqual(
+                instance.mysql_container_name,
+                f"{self.benchmark.mysql_container_name}_{i}",
+            )
+            self.assertEqual(
+                instance.benchbase_container_name,
+                f"{self.benchmark.benchbase_container_name}_{i}",
+            )
+            self.assertEqual(instance.mysql_port, self.benchmark.mysql_port + i + 1)
+            self.assertEqual(instance.connection.port, instance.mysql_port)
+            self.assertEqual(instance.mysql_config_file.name, f"custom_{i}.cnf")
+            self.assertEqual(instance.mysql_data_dir.name, f"mysql_data_{i}")
+            self.assertEqual(instance.cpuset, f"{i * cpus}-{(i + 1) * cpus - 1}")
+            self.assertEqual(
+                instance.benchbase_results_dir,
+                self.benchmark.benchbase_results_dir / f"instance_{i}",
+            )
+            self.assertTrue(instance.benchbase_results_dir.is_dir())
+
+            # BenchBase connects to the instance's own port
+            config_file = instance.benchbase_config_dir / "sample_tpcc_config.xml"
+            config = config_file.read_text()
+            self.assertIn(f"localhost:{instance.mysql_port}/benchbase", config)
+            self.assertIn("rewriteBatchedStatements=true", config)
+
+            # Metric vectors of all instances share one layout
+            self.assertIs(instance.internal_metrics, self.benchmark.internal_metrics)
+
+        # The owner of the pool keeps its own settings
+        self.assertIsNone(self.benchmark.cpuset)
+        self.assertIsNone(self.benchmark.instance_id)
+
+    def test_02_pool_is_reused(self):
+        instances = self.benchmark._get_pool(2)
+        self.assertEqual(self.benchmark._get_pool(1), instances[:1])
+        self.assertEqual(self.benchmark._get_pool(3)[:2], instances)
+        self.assertEqual(len(self.benchmark._pool), 3)
+
+    def test_03_not_enough_cpus(self):
+        with mock.patch("os.cpu_count", return_value=1):
+            instance = self.benchmark._get_pool(1)[0]
+        self.assertIsNone(instance.cpuset)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import configparser
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import docker
+import pymysql
+
+from csstuning.dbms import dbms_benchmark
+from csstuning.dbms.dbms_benchmark import MySQLBenchmark
+
+INNODB_STARTED = b"[Note] InnoDB: 5.7.44 started; log sequence number 2558216\n"
+INIT_READY = b"mysqld: ready for connections.\nVersion: '5.7.44'  port: 0  MySQL\n"
+READY = b"mysqld: ready for connections.\nVersion: '5.7.44'  port: 3307  MySQL\n"
+
+
+class FakeContainer:
+    """Writes the given log output, one chunk per reload."""
+
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+        self._output = b""
+        self.status = "running"
+
+    def reload(self):
+        if self._chunks:
+            self._output += self._chunks.pop(0)
+
+    def logs(self, stdout=True, stderr=True):
+        return self._output
+
+
+class TestMySQLReadiness(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        env_config = configparser.ConfigParser()
+        env_config.read(Path(package_dir, "csstuning", "config", "default.conf"))
+        for section in env_config.sections():
+            for key, value in env_config.items(section):
+                env_config.set(
+                    section, key, value.replace("{csstuning_dir}", tmp_dir.name)
+                )
+        # The knob definitions of the source tree
+        env_config.set(
+            "database",
+            "dbms_config_dir",
+            os.path.join(package_dir, "cssbench", "dbms", "config", "mysql"),
+        )
+
+        for patch in (
+            mock.patch(
+                "csstuning.config.config_loader.get_config", return_value=env_config
+            ),
+            mock.patch("docker.from_env"),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.benchmark = MySQLBenchmark("tpcc")
+        self.benchmark.connection = mock.MagicMock()
+
+        # A clock that only moves when sleeping
+        self.clock = 1000.0
+        self.sleeps = []
+
+        def sleep(seconds):
+            self.sleeps.append(seconds)
+            self.clock += seconds
+
+        for name, side_effect in (("time", lambda: self.clock), ("sleep", sleep)):
+            patch = mock.patch.object(dbms_benchmark.time, name, side_effect)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def refuse_connections(self, times):
+        """Connections fail the given number of times, then succeed."""
+        error = pymysql.err.OperationalError(2003, "Can't connect")
+        self.benchmark.connection.get.side_effect = [error] * times + [mock.DEFAULT]
+
+    def test_01_backoff_schedule(self):
+        probe = self.benchmark._start_readiness_probe(timeout=60)
+        self.assertEqual(probe["timeout"], 60)
+        intervals = [self.benchmark._next_probe_interval(probe) for _ in range(10)]
+        self.assertEqual([round(i, 6) for i in intervals[:3]], [0.1, 0.15, 0.225])
+        self.assertTrue(all(a <= b for a, b in zip(intervals, intervals[1:])))
+        self.assertEqual(intervals[-1], MySQLBenchmark.READY_POLL_MAX_INTERVAL)
+
+        # The default timeout comes from the configuration
+        probe = self.benchmark._start_readiness_probe()
+        self.assertEqual(probe["timeout"], 300)
+
+    def test_02_log_markers_reset_the_interval(self):
+        self.benchmark.mysql_container = FakeContainer(
+            [b"", INNODB_STARTED[:20], INNODB_STARTED[20:], INIT_READY, READY]
+        )
+        probe = self.benchmark._start_readiness_probe(timeout=60)
+        probe["interval"] = 2.0
+
+        # Markers only count once their line is complete
+        self.benchmark._scan_startup_log(probe)
+        self.benchmark._scan_startup_log(probe)
+        self.assertIsNone(probe["innodb_started_at"])
+        self.clock += 5.0
+        self.benchmark._scan_startup_log(probe)
+        self.assertEqual(probe["innodb_started_at"], self.clock)
+        self.assertEqual(probe["interval"], 0.1)
+
+        # The temporary server of the entrypoint is not the one waited for
+        probe["interval"] = 2.0
+        self.benchmark._scan_startup_log(probe)
+        self.assertEqual(probe["interval"], 2.0)
+        self.benchmark._scan_startup_log(probe)
+        self.assertEqual(probe["interval"], 0.1)
+
+    def test_03_wait_until_ready(self):
+        self.benchmark.mysql_container = FakeContainer([b"", INNODB_STARTED])
+        self.benchmark._mysql_start_time = 0.5
+        self.refuse_connections(4)
+        self.assertTrue(self.benchmark._wait_for_mysql_ready(timeout=60))
+
+        # InnoDB started on the second probe, which resets the backoff
+        self.assertEqual([round(s, 6) for s in self.sleeps], [0.1, 0.1, 0.15, 0.225])
+        timings = self.benchmark.startup_timings
+        self.assertEqual(timings["container_start"], 0.5)
+        self.assertAlmostEqual(timings["innodb_recovery"], 0.1)
+        self.assertAlmostEqual(timings["ready"], sum(self.sleeps))
+
+    def test_04_timeout(self):
+        self.refuse_connections(1000)
+        with self.assertRaisesRegex(RuntimeError, "failed to start"):
+            self.benchmark._wait_for_mysql_ready(timeout=10)
+        self.assertGreaterEqual(sum(self.sleeps), 10)
+        self.assertLess(sum(self.sleeps) - self.sleeps[-1], 10)
+
+    def test_05_exited_container(self):
+        container = FakeContainer([b"[ERROR] Aborting\n"])
+        self.benchmark.mysql_container = container
+        self.refuse_connections(1000)
+        probe = self.benchmark._start_readiness_probe(timeout=60)
+        self.assertFalse(self.benchmark._probe_mysql_ready(probe))
+        self.assertIsInstance(probe["last_error"], pymysql.err.OperationalError)
+
+        # The status refreshed by the log scan stops the wait early
+        container.status = "exited"
+        with self.assertRaisesRegex(RuntimeError, "failed to start"):
+            self.benchmark._probe_mysql_ready(probe)
+
+        # Logs that can't be read are skipped
+        container.status = "running"
+        with mock.patch.object(
+            container, "logs", side_effect=docker.errors.APIError("Gone")
+        ):
+            self.assertFalse(self.benchmark._probe_mysql_ready(probe))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from csstuning.result_cache import ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_file = Path(self.tmp_dir.name) / "results.db"
+
+    def test_01_hit_and_miss(self):
+        cache = ResultCache(self.cache_file)
+        key = ResultCache.make_key("GCC", "cbench-bzip2", "-fgcse", "sha256:abc")
+
+        self.assertIsNone(cache.get(key))
+        cache.put(key, {"avrg_exec_time": 0.5})
+        self.assertEqual(cache.get(key), {"avrg_exec_time": 0.5})
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "entries": 1})
+        cache.close()
+
+        # Results persist across instances
+        cache = ResultCache(self.cache_file)
+        self.assertEqual(cache.get(key), {"avrg_exec_time": 0.5})
+        cache.close()
+
+    def test_02_evict_least_recently_used(self):
+        cache = ResultCache(self.cache_file, max_entries=2)
+        for i in range(3):
+            cache.put(str(i), {"value": i})
+            cache.get("0")
+            time.sleep(0.01)
+
+        self.assertIsNotNone(cache.get("0"))
+        self.assertIsNone(cache.get("1"))
+        self.assertIsNotNone(cache.get("2"))
+        cache.close()
+
+    def test_03_expire_old_entries(self):
+        cache = ResultCache(self.cache_file, max_age=0.05)
+        cache.put("key", {"value": 1})
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("key"))
+        self.assertEqual(cache.stats()["entries"], 0)
+        cache.close()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
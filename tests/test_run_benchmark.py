@@ -0,0 +1,193 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(package_dir, "cssbench", "compiler", "benchmark"))
+
+import math
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import run
+
+
+def fake_executable(iteration_times):
+    """A run_executable() whose iterations take the given times in turn."""
+    times = iter(iteration_times)
+    calls = []
+
+    def run_executable(command, repeat_times, verbose=False):
+        calls.append(repeat_times)
+        return {"execution_time": next(times) * repeat_times, "maxrss": 10}
+
+    return run_executable, calls
+
+
+class TestRunBenchmark(unittest.TestCase):
+    def test_01_summarize_samples(self):
+        stats = run.summarize_samples([1.0, 2.0, 3.0, 4.0])
+        self.assertAlmostEqual(stats["mean"], 2.5)
+        self.assertAlmostEqual(stats["median"], 2.5)
+        self.assertAlmostEqual(stats["stddev"], math.sqrt(5 / 3))
+        half_width = run.T_CRITICAL_95[2] * math.sqrt(5 / 3) / 2
+        self.assertAlmostEqual(stats["ci_low"], 2.5 - half_width)
+        self.assertAlmostEqual(stats["ci_high"], 2.5 + half_width)
+
+        # One sample says nothing about the spread
+        stats = run.summarize_samples([3.0])
+        self.assertEqual(stats["stddev"], 0.0)
+        self.assertEqual(stats["ci_low"], -math.inf)
+        self.assertEqual(stats["ci_high"], math.inf)
+
+    def test_02_split_repetitions(self):
+        self.assertEqual(run.split_repetitions(100, 10), [10] * 10)
+        self.assertEqual(run.split_repetitions(13, 10), [2, 2, 2] + [1] * 7)
+        self.assertEqual(sum(run.split_repetitions(47, 10)), 47)
+
+    def test_03_measure_adaptive_ci_stop(self):
+        # Identical samples have a zero-width interval after min_samples
+        executable, calls = fake_executable([1.0] * 100)
+        with mock.patch.object(run, "run_executable", executable):
+            result = run.measure_adaptive("./a.out", 4, min_samples=5)
+        self.assertEqual(result["num_samples"], 5)
+        self.assertEqual(result["repeat_times"], 20)
+        self.assertAlmostEqual(result["avrg_exec_time"], 1.0)
+        self.assertEqual(result["maxrss"], 10)
+        self.assertNotIn("censored", result)
+
+        # Noisy samples run up to max_samples
+        executable, calls = fake_executable([1.0, 2.0] * 50)
+        with mock.patch.object(run, "run_executable", executable):
+            result = run.measure_adaptive(
+                "./a.out", 1, rel_ci=0.01, min_samples=3, max_samples=8
+            )
+        self.assertEqual(result["num_samples"], 8)
+
+    def test_04_measure_adaptive_repetition_list(self):
+        executable, calls = fake_executable([1.0] * 10)
+        with mock.patch.object(run, "run_executable", executable):
+            result = run.measure_adaptive(
+                "./a.out",
+                run.split_repetitions(13, 10),
+                rel_ci=0.0,
+                time_budget=math.inf,
+                min_samples=10,
+                max_samples=10,
+            )
+        self.assertEqual(calls, [2, 2, 2] + [1] * 7)
+        self.assertEqual(result["repeat_times"], 13)
+
+    def test_05_measure_adaptive_censoring(self):
+        executable, calls = fake_executable([5.0] * 10)
+        with mock.patch.object(run, "run_executable", executable):
+            result = run.measure_adaptive(
+                "./a.out",
+                1,
+                rel_ci=0.0,
+                time_budget=math.inf,
+                min_samples=10,
+                max_samples=10,
+                threshold=1.0,
+            )
+        self.assertTrue(result["censored"])
+        self.assertLess(result["num_samples"], 10)
+
+        executable, calls = fake_executable([1.0] * 10)
+        with mock.patch.object(run, "run_executable", executable):
+            result = run.measure_adaptive(
+                "./a.out",
+                1,
+                rel_ci=0.0,
+                time_budget=math.inf,
+                min_samples=10,
+                max_samples=10,
+                threshold=1.0,
+            )
+        self.assertFalse(result["censored"])
+        self.assertEqual(result["num_samples"], 10)
+
+    def test_06_is_clearly_slower(self):
+        # The sum alone exceeds what max_samples samples may take
+        samples = [25.0]
+        stats = run.summarize_samples(samples)
+        self.assertTrue(run.is_clearly_slower(samples, stats, 2.0, 10))
+        self.assertFalse(run.is_clearly_slower(samples, stats, 3.0, 10))
+
+        # The interval only counts from three samples on
+        samples = [3.0, 3.0]
+        stats = run.summarize_samples(samples)
+        self.assertFalse(run.is_clearly_slower(samples, stats, 2.0, 10))
+        samples = [3.0, 3.1, 2.9]
+        stats = run.summarize_samples(samples)
+        self.assertTrue(run.is_clearly_slower(samples, stats, 2.0, 10))
+        self.assertFalse(run.is_clearly_slower(samples, stats, 3.0, 10))
+
+    def test_07_object_cache_key(self):
+        preprocessed = {"output": b"int main() { return 0; }"}
+        commands = []
+
+        def check_output(command, stderr=None):
+            commands.append(command)
+            return preprocessed["output"]
+
+        with mock.patch.object(run.subprocess, "check_output", check_output):
+            key = run.object_cache_key("main.c", "GCC", "-DN=1", "-O1 -fgcse")
+            self.assertEqual(
+                commands[-1][:2] + commands[-1][-4:],
+                ["gcc", "-E", "-DN=1", "-O1", "-fgcse", "main.c"],
+            )
+            self.assertEqual(
+                run.object_cache_key("main.c", "GCC", "-DN=1", "-O1 -fgcse"), key
+            )
+
+            # Macros only count through the preprocessed source
+            self.assertEqual(
+                run.object_cache_key("main.c", "GCC", "-DUNUSED=1", "-O1 -fgcse"),
+                key,
+            )
+            preprocessed["output"] = b"int main() { return 1; }"
+            self.assertNotEqual(
+                run.object_cache_key("main.c", "GCC", "-DN=2", "-O1 -fgcse"), key
+            )
+            preprocessed["output"] = b"int main() { return 0; }"
+
+            # So do the flags and the compiler, whose flags skip the preprocessor
+            self.assertNotEqual(
+                run.object_cache_key("main.c", "GCC", "-DN=1", "-O1 -fno-gcse"), key
+            )
+            llvm_key = run.object_cache_key("main.c", "LLVM", "-DN=1", "-O1 -fgcse")
+            self.assertNotEqual(llvm_key, key)
+            self.assertEqual(commands[-1][:2], ["clang", "-E"])
+            self.assertNotIn("-fgcse", commands[-1])
+
+    def test_08_load_binary_record(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        result = {"avrg_exec_time": 0.5, "compilation_time": 3.0, "file_size": 100}
+
+        with mock.patch.object(run, "CACHE_DIR", Path(tmp_dir.name)):
+            self.assertIsNone(run.load_binary_record("bitcount", "GCC", "abc", 10))
+            run.save_binary_record("bitcount", "GCC", "abc", 10, result)
+
+            # Build metrics belong to the build reusing the measurements
+            self.assertEqual(
+                run.load_binary_record("bitcount", "GCC", "abc", 10),
+                {"avrg_exec_time": 0.5},
+            )
+            # Measurements of other repetition counts, binaries, compilers
+            # and benchmarks don't match
+            self.assertIsNone(run.load_binary_record("bitcount", "GCC", "abc", 20))
+            self.assertIsNone(run.load_binary_record("bitcount", "GCC", "abd", 10))
+            self.assertIsNone(run.load_binary_record("bitcount", "LLVM", "abc", 10))
+            self.assertIsNone(run.load_binary_record("bzip2", "GCC", "abc", 10))
+
+            # Unreadable records are ignored
+            run.binary_record_path("bitcount", "GCC", "abc").write_text("{")
+            self.assertIsNone(run.load_binary_record("bitcount", "GCC", "abc", 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
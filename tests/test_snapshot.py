@@ -0,0 +1,76 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+sys.path.insert(0, package_dir)
+
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from csstuning.dbms.snapshot import DataDirSnapshots
+
+
+class TestDataDirSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.tmp_dir.name)
+        self.data_dir = root / "mysql_data"
+        (self.data_dir / "benchbase").mkdir(parents=True)
+        (self.data_dir / "ibdata1").write_bytes(b"pristine")
+        (self.data_dir / "benchbase" / "warehouse.ibd").write_bytes(b"rows")
+        self.snapshots = DataDirSnapshots(root / "snapshots")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_01_capture_and_restore(self):
+        self.assertFalse(self.snapshots.exists("tpcc"))
+        self.snapshots.capture(self.data_dir, "tpcc")
+        self.assertTrue(self.snapshots.exists("tpcc"))
+        self.assertFalse(self.snapshots.path("tpcc").with_name("tpcc.tmp").exists())
+
+        # An evaluation modifies the data and leaves files behind
+        (self.data_dir / "ibdata1").write_bytes(b"modified")
+        (self.data_dir / "binlog.000001").write_bytes(b"log")
+
+        self.snapshots.restore(self.data_dir, "tpcc")
+        self.assertEqual((self.data_dir / "ibdata1").read_bytes(), b"pristine")
+        self.assertEqual(
+            (self.data_dir / "benchbase" / "warehouse.ibd").read_bytes(), b"rows"
+        )
+        self.assertFalse((self.data_dir / "binlog.000001").exists())
+
+        # Restoring must not alter the snapshot itself
+        (self.data_dir / "ibdata1").write_bytes(b"modified")
+        self.snapshots.restore(self.data_dir, "tpcc")
+        self.assertEqual((self.data_dir / "ibdata1").read_bytes(), b"pristine")
+
+    def test_02_recapture_replaces_snapshot(self):
+        self.snapshots.capture(self.data_dir, "tpcc")
+        (self.data_dir / "ibdata1").write_bytes(b"reloaded")
+        self.snapshots.capture(self.data_dir, "tpcc")
+        self.assertEqual(
+            (self.snapshots.path("tpcc") / "ibdata1").read_bytes(), b"reloaded"
+        )
+
+    def test_03_restore_missing_snapshot(self):
+        with self.assertRaises(FileNotFoundError):
+            self.snapshots.restore(self.data_dir, "ycsb")
+        # The data directory is left alone
+        self.assertEqual((self.data_dir / "ibdata1").read_bytes(), b"pristine")
+
+    def test_04_regular_copy_fallback(self):
+        error = subprocess.CalledProcessError(1, "cp")
+        with mock.patch("subprocess.run", side_effect=error):
+            self.snapshots.capture(self.data_dir, "tpcc")
+            (self.data_dir / "ibdata1").write_bytes(b"modified")
+            self.snapshots.restore(self.data_dir, "tpcc")
+        self.assertEqual((self.data_dir / "ibdata1").read_bytes(), b"pristine")
+
+
+if __name__ == "__main__":
+    unittest.main()